@@ -1,8 +1,7 @@
 from flask import Flask, session
 from config import Config
 from .extensions import db, migrate, mail
-from .models import User
-from datetime import datetime
+from datetime import datetime, date
 
 def create_app():
     app = Flask(__name__, 
@@ -14,6 +13,27 @@ def create_app():
     migrate.init_app(app, db)
     mail.init_app(app)
 
+    from .hooks import init_write_hooks
+    from . import flags  # registers the status-flag write hook
+    from . import vaccine_due  # registers the vaccine schedule write hook
+    from . import dashboard_snapshot  # registers the dashboard staleness hook
+    from . import search  # creates the full-text index alongside create_all()
+    init_write_hooks(db)
+    from .activity import init_activity_log
+    init_activity_log(db)
+    from .data_versions import init_data_versions
+    init_data_versions(db)
+    from .field_clocks import init_field_clocks
+    init_field_clocks(db)
+    from .photos import init_photo_variants
+    init_photo_variants(db)
+
+    from .assets import init_assets
+    init_assets(app)
+
+    from .commands import register_commands
+    register_commands(app)
+
     # Register blueprints
     from .blueprints.auth import auth_bp
     from .blueprints.dashboard import dashboard_bp
@@ -24,6 +44,8 @@ def create_app():
     from .blueprints.users import users_bp
     from .blueprints.sickness import sickness_bp
     from .blueprints.calendar import calendar_bp
+    from .blueprints.api import api_bp
+    from .blueprints.sync import sync_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -34,6 +56,8 @@ def create_app():
     app.register_blueprint(users_bp)
     app.register_blueprint(sickness_bp)
     app.register_blueprint(calendar_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(sync_bp)
 
     # --- Context processors ---
     @app.context_processor
@@ -45,15 +69,20 @@ def create_app():
         from .utils import get_target_weight
         return dict(get_target_weight=get_target_weight)
 
+    @app.context_processor
+    def inject_asset_url():
+        from .assets import asset_url
+        return dict(asset_url=asset_url)
+
     @app.context_processor
     def inject_current_user():
-        user = None
-        if 'username' in session:
-            user = User.query.filter_by(username=session['username']).first()
-        return {'current_user': user}
+        from .current_user import get_current_user
+        return {'current_user': get_current_user()}
 
     @app.template_filter('todate')
     def todate_filter(s, fmt="%Y-%m-%d"):
+        if isinstance(s, date):
+            return s
         return datetime.strptime(s, fmt).date()
 
     # Add user status check middleware
@@ -64,14 +93,23 @@ def create_app():
         if request.endpoint and any(request.endpoint.startswith(r) for r in exempt_routes):
             return
 
-        username = session.get("username")
-        if not username:
+        from .current_user import get_current_user
+        if not session.get("username"):
             return  # Let @require_permission or routes handle redirect
 
-        user = User.query.filter_by(username=username).first()
+        user = get_current_user()
         if not user or user.status != "active":
             session.clear()
             flash("Your account is inactive. Contact admin.", "danger")
             return redirect(url_for("auth.login"))
 
+    # A page that showed flash messages is one-off; keep it out of browser
+    # and service worker caches
+    @app.after_request
+    def no_store_flashed_pages(response):
+        from flask.globals import request_ctx
+        if request_ctx.flashes:
+            response.cache_control.no_store = True
+        return response
+
     return app
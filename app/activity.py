@@ -0,0 +1,94 @@
+"""
+Activity feed.
+
+Every new weight, sickness, vaccination, breeding, removal or feedback row,
+and every vaccination marked as given, appends an ``Activity`` row in the same
+flush with the goat tag copied in, so the feed reads without joins and no
+route has to remember to log anything. Rows written with bulk Core INSERTs
+are invisible to the flush hook; their writers call ``record_activities``.
+"""
+from flask import session, has_request_context
+from sqlalchemy import event, insert, inspect
+from .extensions import db
+from .models import (Activity, Goat, WeightLog, Sickness, VaccinationEvent, VaccineType,
+                     BreedingEvent, Removal, GoatFeedback)
+from .utils import IN_CLAUSE_LIMIT
+
+ACTIVITY_KINDS = ("weight", "sickness", "vaccination", "breeding", "removal", "feedback")
+
+# Model -> (kind, relationship naming the goat the activity is about)
+_TRACKED = {
+    WeightLog: ("weight", "goat"),
+    Sickness: ("sickness", "goat"),
+    VaccinationEvent: ("vaccination", "goat"),
+    BreedingEvent: ("breeding", "doe"),
+    Removal: ("removal", "goat"),
+    GoatFeedback: ("feedback", "goat"),
+}
+
+def _related(sess, obj, rel, model):
+    """Loaded relationship target, or a by-id lookup when only the FK was set."""
+    target = getattr(obj, rel)
+    if target is None and getattr(obj, f"{rel}_id"):
+        target = sess.get(model, getattr(obj, f"{rel}_id"))
+    return target
+
+def _text(sess, obj, tag):
+    if isinstance(obj, WeightLog):
+        return f"Weight Update: {tag}", f"New weight: {obj.weight}kg"
+    if isinstance(obj, Sickness):
+        return f"Health Issue: {tag}", f"Condition: {obj.sickness}"
+    if isinstance(obj, VaccinationEvent):
+        vt = _related(sess, obj, "vaccine_type", VaccineType)
+        verb = "given" if obj.status == "done" else "scheduled"
+        return f"Vaccination: {tag}", f"{vt.name if vt else 'Vaccine'} {verb}"
+    if isinstance(obj, BreedingEvent):
+        buck = _related(sess, obj, "buck", Goat)
+        return f"Breeding: {tag}", f"Buck: {buck.tag if buck else '-'}"
+    if isinstance(obj, Removal):
+        return f"Removed: {tag}", f"Reason: {obj.reason or '-'}"
+    return f"Feedback: {tag}", (obj.content or "")[:300]
+
+def _vaccination_given(obj):
+    return isinstance(obj, VaccinationEvent) and "done" in (inspect(obj).attrs.status.history.added or ())
+
+def _record_activity(sess, flush_context, instances):
+    rows = [o for o in sess.new if type(o) in _TRACKED]
+    rows += [o for o in sess.dirty if _vaccination_given(o)]
+    if not rows:
+        return
+    username = session.get("username") if has_request_context() else None
+    with sess.no_autoflush:
+        for obj in rows:
+            kind, rel = _TRACKED[type(obj)]
+            goat = _related(sess, obj, rel, Goat)
+            title, description = _text(sess, obj, goat.tag if goat else "-")
+            sess.add(Activity(
+                kind=kind,
+                goat=goat,
+                goat_tag=goat.tag if goat else None,
+                title=title,
+                description=description,
+                created_by=getattr(obj, "created_by", None) or getattr(obj, "submitted_by", None) or username,
+            ))
+
+def record_activities(kind, title, entries, created_by=None):
+    """
+    Bulk-log ``kind`` activity for rows the flush hook can't see. ``entries``
+    is ``[(goat_id, description)]``; ``title`` is formatted with ``tag``.
+    """
+    entries = list(entries)
+    ids = list({goat_id for goat_id, _ in entries})
+    tags = {}
+    for i in range(0, len(ids), IN_CLAUSE_LIMIT):
+        tags.update(db.session.query(Goat.id, Goat.tag).filter(Goat.id.in_(ids[i:i + IN_CLAUSE_LIMIT])))
+    rows = [
+        dict(kind=kind, goat_id=goat_id, goat_tag=tags.get(goat_id), title=title.format(tag=tags.get(goat_id, "-")),
+             description=description, created_by=created_by)
+        for goat_id, description in entries
+    ]
+    if rows:
+        db.session.execute(insert(Activity), rows)
+
+def init_activity_log(db):
+    event.listen(db.session, "before_flush", _record_activity)
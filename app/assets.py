@@ -0,0 +1,116 @@
+"""
+Fingerprinted, pre-compressed static assets.
+
+``flask build-assets`` copies the stylesheets, scripts and icons to
+``static/dist/`` under content-hashed names
+(``css/style.css`` -> ``css/style.3f9c2a1b7d40.css``), writes ``.gz`` and,
+when the optional ``brotli`` package is installed, ``.br`` siblings of the
+text files, and records the mapping in ``static/dist/assets.json``.
+
+Templates link assets with ``asset_url('css/style.css')``. It returns the
+fingerprinted URL when the asset has been built and the plain ``static`` URL
+otherwise (and always in debug mode). Fingerprinted files never change, so
+they are served as ``immutable`` for a year, picking the ``.br``/``.gz``
+variant the browser's ``Accept-Encoding`` allows.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+DIST_FOLDER = "dist"
+ASSETS_MANIFEST = "assets.json"
+# Paths under static/ that are fingerprinted
+ASSET_PATTERNS = ("css/", "js/", "icons/")
+# ... except these, which must keep a stable URL
+UNHASHED = ("js/service-worker.js",)
+COMPRESSIBLE = (".css", ".js", ".svg")
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+ONE_YEAR = 365 * 24 * 3600
+
+def _compressors():
+    compressors = {".gz": lambda data: gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        return compressors
+    compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+def _hashed_name(rel, data):
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def build_assets(static_folder):
+    """
+    Write the fingerprinted and compressed copies; returns the
+    ``{source path: hashed path}`` manifest. Earlier builds are kept so pages
+    still cached by browsers can load the assets they reference.
+    """
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    compressors = _compressors()
+    manifest = {}
+    for root, dirs, names in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in sorted(names):
+            rel = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, "/")
+            if not rel.startswith(ASSET_PATTERNS) or rel in UNHASHED:
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                data = f.read()
+            hashed = _hashed_name(rel, data)
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(root, name), target)
+            if rel.endswith(COMPRESSIBLE):
+                for ext, compress in compressors.items():
+                    packed = compress(data)
+                    if len(packed) < len(data):
+                        with open(target + ext, "wb") as f:
+                            f.write(packed)
+            manifest[rel] = hashed
+    with open(os.path.join(dist, ASSETS_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+def load_assets_manifest(static_folder):
+    """The ``{source path: hashed path}`` map of the last build, or ``{}``."""
+    path = os.path.join(static_folder, DIST_FOLDER, ASSETS_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def asset_url(filename):
+    """``url_for('static', filename=...)`` for an asset, fingerprinted when built."""
+    hashed = current_app.extensions["assets"].get(filename)
+    if hashed is None:
+        return url_for("static", filename=filename)
+    return url_for("static_assets", filename=hashed)
+
+def serve_asset(filename):
+    dist = os.path.join(current_app.static_folder, DIST_FOLDER)
+    path = safe_join(dist, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    for encoding, ext in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(path + ext):
+            response = send_from_directory(dist, filename + ext, max_age=ONE_YEAR,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, max_age=ONE_YEAR)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
+
+def init_assets(app):
+    app.extensions["assets"] = {} if app.debug else load_assets_manifest(app.static_folder)
+    app.add_url_rule(f"{app.static_url_path}/{DIST_FOLDER}/<path:filename>", "static_assets", serve_asset)
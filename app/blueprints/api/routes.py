@@ -0,0 +1,108 @@
+from flask import Blueprint, request, session, jsonify, Response
+from ...models import Goat
+from ...flags import TAG_FLAG_COLUMNS
+from ...goat_filters import filter_goats, goat_age_months
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, load_only
+from datetime import datetime
+import base64
+import binascii
+import json
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# --- Goat fields ---
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+# Field name -> (Goat columns it needs, value getter(goat, today))
+GOAT_FIELDS = {
+    "id": ((Goat.id,), lambda g, today: g.id),
+    "tag": ((Goat.tag,), lambda g, today: g.tag),
+    "type": ((Goat.goat_type_id,), lambda g, today: g.goat_type.name if g.goat_type else None),
+    "goat_type_id": ((Goat.goat_type_id,), lambda g, today: g.goat_type_id),
+    "sex": ((Goat.sex,), lambda g, today: g.sex),
+    "dob": ((Goat.dob,), lambda g, today: _iso(g.dob)),
+    "age_months": ((Goat.dob, Goat.age_estimate_months), goat_age_months),
+    "date_acquired": ((Goat.date_acquired,), lambda g, today: _iso(g.date_acquired)),
+    "weight": ((Goat.weight,), lambda g, today: g.weight),
+    "location": ((Goat.location,), lambda g, today: g.location),
+    "status": ((Goat.status,), lambda g, today: g.status),
+    "tags": (
+        tuple(getattr(Goat, col) for col in TAG_FLAG_COLUMNS.values()),
+        lambda g, today: [tag for tag, col in TAG_FLAG_COLUMNS.items() if getattr(g, col)],
+    ),
+    "notes": ((Goat.notes,), lambda g, today: g.notes),
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+def _encode_cursor(goat):
+    raw = json.dumps([goat.tag, goat.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    """``(tag, id)`` of the last goat on the previous page, or None if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tag, goat_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(tag, str) or not isinstance(goat_id, int):
+        return None
+    return tag, goat_id
+
+@api_bp.route("/goats")
+def list_goats():
+    """
+    Goats in (tag, id) order, ``limit`` at a time. Accepts the goat list
+    filters plus ``fields`` (comma-separated subset of GOAT_FIELDS),
+    ``cursor`` (the previous page's ``next_cursor``) and ``compact=1`` for
+    column-ordered rows instead of objects.
+    """
+    if not session.get("username"):
+        return _error("Login required.", 401)
+
+    fields = [f for f in request.args.get("fields", "").split(",") if f] or list(GOAT_FIELDS)
+    unknown = [f for f in fields if f not in GOAT_FIELDS]
+    if unknown:
+        return _error(f"Unknown field(s): {', '.join(unknown)}", 400)
+    limit = min(max(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+    try:
+        query, _ = filter_goats(request.args)
+    except (ValueError, OverflowError) as e:
+        return _error(str(e), 400)
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = _decode_cursor(cursor)
+        if after is None:
+            return _error("Invalid cursor.", 400)
+        tag, goat_id = after
+        query = query.filter(or_(Goat.tag > tag, and_(Goat.tag == tag, Goat.id > goat_id)))
+
+    # Load only the columns the requested fields need
+    columns = {Goat.id, Goat.tag}
+    for f in fields:
+        columns.update(GOAT_FIELDS[f][0])
+    options = [load_only(*columns)]
+    if "type" in fields:
+        options.append(joinedload(Goat.goat_type))
+    goats = query.options(*options).order_by(Goat.tag, Goat.id).limit(limit + 1).all()
+
+    has_more = len(goats) > limit
+    goats = goats[:limit]
+    today = datetime.now().date()
+    getters = [GOAT_FIELDS[f][1] for f in fields]
+    if request.args.get("compact") == "1":
+        payload = {"fields": fields, "items": [[get(g, today) for get in getters] for g in goats]}
+    else:
+        payload = {"items": [{f: get(g, today) for f, get in zip(fields, getters)} for g in goats]}
+    payload["next_cursor"] = _encode_cursor(goats[-1]) if has_more else None
+
+    return Response(json.dumps(payload, separators=(",", ":")), mimetype="application/json")
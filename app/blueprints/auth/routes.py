@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from ...models import User, PasswordResetRequest
 from ...extensions import db
+from ...current_user import invalidate_user
 from datetime import datetime
 
 auth_bp = Blueprint("auth", __name__)
@@ -59,6 +60,7 @@ def force_change_password():
 
         user.set_password(new_pw)
         db.session.commit()
+        invalidate_user(user.username)
         flash("Password updated. You can now use the app.", "success")
         return redirect(url_for("dashboard.dashboard_home"))
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from ...models import Goat, BreedingEvent
+from ...models import Goat, GoatType, BreedingEvent
 from ...extensions import db
+from ...utils import parse_date
 from datetime import datetime, timedelta
 
 breeding_bp = Blueprint("breeding", __name__)
@@ -26,8 +27,8 @@ def add_breeding():
     if request.method == "POST":
         buck_id = request.form["buck_id"]
         doe_id = request.form["doe_id"]
-        mating_start_date = request.form["mating_start_date"]
-        mating_end_date = request.form["mating_end_date"]
+        mating_start_date = parse_date(request.form["mating_start_date"])
+        mating_end_date = parse_date(request.form["mating_end_date"])
         notes = request.form["notes"]
 
         event = BreedingEvent(
@@ -64,8 +65,8 @@ def edit_breeding(event_id):
     if request.method == "POST":
         event.buck_id = int(request.form["buck_id"])
         event.doe_id = int(request.form["doe_id"])
-        event.mating_start_date = request.form["mating_start_date"]
-        event.mating_end_date = request.form["mating_end_date"]
+        event.mating_start_date = parse_date(request.form["mating_start_date"])
+        event.mating_end_date = parse_date(request.form["mating_end_date"])
         event.notes = request.form["notes"]
         db.session.commit()
         flash("Breeding event updated!", "success")
@@ -96,5 +97,19 @@ def does_ready():
         flash("Please login first.", "warning")
         return redirect(url_for("auth.login"))
     from ...utils import get_ready_does
-    ready_does = get_ready_does()
-    return render_template("does_ready.html", ready_does=ready_does)
+    selected_location = request.args.get("location") or None
+    selected_type = request.args.get("goat_type_id", type=int)
+    page = request.args.get("page", 1, type=int)
+    ready_does = get_ready_does(location=selected_location, goat_type_id=selected_type, page=page)
+
+    locations = db.session.query(Goat.location).distinct().all()
+    locations = [loc[0] for loc in locations if loc[0]]
+    goat_types = GoatType.query.order_by(GoatType.name).all()
+    return render_template(
+        "does_ready.html",
+        ready_does=ready_does,
+        locations=locations,
+        goat_types=goat_types,
+        selected_location=selected_location,
+        selected_type=selected_type,
+    )
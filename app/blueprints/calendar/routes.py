@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app.models import db, FarmEvent, BreedingEvent, VaccinationEvent, VaccineType, Goat
-from app.utils import require_any_role, expand_recurring_event, get_vaccine_due_info
+from app.models import db, FarmEvent, BreedingEvent, VaccinationEvent, VaccineType, VaccineDue, Goat
+from app.utils import require_any_role, expand_recurring_event, parse_date
+from app.vaccine_due import active_vaccine_due
+from app.current_user import get_current_user
 from datetime import datetime, timedelta
 import json
 
@@ -12,8 +14,8 @@ def api_events():
     from_date = request.args.get('start')
     to_date = request.args.get('end')
     if from_date and to_date:
-        from_date = datetime.strptime(from_date[:10], "%Y-%m-%d").date()
-        to_date = datetime.strptime(to_date[:10], "%Y-%m-%d").date()
+        from_date = parse_date(from_date)
+        to_date = parse_date(to_date)
     else:
         from_date = datetime.now().date()
         to_date = from_date + timedelta(days=30)
@@ -22,14 +24,14 @@ def api_events():
 
     # 1. User-created custom events
     farm_events = FarmEvent.query.filter(
-        FarmEvent.event_date >= from_date.strftime('%Y-%m-%d'),
-        FarmEvent.event_date <= to_date.strftime('%Y-%m-%d')
+        FarmEvent.event_date >= from_date,
+        FarmEvent.event_date <= to_date
     ).all()
     for e in farm_events:
         events.append({
             "id": f"custom-{e.id}",
             "title": e.title,
-            "start": e.event_date,
+            "start": e.event_date.isoformat(),
             "category": e.category,
             "notes": e.notes,
             "createdBy": e.created_by,
@@ -38,51 +40,52 @@ def api_events():
 
     # 2. Breeding events
     breeding_events = BreedingEvent.query.filter(
-        BreedingEvent.mating_start_date >= from_date.strftime('%Y-%m-%d'),
-        BreedingEvent.mating_start_date <= to_date.strftime('%Y-%m-%d')
+        BreedingEvent.mating_start_date >= from_date,
+        BreedingEvent.mating_start_date <= to_date
     ).all()
     for b in breeding_events:
         events.append({
             "id": f"mating-{b.id}",
             "title": f"Mating: {b.buck.tag if b.buck else '-'} x {b.doe.tag if b.doe else '-'}",
-            "start": b.mating_start_date,
-            "end": b.mating_end_date,
+            "start": b.mating_start_date.isoformat(),
+            "end": b.mating_end_date.isoformat() if b.mating_end_date else None,
             "category": "Mating",
             "notes": b.notes,
             "allDay": True
         })
 
     # 3. Auto-generated vaccination schedule events for all goats
-    goats = Goat.query.filter_by(status="active").all()
-    for goat in goats:
-        due_info = get_vaccine_due_info(goat)
-        for v in due_info:
-            # Only add if next_due is within range and not already marked as done
-            if v["next_due"] and from_date <= v["next_due"] <= to_date:
-                # Check if already marked as done for that due date (avoid duplicate)
-                existing = VaccinationEvent.query.filter_by(
-                    goat_id=goat.id,
-                    vaccine_type_id=v["vaccine"].id,
-                    scheduled_date=v["next_due"].strftime("%Y-%m-%d"),
-                    status="done"
-                ).first()
-                if not existing:
-                    events.append({
-                        "id": f"auto-vax-{goat.id}-{v['vaccine'].id}-{v['next_due']}",
-                        "title": f"{v['vaccine'].name} - {goat.tag}",
-                        "start": v["next_due"].strftime("%Y-%m-%d"),
-                        "category": "Vaccination",
-                        "notes": f"Due for {goat.tag}: {v['vaccine'].name}",
-                        "allDay": True,
-                        "goat_tag": goat.tag,
-                        "vaccine_type_id": v["vaccine"].id,
-                        "status": v["status"]
-                    })
+    due_in_range = active_vaccine_due().filter(
+        VaccineDue.next_due >= from_date,
+        VaccineDue.next_due <= to_date
+    )
+    # (goat, vaccine, date) already marked as done within the range, to avoid duplicates
+    done_in_range = set(db.session.query(
+        VaccinationEvent.goat_id, VaccinationEvent.vaccine_type_id, VaccinationEvent.scheduled_date
+    ).filter(
+        VaccinationEvent.status == "done",
+        VaccinationEvent.scheduled_date >= from_date,
+        VaccinationEvent.scheduled_date <= to_date
+    ))
+    for v in due_in_range:
+        goat, vaccine = v.goat, v.vaccine_type
+        if (goat.id, vaccine.id, v.next_due) not in done_in_range:
+            events.append({
+                "id": f"auto-vax-{goat.id}-{vaccine.id}-{v.next_due}",
+                "title": f"{vaccine.name} - {goat.tag}",
+                "start": v.next_due.strftime("%Y-%m-%d"),
+                "category": "Vaccination",
+                "notes": f"Due for {goat.tag}: {vaccine.name}",
+                "allDay": True,
+                "goat_tag": goat.tag,
+                "vaccine_type_id": vaccine.id,
+                "status": v.status
+            })
 
     # 4. Scheduled vaccination events from VaccinationEvent table
     scheduled_events = VaccinationEvent.query.filter(
-        VaccinationEvent.scheduled_date >= from_date.strftime('%Y-%m-%d'),
-        VaccinationEvent.scheduled_date <= to_date.strftime('%Y-%m-%d'),
+        VaccinationEvent.scheduled_date >= from_date,
+        VaccinationEvent.scheduled_date <= to_date,
         VaccinationEvent.status != "done"
     ).all()
     for ve in scheduled_events:
@@ -92,7 +95,7 @@ def api_events():
             events.append({
                 "id": f"vax-{ve.id}",
                 "title": f"{vaccine.name} - {goat.tag}",
-                "start": ve.scheduled_date,
+                "start": ve.scheduled_date.isoformat(),
                 "category": "Vaccination",
                 "notes": f"Scheduled for {goat.tag}: {vaccine.name}",
                 "allDay": True,
@@ -109,7 +112,7 @@ def api_event_add():
     data = request.get_json()
     event = FarmEvent(
         title=data["title"],
-        event_date=data["event_date"],
+        event_date=parse_date(data["event_date"]),
         category=data["category"],
         notes=data.get("notes", ""),
         created_by=session.get("username")
@@ -119,7 +122,7 @@ def api_event_add():
     return jsonify({"success": True, "event": {
         "id": event.id,
         "title": event.title,
-        "start": event.event_date,
+        "start": event.event_date.isoformat(),
         "category": event.category,
         "notes": event.notes,
         "createdBy": event.created_by,
@@ -132,7 +135,7 @@ def api_event_edit(event_id):
     event = FarmEvent.query.get_or_404(event_id)
     data = request.get_json()
     event.title = data["title"]
-    event.event_date = data["event_date"]
+    event.event_date = parse_date(data["event_date"])
     event.category = data["category"]
     event.notes = data.get("notes", "")
     db.session.commit()
@@ -160,8 +163,8 @@ def calendar():
 
     # 1. Get all custom/admin events in the next 30 days
     farm_events = FarmEvent.query.filter(
-        FarmEvent.event_date >= today.strftime('%Y-%m-%d'),
-        FarmEvent.event_date <= max_day.strftime('%Y-%m-%d')
+        FarmEvent.event_date >= today,
+        FarmEvent.event_date <= max_day
     ).order_by(FarmEvent.event_date.asc()).all()
 
     events = []
@@ -170,20 +173,20 @@ def calendar():
         events.append({
             "id": e.id,  # Needed for edit/delete links
             "title": e.title,
-            "start": e.event_date,
+            "start": e.event_date.isoformat(),
             "type": e.category,
             "notes": e.notes
         })
     # B. Add Breedings/Matings (in next 30 days)
     breeding_events = BreedingEvent.query.filter(
-        BreedingEvent.mating_start_date >= today.strftime('%Y-%m-%d'),
-        BreedingEvent.mating_start_date <= max_day.strftime('%Y-%m-%d')
+        BreedingEvent.mating_start_date >= today,
+        BreedingEvent.mating_start_date <= max_day
     ).all()
     for b in breeding_events:
         events.append({
             "title": f"Mating: {b.buck.tag} x {b.doe.tag}",
-            "start": b.mating_start_date,
-            "end": b.mating_end_date,
+            "start": b.mating_start_date.isoformat(),
+            "end": b.mating_end_date.isoformat() if b.mating_end_date else None,
             "type": "mating",
             "notes": b.notes
         })
@@ -201,7 +204,7 @@ def add_event():
         return redirect(url_for("auth.login"))
     if request.method == "POST":
         title = request.form["title"]
-        event_date = request.form["event_date"]
+        event_date = parse_date(request.form["event_date"])
         category = request.form["category"]
         notes = request.form["notes"]
         recurrence = request.form.get("recurrence") or None
@@ -223,9 +226,8 @@ def add_event():
 @calendar_bp.route("/edit/<int:event_id>", methods=["GET", "POST"])
 @require_any_role("admin", "superadmin")
 def edit_event(event_id):
-    from app.models import User
     event = FarmEvent.query.get_or_404(event_id)
-    current_user = User.query.filter_by(username=session.get("username")).first()
+    current_user = get_current_user()
 
     # Extra safety: Only allow admin/superadmin OR original creator
     if current_user.role not in ["admin", "superadmin"] and event.created_by != current_user.username:
@@ -234,7 +236,7 @@ def edit_event(event_id):
 
     if request.method == "POST":
         event.title = request.form["title"]
-        event.event_date = request.form["event_date"]
+        event.event_date = parse_date(request.form["event_date"])
         event.category = request.form["category"]
         event.notes = request.form["notes"]
         event.recurrence = request.form.get("recurrence") or None
@@ -247,9 +249,8 @@ def edit_event(event_id):
 @calendar_bp.route("/delete/<int:event_id>", methods=["POST"])
 @require_any_role("admin", "superadmin")
 def delete_event(event_id):
-    from app.models import User
     event = FarmEvent.query.get_or_404(event_id)
-    current_user = User.query.filter_by(username=session.get("username")).first()
+    current_user = get_current_user()
 
     # Allow only admin/superadmin OR event creator to delete
     if current_user.role not in ["admin", "superadmin"] and event.created_by != current_user.username:
@@ -1,10 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, session, flash, request
-from ...models import FarmConfig, Goat, GoatType, Sickness, Removal, BreedingEvent, VaccineType, WeightLog, VaccinationEvent, SicknessPhoto
+from flask import Blueprint, render_template, redirect, url_for, session, flash, request, make_response, jsonify, current_app
+from ...models import Activity, FarmConfig, Goat, GoatType, Sickness, Removal, BreedingEvent, VaccineType, WeightLog, VaccinationEvent, SicknessPhoto
 from ...extensions import db
-from ...utils import get_ready_does, get_vaccine_due_info, get_target_weight, require_any_role
+from ...hooks import touch_goats
+from ...current_user import invalidate_user
+from ...dashboard_snapshot import get_dashboard_snapshot
+from ...exports import csv_response
+from ...flags import ensure_flags_current
+from ...activity import ACTIVITY_KINDS
+from ...bulk_writes import record_vaccinations, record_weights, set_pregnancy
+from ...herd_history import herd_totals
+from ...photos import remove_photo_files
+from ...precache import load_precache_manifest
+from ...utils import get_ready_does, invalidate_target_weights, parse_date, require_any_role
 from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
+import json
 import os
 
 dashboard_bp = Blueprint("dashboard", __name__)
@@ -31,64 +43,45 @@ def quickentry():
     goats = goats_query.order_by(Goat.tag).all()
     vaccine_types = VaccineType.query.order_by(VaccineType.name).all()
     today_str = datetime.now().strftime('%Y-%m-%d')
+    today = datetime.now().date()
 
     # --- Handle form submissions ---
     if request.method == "POST":
         action = request.form.get("action")
         if action == "add_weight":
+            entries = []
             for goat in goats:
                 w = request.form.get(f"weight_{goat.id}")
-                d = request.form.get(f"date_{goat.id}")
+                d = parse_date(request.form.get(f"date_{goat.id}"))
                 if w and d:
-                    log = WeightLog(
-                        goat_id=goat.id,
-                        date=d,
-                        weight=float(w),
-                        created_by=session.get("username"),
-                        created_at=datetime.utcnow()
-                    )
-                    goat.weight = float(w)
-                    db.session.add(log)
+                    entries.append((goat.id, d, w))
+            added = record_weights(entries, session.get("username"))
             db.session.commit()
-            flash("Weights added!", "success")
+            flash(f"Weights added for {added} goats.", "success")
             return redirect(url_for("dashboard.quickentry"))
 
         elif action == "batch_vaccine":
             vaccine_type_id = int(request.form["vaccine_type_id"])
-            actual_date_given = request.form.get("actual_date_given", today_str)
-            selected_goat_ids = request.form.getlist("goat_ids")
+            actual_date_given = parse_date(request.form.get("actual_date_given")) or today
+            selected_goat_ids = request.form.getlist("goat_ids", type=int)
             notes = request.form.get("notes", "")
-            given_by = session.get("username")
-            for goat_id in selected_goat_ids:
-                exists = VaccinationEvent.query.filter_by(
-                    goat_id=goat_id,
-                    vaccine_type_id=vaccine_type_id,
-                    actual_date_given=actual_date_given
-                ).first()
-                if exists:
-                    continue
-                ve = VaccinationEvent(
-                    goat_id=goat_id,
-                    vaccine_type_id=vaccine_type_id,
-                    scheduled_date=actual_date_given,
-                    actual_date_given=actual_date_given,
-                    status="done",
-                    notes=notes,
-                    given_by=given_by,
-                    created_by=session.get("username"),
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(ve)
+            inserted, skipped, missing = record_vaccinations(
+                selected_goat_ids, vaccine_type_id, actual_date_given, session.get("username"), notes=notes
+            )
             db.session.commit()
-            flash(f"Vaccination recorded for {len(selected_goat_ids)} goats.", "success")
+            message = f"Vaccination recorded for {inserted} goats."
+            if skipped:
+                message += f" {skipped} skipped (already recorded for that date)."
+            if missing:
+                message += f" {missing} not found."
+            flash(message, "success")
             return redirect(url_for("dashboard.quickentry"))
 
         elif action == "mark_pregnancy":
-            selected_goat_ids = request.form.getlist("pregnant_goat_ids")
-            for goat in goats:
-                goat.is_pregnant = str(goat.id) in selected_goat_ids
+            selected_goat_ids = request.form.getlist("pregnant_goat_ids", type=int)
+            changed = set_pregnancy([goat.id for goat in goats], selected_goat_ids)
             db.session.commit()
-            flash("Pregnancy status updated.", "success")
+            flash(f"Pregnancy status updated for {changed} goats.", "success")
             return redirect(url_for("dashboard.quickentry"))
 
         elif action == "add_sickness":
@@ -141,6 +134,19 @@ def home():
         return redirect(url_for("dashboard.dashboard_home"))
     return redirect(url_for("auth.login"))
 
+@dashboard_bp.route("/service-worker.js")
+def service_worker():
+    """
+    Serve the service worker from the root so its scope covers every page,
+    with the precache manifest inlined ahead of the script.
+    """
+    with open(os.path.join(current_app.static_folder, "js", "service-worker.js")) as f:
+        script = f.read()
+    manifest = json.dumps(load_precache_manifest(current_app))
+    response = current_app.response_class(f"const PRECACHE = {manifest};\n{script}", mimetype="application/javascript")
+    response.cache_control.no_cache = True
+    return response
+
 @dashboard_bp.route("/dashboard")
 def dashboard_home():
     if not session.get("username"):
@@ -152,159 +158,133 @@ def dashboard_home():
     if export_format:
         return handle_dashboard_export(export_format)
 
-    # Handle date range filtering
+    # The shell renders immediately; each widget is fetched from
+    # dashboard_widget by the page's loader script.
+    return render_template("dashboard_new.html", widgets=WIDGETS)
+
+# --- Dashboard widgets ---
+
+def _stats_widget():
+    snapshot, computed_at = get_dashboard_snapshot()
+    return {"stats": snapshot["stats"], "computed_at": computed_at}
+
+def _vaccines_widget():
+    snapshot, _ = get_dashboard_snapshot()
+    return {"stats": snapshot["stats"]}
+
+def _upcoming_events_widget():
+    snapshot, _ = get_dashboard_snapshot()
+    return {"upcoming_events": snapshot["upcoming_events"]}
+
+def _sick_widget():
+    sick_cases = Sickness.query.join(Goat, Goat.id == Sickness.goat_id).filter(
+        Sickness.status == "active",
+        Goat.status == "active"
+    ).options(contains_eager(Sickness.goat))\
+        .order_by(Sickness.created_at.desc(), Sickness.id.desc()).limit(10).all()
+    return {"sick_cases": sick_cases}
+
+def _date_range():
+    """The dashboard's selected ``(start, end)`` datetimes; last 30 days by default."""
     days = request.args.get('days', '30')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    
+
     if start_date and end_date:
-        date_filter_start = datetime.strptime(start_date, '%Y-%m-%d')
-        date_filter_end = datetime.strptime(end_date, '%Y-%m-%d')
+        return datetime.strptime(start_date, '%Y-%m-%d'), datetime.strptime(end_date, '%Y-%m-%d')
+    date_filter_end = datetime.now()
+    return date_filter_end - timedelta(days=int(days)), date_filter_end
+
+def _recent_activity_widget():
+    date_filter_start, date_filter_end = _date_range()
+    recent_activities = Activity.query.filter(
+        Activity.created_at >= date_filter_start,
+        Activity.created_at <= date_filter_end
+    ).order_by(Activity.created_at.desc(), Activity.id.desc()).limit(5).all()
+    return {"recent_activities": recent_activities}
+
+# Widget name -> (context builder, fragment template, browser max-age seconds).
+# Widgets that change with every write use max-age 0 and are revalidated
+# against their ETag; the others may be reused briefly without a round trip.
+WIDGETS = {
+    "stats": (_stats_widget, "dashboard_widget_stats.html", 0),
+    "vaccines": (_vaccines_widget, "dashboard_widget_vaccines.html", 60),
+    "sick": (_sick_widget, "dashboard_widget_sick.html", 0),
+    "upcoming_events": (_upcoming_events_widget, "dashboard_widget_upcoming_events.html", 60),
+    "recent_activity": (_recent_activity_widget, "dashboard_widget_recent_activity.html", 0),
+}
+
+@dashboard_bp.route("/dashboard/widgets/<name>")
+def dashboard_widget(name):
+    """HTML fragment for one dashboard widget."""
+    if not session.get("username"):
+        return "Login required.", 401
+    if name not in WIDGETS:
+        return "Unknown widget.", 404
+
+    build, template, max_age = WIDGETS[name]
+    response = make_response(render_template(template, **build()))
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
     else:
-        date_filter_end = datetime.now()
-        date_filter_start = date_filter_end - timedelta(days=int(days))
-
-    # Get all active goats
-    goats = Goat.query.filter_by(status="active").all()
-    
-    # Calculate statistics
-    total_goats = len(goats)
-    last_month = datetime.now() - timedelta(days=30)
-    total_last_month = Goat.query.filter(
-        Goat.status == "active",
-        Goat.date_acquired <= last_month.strftime('%Y-%m-%d')
-    ).count()
-    total_change = round(((total_goats - total_last_month) / total_last_month * 100), 1) if total_last_month > 0 else 0
-
-    # Health statistics
-    sick_goats = [g for g in goats if hasattr(g, "tags") and "sick" in g.tags]
-    underweight_goats = [g for g in goats if get_target_weight(g) and g.weight and g.weight < get_target_weight(g)]
-    ready_to_mate = [g for g in goats if hasattr(g, "tags") and "ready to mate" in g.tags]
-    pregnant = [g for g in goats if hasattr(g, "tags") and "pregnant" in g.tags]
-
-    # Get upcoming vaccinations
-    upcoming_vaccines = []
-    for goat in goats:
-        due_info = get_vaccine_due_info(goat)
-        for info in due_info:
-            if info["next_due"]:
-                upcoming_vaccines.append({
-                    "goat": goat,
-                    "vaccine": info["vaccine"],
-                    "due_date": info["next_due"]
-                })
-    
-    # Sort by due date and get next 30 days
-    upcoming_vaccines.sort(key=lambda x: x["due_date"])
-    due_vaccines = len([v for v in upcoming_vaccines if (v["due_date"] - datetime.now().date()).days <= 30])
+        response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
 
-    # Get recent activities (filtered by date range)
-    recent_activities = []
-    
-    # Add recent weight logs
-    weight_logs = WeightLog.query.filter(
-        WeightLog.created_at >= date_filter_start,
-        WeightLog.created_at <= date_filter_end
-    ).order_by(WeightLog.created_at.desc()).limit(5).all()
-    
-    for log in weight_logs:
-        recent_activities.append({
-            "title": f"Weight Update: {log.goat.tag}",
-            "description": f"New weight: {log.weight}kg",
-            "time": log.created_at.strftime("%b %d")
-        })
-
-    # Add recent sickness records
-    sickness_logs = Sickness.query.filter(
-        Sickness.created_at >= date_filter_start,
-        Sickness.created_at <= date_filter_end
-    ).order_by(Sickness.created_at.desc()).limit(5).all()
-    
-    for log in sickness_logs:
-        recent_activities.append({
-            "title": f"Health Issue: {log.goat.tag}",
-            "description": f"Condition: {log.sickness}",
-            "time": log.created_at.strftime("%b %d")
-        })
-
-    # Sort activities by time and keep only most recent 5
-    recent_activities = recent_activities[:5]
-
-    # Get upcoming events
-    upcoming_events = []
-    
-    # Add upcoming vaccinations
-    for vaccine in upcoming_vaccines[:3]:
-        upcoming_events.append({
-            "month": vaccine["due_date"].strftime("%b"),
-            "day": vaccine["due_date"].strftime("%d"),
-            "title": f"Vaccination Due: {vaccine['goat'].tag}",
-            "description": f"{vaccine['vaccine'].name}"
-        })
-
-    # Add upcoming breeding events
-    breeding_events = BreedingEvent.query.filter(
-        BreedingEvent.status == "scheduled"
-    ).order_by(BreedingEvent.mating_start_date).limit(3).all()
-    
-    for event in breeding_events:
-        upcoming_events.append({
-            "month": datetime.strptime(event.mating_start_date, "%Y-%m-%d").strftime("%b"),
-            "day": datetime.strptime(event.mating_start_date, "%Y-%m-%d").strftime("%d"),
-            "title": "Breeding Event",
-            "description": f"Buck: {event.buck.tag}, Doe: {event.doe.tag}"
-        })
-
-    # Prepare statistics
-    stats = {
-        "total_goats": total_goats,
-        "total_change": total_change,
-        "sick_count": len(sick_goats),
-        "underweight_count": len(underweight_goats),
-        "ready_to_mate_count": len(ready_to_mate),
-        "pregnant_count": len(pregnant),
-        "due_vaccines": due_vaccines,
-        "sick_goats": sick_goats
-    }
+@dashboard_bp.route("/dashboard/herd_trend")
+def herd_trend():
+    """Daily active goat count over the selected date range, for the trend chart."""
+    if not session.get("username"):
+        return jsonify({"error": "Login required."}), 401
+
+    start, end = _date_range()
+    totals = herd_totals(start.date(), end.date())
+    response = jsonify({
+        "labels": [day.strftime("%d %b") for day in totals],
+        "totals": list(totals.values()),
+    })
+    response.cache_control.private = True
+    response.cache_control.max_age = 300
+    return response
+
+@dashboard_bp.route("/activity")
+def activity_feed():
+    if not session.get("username"):
+        flash("Please login first.", "warning")
+        return redirect(url_for("auth.login"))
 
-    return render_template(
-        "dashboard_new.html",
-        stats=stats,
-        goats=goats,
-        recent_activities=recent_activities,
-        upcoming_events=upcoming_events
-    )
+    kind = request.args.get("kind")
+    page = request.args.get("page", 1, type=int)
+    query = Activity.query
+    if kind in ACTIVITY_KINDS:
+        query = query.filter(Activity.kind == kind)
+    else:
+        kind = None
+    activities = query.order_by(Activity.created_at.desc(), Activity.id.desc())\
+        .paginate(page=page, per_page=25, error_out=False)
+    return render_template("activity.html", activities=activities, kinds=ACTIVITY_KINDS, selected_kind=kind)
 
 def handle_dashboard_export(format_type):
     """Handle dashboard data export"""
-    from flask import make_response
-    import csv
-    import io
-    
     if format_type == 'excel':
-        # Create CSV data for Excel
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['Metric', 'Value', 'Description'])
-        
-        # Get current stats
-        goats = Goat.query.filter_by(status="active").all()
-        total_goats = len(goats)
-        sick_goats = [g for g in goats if hasattr(g, "tags") and "sick" in g.tags]
-        underweight_goats = [g for g in goats if get_target_weight(g) and g.weight and g.weight < get_target_weight(g)]
-        
-        # Write data
-        writer.writerow(['Total Active Goats', total_goats, 'Current active goat count'])
-        writer.writerow(['Sick Goats', len(sick_goats), 'Goats currently marked as sick'])
-        writer.writerow(['Underweight Goats', len(underweight_goats), 'Goats below target weight'])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=dashboard_export_{datetime.now().strftime("%Y%m%d")}.csv'
-        return response
+        # Current stats from the materialized status flags
+        ensure_flags_current()
+        total_goats, sick_goats, underweight_goats = Goat.query.filter_by(status="active").with_entities(
+            func.count(Goat.id),
+            func.count(Goat.id).filter(Goat.is_sick == True),
+            func.count(Goat.id).filter(Goat.is_underweight == True),
+        ).one()
+
+        return csv_response(
+            f'dashboard_export_{datetime.now().strftime("%Y%m%d")}.csv',
+            ['Metric', 'Value', 'Description'],
+            [
+                ['Total Active Goats', total_goats, 'Current active goat count'],
+                ['Sick Goats', sick_goats, 'Goats currently marked as sick'],
+                ['Underweight Goats', underweight_goats, 'Goats below target weight'],
+            ],
+        )
         
     elif format_type == 'pdf':
         # For PDF, redirect to a report page or show message
@@ -332,34 +312,49 @@ def target_weight_admin():
     
     from ...models import TargetWeight
 
+    def touch_goats_of_type(goat_type_id):
+        # Target changes can flip the underweight flag of every goat of the type.
+        # The flags are refreshed inside the commit, so the curve cache must be
+        # dropped before it too; the post-commit invalidation covers readers
+        # that rebuilt it from the old rows in the meantime.
+        invalidate_target_weights()
+        touch_goats(goat_id for (goat_id,) in db.session.query(Goat.id).filter_by(goat_type_id=goat_type_id))
+
     if request.method == "POST":
         if "add" in request.form:
             # Add new target weight
             target = TargetWeight(
-                goat_type_id=request.form["goat_type_id"],
+                goat_type_id=int(request.form["goat_type_id"]),
                 sex=request.form["sex"] or None,
                 age_months=int(request.form["age_months"]),
                 min_weight=float(request.form["min_weight"])
             )
             db.session.add(target)
+            touch_goats_of_type(target.goat_type_id)
             db.session.commit()
+            invalidate_target_weights()
             flash("Target weight added successfully.", "success")
         
         elif "edit_id" in request.form:
             # Edit existing target weight
             target = TargetWeight.query.get_or_404(request.form["edit_id"])
-            target.goat_type_id = request.form["goat_type_id"]
+            touch_goats_of_type(target.goat_type_id)
+            target.goat_type_id = int(request.form["goat_type_id"])
             target.sex = request.form["sex"] or None
             target.age_months = int(request.form["age_months"])
             target.min_weight = float(request.form["min_weight"])
+            touch_goats_of_type(target.goat_type_id)
             db.session.commit()
+            invalidate_target_weights()
             flash("Target weight updated successfully.", "success")
         
         elif "delete_id" in request.form:
             # Delete target weight
             target = TargetWeight.query.get_or_404(request.form["delete_id"])
+            touch_goats_of_type(target.goat_type_id)
             db.session.delete(target)
             db.session.commit()
+            invalidate_target_weights()
             flash("Target weight deleted successfully.", "success")
         
         return redirect(url_for("dashboard.target_weight_admin"))
@@ -392,6 +387,8 @@ def reset_db():
         db.drop_all()
         # Recreate tables
         db.create_all()
+        invalidate_target_weights()
+        invalidate_user()
         flash("Database reset successful.", "success")
     except Exception as e:
         flash(f"Error resetting database: {str(e)}", "danger")
@@ -418,8 +415,7 @@ def delete_feedback_photo(photo_id):
     
     # Delete file from filesystem
     try:
-        if os.path.exists(photo.image_path):
-            os.remove(photo.image_path)
+        remove_photo_files(photo)
     except Exception:
         pass
     
@@ -1,134 +1,104 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, Response
-import csv
-from io import StringIO
-from ...models import Goat, GoatType, Sickness, SicknessPhoto, Removal, WeightLog, GoatFeedback, GoatFeedbackPhoto, VaccineType, VaccinationEvent, BreedingEvent, User
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, make_response
+from ...models import Goat, GoatType, Sickness, SicknessPhoto, Removal, WeightLog, GoatFeedback, GoatFeedbackPhoto, VaccineType, VaccinationEvent, BreedingEvent
 from ...extensions import db
-from ...utils import require_permission, require_any_role, get_vaccine_due_info, get_target_weight
+from ...hooks import touch_goats
+from ...current_user import get_current_user
+from ...data_versions import get_versions, not_modified, page_etag, set_validators
+from ...exports import GOAT_EXPORT_COLUMNS, csv_response, goat_export_rows
+from ...goat_filters import filter_goats, goat_age_months
+from ...goat_import import IMPORT_COLUMNS, ImportFileError, import_goats, read_sheet
+from ...goat_profile import load_goat_profile, goat_profile_context
+from ...photos import remove_photo_files
+from ...search import search_hits
+from ...utils import require_permission, require_any_role, get_vaccine_due_info, get_target_weights, get_herd_tags, parse_date
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
 
 goats_bp = Blueprint("goats", __name__)
 
+# Goat list sort key -> (label, ORDER BY columns); Goat.id breaks ties
+GOAT_SORT_OPTIONS = {
+    "": ("Default", ()),
+    "tag": ("Tag (A-Z)", (Goat.tag,)),
+    "-tag": ("Tag (Z-A)", (Goat.tag.desc(),)),
+    "-weight": ("Heaviest first", (Goat.weight.desc().nulls_last(),)),
+    "weight": ("Lightest first", (Goat.weight.asc().nulls_last(),)),
+    "-acquired": ("Newest arrivals", (Goat.date_acquired.desc(),)),
+    "acquired": ("Oldest arrivals", (Goat.date_acquired,)),
+    "dob": ("Oldest first", (Goat.dob.asc().nulls_last(),)),
+    "-dob": ("Youngest first", (Goat.dob.desc().nulls_last(),)),
+}
+
 @goats_bp.route("/goats")
 def list_goats():
     if not session.get("username"):
         flash("Please login first.", "warning")
         return redirect(url_for("auth.login"))
 
-    # Get filter parameters
-    selected_tags = request.args.getlist('tags')
+    # Answer a revalidation before running any query
+    herd_version, herd_updated = get_versions("herd")["herd"]
+    etag = page_etag("goats", herd_version)
+    cached = not_modified(etag, herd_updated)
+    if cached:
+        return cached
+
+    # Filter parameters (the query itself is built by filter_goats)
+    invalid_dates = []
+    query, selected_tags = filter_goats(request.args, invalid=invalid_dates)
+    if invalid_dates:
+        flash(f"Ignored invalid date filter(s): {', '.join(invalid_dates)}.", "warning")
     selected_location = request.args.get("location")
     search_query = request.args.get("search", "").strip()
-    smart_filter = request.args.get("smart_filter")
-    
-    # Advanced filter parameters
     age_min = request.args.get("age_min", type=int)
     age_max = request.args.get("age_max", type=int)
     weight_min = request.args.get("weight_min", type=float)
     weight_max = request.args.get("weight_max", type=float)
-    goat_type_id = request.args.get("type", type=int)
-    sex_filter = request.args.get("sex")
-    status_filter = request.args.get("status", "active")
-    acquired_start = request.args.get("acquired_start")
-    acquired_end = request.args.get("acquired_end")
-    dob_start = request.args.get("dob_start")
-    dob_end = request.args.get("dob_end")
+
+    # Sorting and paging
+    sort = request.args.get("sort", "")
+    page = request.args.get("page", 1, type=int)
+    per_page = min(max(request.args.get("per_page", 50, type=int), 1), 200)
+    page_args = request.args.to_dict(flat=False)
+    page_args.pop("page", None)
 
     # Get all locations and goat types for filters
     locations = db.session.query(Goat.location).distinct().all()
     locations = [loc[0] for loc in locations if loc[0]]
     goat_types = GoatType.query.order_by(GoatType.name).all()
 
-    # Base query
-    if status_filter == "all":
-        goats = Goat.query.all()
-    else:
-        goats = Goat.query.filter_by(status=status_filter).all()
-
-    # Apply smart filters
-    if smart_filter:
-        if smart_filter == "need_attention":
-            selected_tags = ["sick", "underweight"]
-        elif smart_filter == "ready_mate":
-            selected_tags = ["ready to mate"]
-        elif smart_filter == "pregnant":
-            selected_tags = ["pregnant"]
-        elif smart_filter == "new_arrivals":
-            selected_tags = ["new arrival"]
-        elif smart_filter == "underweight":
-            selected_tags = ["underweight"]
-
-    # Calculate age and apply filters
-    filtered_goats = []
-    for goat in goats:
-        # Calculate age
-        if goat.dob:
-            age_days = (datetime.now().date() - datetime.strptime(goat.dob, '%Y-%m-%d').date()).days
-            goat.calculated_age_months = round(age_days / 30.44, 1)
-        elif goat.age_estimate_months:
-            goat.calculated_age_months = goat.age_estimate_months
-        else:
-            goat.calculated_age_months = None
-
-        # Apply filters
-        if selected_tags and not (hasattr(goat, "tags") and any(tag in goat.tags for tag in selected_tags)):
-            continue
-        
-        if selected_location and goat.location != selected_location:
-            continue
-            
-        if search_query:
-            search_fields = [
-                goat.tag or "",
-                goat.goat_type.name if goat.goat_type else "",
-                goat.location or "",
-                goat.notes or ""
-            ]
-            if not any(search_query.lower() in field.lower() for field in search_fields):
-                continue
-        
-        if age_min is not None and (goat.calculated_age_months is None or goat.calculated_age_months < age_min):
-            continue
-            
-        if age_max is not None and (goat.calculated_age_months is None or goat.calculated_age_months > age_max):
-            continue
-            
-        if weight_min is not None and (goat.weight is None or goat.weight < weight_min):
-            continue
-            
-        if weight_max is not None and (goat.weight is None or goat.weight > weight_max):
-            continue
-            
-        if goat_type_id and goat.goat_type_id != goat_type_id:
-            continue
-            
-        if sex_filter and goat.sex != sex_filter:
-            continue
-            
-        if acquired_start and (not goat.date_acquired or goat.date_acquired < acquired_start):
-            continue
-            
-        if acquired_end and (not goat.date_acquired or goat.date_acquired > acquired_end):
-            continue
-            
-        if dob_start and (not goat.dob or goat.dob < dob_start):
-            continue
-            
-        if dob_end and (not goat.dob or goat.dob > dob_end):
-            continue
-
-        filtered_goats.append(goat)
-
-    # Calculate statistics
+    # Calculate statistics over the whole filtered set in one aggregate
+    active_count, sick_count, underweight_count, pregnant_count, ready_to_mate_count = query.with_entities(
+        func.count(Goat.id).filter(Goat.status == "active"),
+        func.count(Goat.id).filter(Goat.is_sick == True),
+        func.count(Goat.id).filter(Goat.is_underweight == True),
+        func.count(Goat.id).filter(Goat.is_pregnant == True),
+        func.count(Goat.id).filter(Goat.is_ready_to_mate == True),
+    ).one()
     stats = {
-        'active_count': len([g for g in filtered_goats if g.status == "active"]),
-        'sick_count': len([g for g in filtered_goats if hasattr(g, "tags") and "sick" in g.tags]),
-        'underweight_count': len([g for g in filtered_goats if hasattr(g, "tags") and "underweight" in g.tags]),
-        'pregnant_count': len([g for g in filtered_goats if hasattr(g, "tags") and "pregnant" in g.tags]),
-        'ready_to_mate_count': len([g for g in filtered_goats if hasattr(g, "tags") and "ready to mate" in g.tags])
+        'active_count': active_count,
+        'sick_count': sick_count,
+        'underweight_count': underweight_count,
+        'pregnant_count': pregnant_count,
+        'ready_to_mate_count': ready_to_mate_count
     }
 
+    # Sort and fetch the requested page only
+    sort = sort if sort in GOAT_SORT_OPTIONS else ""
+    pagination = query.options(joinedload(Goat.goat_type))\
+        .order_by(*GOAT_SORT_OPTIONS[sort][1], Goat.id)\
+        .paginate(page=page, per_page=per_page, error_out=False)
+    goats = pagination.items
+
+    # Status tags for display, evaluated for the page in one pass
+    goat_tags = get_herd_tags(goats) if goats else {}
+
+    today = datetime.now().date()
+    for goat in goats:
+        goat.calculated_age_months = goat_age_months(goat, today)
+
     # Build selected filters for display
     selected_filters = []
     if selected_tags:
@@ -148,26 +118,57 @@ def list_goats():
         selected_filters.append({'label': f'Max Weight: {weight_max}kg', 'param': 'weight_max'})
 
     alerts = {}
-    for goat in filtered_goats:
-        target = get_target_weight(goat)
+    targets = get_target_weights(goats)
+    for goat in goats:
+        target = targets[goat.id]
         if target and goat.weight and goat.weight < target:
             alerts[goat.tag] = f"Underweight! (target ≥ {target} kg)"
 
     # Always use new template
     template_name = "goat_list_new.html"
 
-    return render_template(
+    response = make_response(render_template(
         template_name,
-        goats=filtered_goats,
+        goats=goats,
+        pagination=pagination,
+        page_args=page_args,
+        sort=sort,
+        sort_options=GOAT_SORT_OPTIONS,
         locations=locations,
         goat_types=goat_types,
         selected_location=selected_location,
         alerts=alerts,
+        goat_tags=goat_tags,
         selected_tags=selected_tags,
         selected_filters=selected_filters,
         stats=stats,
         now=datetime.now
-    )
+    ))
+    return set_validators(response, etag, herd_updated)
+
+@goats_bp.route("/search")
+def search():
+    """Ranked full-text search over goats, sickness, feedback and removals."""
+    if not session.get("username"):
+        flash("Please login first.", "warning")
+        return redirect(url_for("auth.login"))
+
+    q = request.args.get("q", "").strip()
+    hits = search_hits(q, limit=100)
+    goat_ids = {goat_id for _, _, goat_id, _, _ in hits if goat_id}
+    goats = {g.id: g for g in Goat.query.filter(Goat.id.in_(goat_ids))} if goat_ids else {}
+    results = [
+        {"kind": kind, "id": source_id, "goat": goats.get(goat_id), "title": title, "body": body}
+        for kind, source_id, goat_id, title, body in hits
+    ]
+
+    if request.args.get("format") == "json":
+        return jsonify([
+            {"kind": r["kind"], "id": r["id"], "goat_tag": r["goat"].tag if r["goat"] else None,
+             "title": r["title"], "body": r["body"]}
+            for r in results
+        ])
+    return render_template("search.html", q=q, results=results)
 
 @goats_bp.route("/goats/add", methods=["GET", "POST"])
 def add_goat():
@@ -184,13 +185,13 @@ def add_goat():
         acquisition_method = request.form["acquisition_method"]
         source_name = request.form.get("source_name")
         purchase_price = request.form.get("purchase_price")
-        dob = request.form["dob"] if request.form["dob"] else None
+        dob = parse_date(request.form["dob"])
         age_estimate_months = request.form["age_estimate_months"]
         weight = request.form["weight"]
         location = request.form["location"]
         notes = request.form["notes"]
 
-        date_acquired = request.form.get("date_acquired") or None
+        date_acquired = parse_date(request.form.get("date_acquired"))
         if acquisition_method == "Born":
             if not dob:
                 flash("Date of Birth is required for goats born on farm.", "danger")
@@ -234,6 +235,42 @@ def add_goat():
 
     return render_template("add_goat.html", goat_types=goat_types, goat=None)
 
+@goats_bp.route("/goats/import", methods=["GET", "POST"])
+def import_goats_view():
+    """Bulk add goats from a CSV/XLSX sheet, with a dry-run option and a per-row error report."""
+    if not session.get("username"):
+        flash("Please login first.", "warning")
+        return redirect(url_for("auth.login"))
+
+    result = None
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV or XLSX file to import.", "warning")
+            return redirect(url_for("goats.import_goats_view"))
+        try:
+            result = import_goats(read_sheet(upload), session.get("username"),
+                                  dry_run="dry_run" in request.form)
+        except ImportFileError as e:
+            db.session.rollback()
+            flash(str(e), "danger")
+            return redirect(url_for("goats.import_goats_view"))
+        if result["imported"]:
+            flash(f"{result['imported']} goats imported.", "success")
+        elif result["errors"]:
+            flash(f"Nothing imported: {len(result['errors'])} row(s) need fixing.", "danger")
+        elif result["dry_run"]:
+            flash(f"Dry run: all {result['total']} rows are valid.", "info")
+
+    return render_template("import_goats.html", result=result, columns=IMPORT_COLUMNS)
+
+@goats_bp.route("/goats/import/template.csv")
+def import_goats_template():
+    if not session.get("username"):
+        flash("Please login first.", "warning")
+        return redirect(url_for("auth.login"))
+    return csv_response("goat_import_template.csv", list(IMPORT_COLUMNS), [])
+
 @goats_bp.route("/goats/edit/<int:goat_id>", methods=["GET", "POST"])
 def edit_goat(goat_id):
     if not session.get("username"):
@@ -246,8 +283,8 @@ def edit_goat(goat_id):
         goat.tag = request.form["tag"].strip()
         goat.goat_type_id = int(request.form["goat_type_id"])
         goat.sex = request.form["sex"]
-        goat.dob = request.form["dob"] if request.form["dob"] else None
-        goat.date_acquired = request.form["date_acquired"]
+        goat.dob = parse_date(request.form["dob"])
+        goat.date_acquired = parse_date(request.form["date_acquired"])
         goat.acquisition_method = request.form["acquisition_method"]
         goat.source_name = request.form.get("source_name")
         goat.purchase_price = float(request.form.get("purchase_price") or 0)
@@ -268,11 +305,22 @@ def goat_detail(tag):
         flash("Please login first.", "warning")
         return redirect(url_for("auth.login"))
 
-    goat = Goat.query.filter_by(tag=tag).first_or_404()
-    
+    version = db.session.query(Goat.id, Goat.data_version, Goat.data_updated_at)\
+        .filter_by(tag=tag).first_or_404()
+
+    # Answer a revalidation before loading anything else
+    reference_version, reference_updated = get_versions("reference")["reference"]
+    etag = page_etag("goat", version.id, version.data_version, reference_version)
+    last_modified = max(filter(None, [version.data_updated_at, reference_updated]), default=None)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    goat = load_goat_profile(tag)
+
     # Calculate age
     if goat.dob:
-        age_days = (datetime.now().date() - datetime.strptime(goat.dob, '%Y-%m-%d').date()).days
+        age_days = (datetime.now().date() - goat.dob).days
         goat.calculated_age_months = round(age_days / 30.44, 1)
     elif goat.age_estimate_months:
         goat.calculated_age_months = goat.age_estimate_months
@@ -281,50 +329,18 @@ def goat_detail(tag):
         goat.calculated_age_months = None
         age_days = 0
 
-    # Get vaccine info
-    vaccine_due_info = get_vaccine_due_info(goat)
-
-    has_any_vaccine = bool(getattr(goat, "vaccination_events", None))
-
-    weight_page = request.args.get('weight_page', 1, type=int)
-    weight_logs = WeightLog.query.filter_by(goat_id=goat.id)\
-        .order_by(WeightLog.date.desc(), WeightLog.created_at.desc())\
-        .paginate(page=weight_page, per_page=10, error_out=False)
-
-    vaccine_page = request.args.get('vaccine_page', 1, type=int)
-    vaccine_events = VaccinationEvent.query.filter_by(goat_id=goat.id)\
-        .order_by(VaccinationEvent.scheduled_date.desc())\
-        .paginate(page=vaccine_page, per_page=10, error_out=False)
-
-    breeding_page = request.args.get('breeding_page', 1, type=int)
-    breeding_events = BreedingEvent.query.filter(
-        (BreedingEvent.buck_id == goat.id) | (BreedingEvent.doe_id == goat.id)
-    ).order_by(BreedingEvent.mating_start_date.desc())\
-     .paginate(page=breeding_page, per_page=10, error_out=False)
-
-    sickness_page = request.args.get('sickness_page', 1, type=int)
-    sickness_history = Sickness.query.filter_by(goat_id=goat.id)\
-        .order_by(Sickness.created_at.desc())\
-        .paginate(page=sickness_page, per_page=10, error_out=False)
-
     # Get user permissions
-    user = None
-    if session.get("username"):
-        user = User.query.filter_by(username=session["username"]).first()
+    user = get_current_user()
 
-    return render_template(
+    response = make_response(render_template(
         "goat_detail.html",
         goat=goat,
-        vaccine_due_info=vaccine_due_info,
         age_days=age_days,
-        has_any_vaccine=has_any_vaccine,
-        weight_logs=weight_logs,
-        vaccine_events=vaccine_events,
-        breeding_events=breeding_events,
-        sickness_history=sickness_history,
         now=datetime.utcnow(),
-        user=user
-    )
+        user=user,
+        **goat_profile_context(goat, request.args)
+    ))
+    return set_validators(response, etag, last_modified)
 
 @goats_bp.route("/goats/<tag>/add_weight", methods=["POST"])
 def add_weight_log(tag):
@@ -332,7 +348,7 @@ def add_weight_log(tag):
         flash("Please login first.", "warning")
         return redirect(url_for("auth.login"))
     goat = Goat.query.filter_by(tag=tag).first_or_404()
-    date = request.form["date"]
+    date = parse_date(request.form["date"])
     weight = float(request.form["weight"])
     log = WeightLog(
         goat_id=goat.id,
@@ -382,7 +398,7 @@ def remove_goat(tag):
     if request.method == "POST":
         reason = request.form["reason"]
         notes = request.form["note"]
-        date = request.form["date"]
+        date = parse_date(request.form["date"])
         goat.status = "removed"
         r = Removal(
             goat_id=goat.id,
@@ -403,6 +419,7 @@ def remove_goat(tag):
 def mark_goat_recovered(tag):
     goat = Goat.query.filter_by(tag=tag).first_or_404()
     Sickness.query.filter_by(goat_id=goat.id, status='active').update({'status': 'recovered'})
+    touch_goats([goat.id])
     db.session.commit()
     flash(f"Goat {tag} marked as recovered.", "success")
     return redirect(url_for("goats.goat_detail", tag=tag))
@@ -420,8 +437,8 @@ def ajax_save_goat(goat_id):
     goat.tag = data["tag"].strip()
     goat.goat_type_id = int(data["goat_type_id"])
     goat.sex = data["sex"]
-    goat.dob = data["dob"] or None
-    goat.date_acquired = data["date_acquired"] or None
+    goat.dob = parse_date(data["dob"])
+    goat.date_acquired = parse_date(data["date_acquired"])
     goat.acquisition_method = data["acquisition_method"]
     goat.source_name = data.get("source_name")
     goat.purchase_price = float(data.get("purchase_price") or 0)
@@ -484,7 +501,7 @@ def delete_goat_feedback(tag, fb_id):
 
     for photo in feedback.photos:
         try:
-            os.remove(photo.image_path)
+            remove_photo_files(photo)
         except Exception:
             pass
         db.session.delete(photo)
@@ -502,70 +519,23 @@ def export_goats():
         return redirect(url_for("auth.login"))
 
     # Get form data
-    export_format = request.form.get('format', 'csv')
     data_range = request.form.get('range', 'all')
-    selected_columns = request.form.getlist('columns')
-    goat_ids = request.form.getlist('goat_ids')
+    selected_columns = [c for c in request.form.getlist('columns') if c in GOAT_EXPORT_COLUMNS]
+    goat_ids = request.form.getlist('goat_ids', type=int)
 
-    # Get goats based on range
+    # Get goats based on range; "filtered" posts the list's filter parameters
     if data_range == 'selected' and goat_ids:
-        goats = Goat.query.filter(Goat.id.in_(goat_ids)).all()
+        query = Goat.query.filter(Goat.id.in_(goat_ids))
+    elif data_range == 'filtered':
+        query, _ = filter_goats(request.form, invalid=[])
     else:
-        goats = Goat.query.filter_by(status="active").all()
-
-    # Create CSV data
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers
-    headers = []
-    for col in selected_columns:
-        if col == 'tag':
-            headers.append('Tag')
-        elif col == 'type':
-            headers.append('Type')
-        elif col == 'sex':
-            headers.append('Sex')
-        elif col == 'age':
-            headers.append('Age (months)')
-        elif col == 'weight':
-            headers.append('Weight (kg)')
-        elif col == 'location':
-            headers.append('Location')
-        elif col == 'status':
-            headers.append('Status')
-        elif col == 'notes':
-            headers.append('Notes')
-    writer.writerow(headers)
-
-    # Write data rows
-    for goat in goats:
-        row = []
-        for col in selected_columns:
-            if col == 'tag':
-                row.append(goat.tag)
-            elif col == 'type':
-                row.append(goat.goat_type.name if goat.goat_type else '-')
-            elif col == 'sex':
-                row.append(goat.sex)
-            elif col == 'age':
-                row.append(str(goat.calculated_age_months) if goat.calculated_age_months else '-')
-            elif col == 'weight':
-                row.append(str(goat.weight) if goat.weight else '-')
-            elif col == 'location':
-                row.append(goat.location or '-')
-            elif col == 'status':
-                row.append(goat.status)
-            elif col == 'notes':
-                row.append(goat.notes or '-')
-        writer.writerow(row)
-
-    # Create response
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=goats_export.csv'}
+        query = Goat.query.filter_by(status="active")
+    query = query.options(joinedload(Goat.goat_type)).order_by(Goat.tag)
+
+    return csv_response(
+        'goats_export.csv',
+        [GOAT_EXPORT_COLUMNS[col][0] for col in selected_columns],
+        goat_export_rows(query, selected_columns),
     )
 
 @goats_bp.route("/goats/<tag>/feedback/<int:fb_id>/edit", methods=["POST"])
@@ -607,7 +577,7 @@ def reschedule_vaccine(tag, vaccine_type_id):
     if not session.get("username"):
         return jsonify({"success": False, "error": "Login required."}), 403
 
-    new_date = request.form.get("new_date")
+    new_date = parse_date(request.form.get("new_date"))
     if not new_date:
         return jsonify({"success": False, "error": "No date provided"}), 400
 
@@ -619,7 +589,7 @@ def reschedule_vaccine(tag, vaccine_type_id):
     if not due_info:
         return jsonify({"success": False, "error": "No due vaccination found."}), 404
 
-    next_due = due_info[0]["next_due"].strftime("%Y-%m-%d")
+    next_due = due_info[0]["next_due"]
     # Delete any scheduled (not-done) event for this due date
     existing = VaccinationEvent.query.filter_by(
         goat_id=goat.id,
@@ -653,4 +623,4 @@ def reschedule_vaccine(tag, vaccine_type_id):
     )
     db.session.add(ve)
     db.session.commit()
-    return jsonify({"success": True, "message": "Vaccination rescheduled.", "new_date": new_date})
+    return jsonify({"success": True, "message": "Vaccination rescheduled.", "new_date": new_date.isoformat()})
@@ -1,76 +1,66 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, Response, make_response
-from ...models import Goat, Sickness, Removal, VaccineType, VaccinationEvent, GoatFeedback, TargetWeight
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, make_response
+from ...models import Goat, Sickness, Removal, VaccineType, VaccinationEvent, VaccineDue, GoatFeedback, TargetWeight, BreedingEvent
 from ...extensions import db, mail
-from ...utils import require_any_role, get_vaccine_due_info, get_target_weight
+from ...exports import batched, csv_response
+from ...utils import require_any_role, get_target_weight
+from ...vaccine_due import active_vaccine_due
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from datetime import datetime
-import io
-import csv
 import pdfkit
 
 reports_bp = Blueprint("reports", __name__)
 
+def _overdue_query(today):
+    """Overdue vaccinations of active goats, most overdue first."""
+    return active_vaccine_due().filter(VaccineDue.next_due < today)\
+        .options(contains_eager(VaccineDue.goat).joinedload(Goat.goat_type))\
+        .order_by(None).order_by(VaccineDue.next_due, Goat.tag, VaccineDue.vaccine_type_id)
+
+def _overdue_list(today):
+    return [{
+        "goat": d.goat,
+        "vaccine": d.vaccine_type,
+        "due_date": d.next_due,
+        "days_overdue": (today - d.next_due).days,
+        "last_given": d.last_given,
+    } for d in _overdue_query(today)]
+
 @reports_bp.route("/reports/vax_overdue")
 @require_any_role("admin", "superadmin")
 def report_vax_overdue():
-    goats = Goat.query.filter_by(status="active").all()
-    overdue_list = []
     today = datetime.now().date()
-    for goat in goats:
-        due_info = get_vaccine_due_info(goat)
-        for v in due_info:
-            if v["status"] == "overdue":
-                overdue_list.append({
-                    "goat": goat,
-                    "vaccine": v["vaccine"],
-                    "due_date": v["next_due"],
-                    "days_overdue": (today - v["next_due"]).days,
-                    "last_given": v["last_given"],
-                })
-    overdue_list.sort(key=lambda x: (x["due_date"], x["goat"].tag))
+    overdue_list = _overdue_list(today)
     return render_template("report_vax_overdue.html", overdue_list=overdue_list)
 
 @reports_bp.route("/reports/vax_overdue/export_csv")
 @require_any_role("admin", "superadmin")
 def export_vax_overdue_csv():
-    goats = Goat.query.filter_by(status="active").all()
     today = datetime.now().date()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Goat Tag", "Type", "Vaccine", "Last Given", "Next Due", "Days Overdue", "Status"])
-    for goat in goats:
-        due_info = get_vaccine_due_info(goat)
-        for v in due_info:
-            if v["status"] == "overdue":
-                writer.writerow([
-                    goat.tag,
-                    goat.goat_type.name if goat.goat_type else "",
-                    v["vaccine"].name,
-                    v["last_given"] or "",
-                    v["next_due"].strftime("%Y-%m-%d"),
-                    (today - v["next_due"]).days,
-                    "Overdue"
-                ])
-    output.seek(0)
-    return Response(output, mimetype="text/csv", headers={"Content-Disposition": "attachment;filename=overdue_vax_report.csv"})
+
+    def rows():
+        for d in _overdue_query(today).yield_per(500):
+            yield [
+                d.goat.tag,
+                d.goat.goat_type.name if d.goat.goat_type else "",
+                d.vaccine_type.name,
+                d.last_given or "",
+                d.next_due.strftime("%Y-%m-%d"),
+                (today - d.next_due).days,
+                "Overdue"
+            ]
+
+    return csv_response(
+        "overdue_vax_report.csv",
+        ["Goat Tag", "Type", "Vaccine", "Last Given", "Next Due", "Days Overdue", "Status"],
+        rows(),
+    )
 
 @reports_bp.route("/reports/vax_overdue/export_pdf")
 @require_any_role("admin", "superadmin")
 def export_vax_overdue_pdf():
-    goats = Goat.query.filter_by(status="active").all()
-    overdue_list = []
     today = datetime.now().date()
-    for goat in goats:
-        due_info = get_vaccine_due_info(goat)
-        for v in due_info:
-            if v["status"] == "overdue":
-                overdue_list.append({
-                    "goat": goat,
-                    "vaccine": v["vaccine"],
-                    "due_date": v["next_due"],
-                    "days_overdue": (today - v["next_due"]).days,
-                    "last_given": v["last_given"],
-                })
-    overdue_list.sort(key=lambda x: (x["due_date"], x["goat"].tag))
+    overdue_list = _overdue_list(today)
     html_out = render_template("report_vax_overdue_pdf.html", overdue_list=overdue_list, today=today)
     pdf = pdfkit.from_string(html_out, False)
     response = make_response(pdf)
@@ -88,34 +78,38 @@ def report_health():
 @reports_bp.route("/reports/health/export_csv")
 @require_any_role("admin", "superadmin")
 def export_health_csv():
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Type", "Goat Tag", "Date", "Sickness/Reason", "Medicine", "Status/Notes", "Photo/Certificate"])
-    sick_logs = Sickness.query.filter_by(status="active").order_by(Sickness.created_at.desc()).all()
-    for log in sick_logs:
-        photo_paths = "; ".join([photo.image_path for photo in log.photos]) if log.photos else "-"
-        writer.writerow([
-            "Sickness",
-            log.goat.tag,
-            getattr(log, "date", ""),
-            log.sickness,
-            log.medicine,
-            log.notes if hasattr(log, "notes") else "-",
-            photo_paths
-        ])
-    removals = Removal.query.order_by(Removal.date.desc()).all()
-    for r in removals:
-        writer.writerow([
-            "Removal",
-            r.goat.tag,
-            r.date,
-            r.reason or "-",
-            "-",
-            r.notes or "-",
-            r.certificate_path or "-"
-        ])
-    output.seek(0)
-    return Response(output, mimetype="text/csv", headers={"Content-Disposition": "attachment;filename=health_report.csv"})
+    def rows():
+        sick_logs = Sickness.query.filter_by(status="active")\
+            .options(joinedload(Sickness.goat), selectinload(Sickness.photos))\
+            .order_by(Sickness.created_at.desc())
+        for log in sick_logs.yield_per(500):
+            photo_paths = "; ".join([photo.image_path for photo in log.photos]) if log.photos else "-"
+            yield [
+                "Sickness",
+                log.goat.tag,
+                getattr(log, "date", ""),
+                log.sickness,
+                log.medicine,
+                log.notes if hasattr(log, "notes") else "-",
+                photo_paths
+            ]
+        removals = Removal.query.options(joinedload(Removal.goat)).order_by(Removal.date.desc())
+        for r in removals.yield_per(500):
+            yield [
+                "Removal",
+                r.goat.tag,
+                r.date,
+                r.reason or "-",
+                "-",
+                r.notes or "-",
+                r.certificate_path or "-"
+            ]
+
+    return csv_response(
+        "health_report.csv",
+        ["Type", "Goat Tag", "Date", "Sickness/Reason", "Medicine", "Status/Notes", "Photo/Certificate"],
+        rows(),
+    )
 
 @reports_bp.route("/reports/health/export_pdf")
 @require_any_role("admin", "superadmin")
@@ -133,23 +127,21 @@ def export_health_pdf():
 @reports_bp.route("/reports/vax_compliance")
 @require_any_role("admin", "superadmin")
 def report_vax_compliance():
-    goats = Goat.query.filter_by(status="active").all()
     vaccine_types = VaccineType.query.all()
     compliance_data = []
     today = datetime.now().date()
+    due = active_vaccine_due()
+    totals = dict(
+        due.with_entities(VaccineDue.vaccine_type_id, func.count())
+        .order_by(None).group_by(VaccineDue.vaccine_type_id)
+    )
+    overdue_by_type = {}
+    for d in due.filter(VaccineDue.next_due < today):
+        overdue_by_type.setdefault(d.vaccine_type_id, []).append({"goat": d.goat, "due_date": d.next_due})
     for vt in vaccine_types:
-        total = 0
-        compliant = 0
-        overdue = []
-        for goat in goats:
-            due_info = get_vaccine_due_info(goat)
-            for v in due_info:
-                if v["vaccine"].id == vt.id:
-                    total += 1
-                    if v["status"] != "overdue":
-                        compliant += 1
-                    else:
-                        overdue.append({"goat": goat, "due_date": v["next_due"]})
+        total = totals.get(vt.id, 0)
+        overdue = overdue_by_type.get(vt.id, [])
+        compliant = total - len(overdue)
         percent = int((compliant / total) * 100) if total else 100
         compliance_data.append({
             "vaccine_type": vt,
@@ -172,31 +164,46 @@ def report_goat_register():
 @reports_bp.route("/reports/goat_register/export_csv")
 @require_any_role("admin", "superadmin")
 def export_goat_register_csv():
-    goats = Goat.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Tag", "Type", "Sex", "DOB", "Date Acquired", "Acq. Method", "Source",
-        "Weight (kg)", "Status", "Num Breedings", "Num Sickness", "Num Vax", "Removed"
-    ])
-    for goat in goats:
-        writer.writerow([
-            goat.tag,
-            goat.goat_type.name if goat.goat_type else "",
-            goat.sex or "",
-            goat.dob or "",
-            goat.date_acquired or "",
-            goat.acquisition_method or "",
-            goat.source_name or "",
-            goat.weight or "",
-            goat.status,
-            len(getattr(goat, 'breedings_as_doe', [])) + len(getattr(goat, 'breedings_as_buck', [])),
-            len(getattr(goat, 'sicknesses', [])),
-            len(getattr(goat, 'vaccination_events', [])),
-            "Yes" if goat.status != "active" else "No"
-        ])
-    output.seek(0)
-    return Response(output, mimetype="text/csv", headers={"Content-Disposition": "attachment;filename=goat_register.csv"})
+    def counts(ids, *columns):
+        """``{goat_id: rows}`` counted through any of the goat id ``columns``."""
+        result = {}
+        for column in columns:
+            for goat_id, n in db.session.query(column, func.count()).filter(column.in_(ids)).group_by(column):
+                result[goat_id] = result.get(goat_id, 0) + n
+        return result
+
+    def rows():
+        goats = Goat.query.options(joinedload(Goat.goat_type)).order_by(Goat.id)
+        for batch in batched(goats):
+            ids = [goat.id for goat in batch]
+            breedings = counts(ids, BreedingEvent.doe_id, BreedingEvent.buck_id)
+            sicknesses = counts(ids, Sickness.goat_id)
+            vaccinations = counts(ids, VaccinationEvent.goat_id)
+            for goat in batch:
+                yield [
+                    goat.tag,
+                    goat.goat_type.name if goat.goat_type else "",
+                    goat.sex or "",
+                    goat.dob or "",
+                    goat.date_acquired or "",
+                    goat.acquisition_method or "",
+                    goat.source_name or "",
+                    goat.weight or "",
+                    goat.status,
+                    breedings.get(goat.id, 0),
+                    sicknesses.get(goat.id, 0),
+                    vaccinations.get(goat.id, 0),
+                    "Yes" if goat.status != "active" else "No"
+                ]
+
+    return csv_response(
+        "goat_register.csv",
+        [
+            "Tag", "Type", "Sex", "DOB", "Date Acquired", "Acq. Method", "Source",
+            "Weight (kg)", "Status", "Num Breedings", "Num Sickness", "Num Vax", "Removed"
+        ],
+        rows(),
+    )
 
 @reports_bp.route("/reports/goat_register/export_pdf")
 @require_any_role("admin", "superadmin")
@@ -224,20 +231,8 @@ def send_vax_overdue_email():
             from flask_mail import Message
             
             # Generate report data
-            goats = Goat.query.filter_by(status="active").all()
-            overdue_list = []
             today = datetime.now().date()
-            for goat in goats:
-                due_info = get_vaccine_due_info(goat)
-                for v in due_info:
-                    if v["status"] == "overdue":
-                        overdue_list.append({
-                            "goat": goat,
-                            "vaccine": v["vaccine"],
-                            "due_date": v["next_due"],
-                            "days_overdue": (today - v["next_due"]).days,
-                            "last_given": v["last_given"],
-                        })
+            overdue_list = _overdue_list(today)
             
             # Create email
             msg = Message(
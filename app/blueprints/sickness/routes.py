@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.models import db, Sickness, SicknessPhoto, Goat
 from app.utils import require_permission
+from app.search import fts_query, matching_ids
+from app.photos import remove_photo_files
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import os
@@ -25,11 +27,8 @@ def sick_log():
         if goat:
             query = query.filter_by(goat_id=goat.id)
     
-    if keyword:
-        query = query.filter(
-            (Sickness.sickness.contains(keyword)) |
-            (Sickness.medicine.contains(keyword))
-        )
+    if keyword and fts_query(keyword):
+        query = query.filter(Sickness.id.in_(matching_ids("sickness", keyword)))
     
     if date_from:
         query = query.filter(Sickness.created_at >= date_from)
@@ -86,8 +85,7 @@ def delete_sick_log(log_id):
     
     # Delete associated photos
     for photo in log.photos:
-        if os.path.exists(photo.image_path):
-            os.remove(photo.image_path)
+        remove_photo_files(photo)
         db.session.delete(photo)
     
     db.session.delete(log)
@@ -109,8 +107,7 @@ def batch_delete_sick_log():
         if log:
             # Delete associated photos
             for photo in log.photos:
-                if os.path.exists(photo.image_path):
-                    os.remove(photo.image_path)
+                remove_photo_files(photo)
                 db.session.delete(photo)
             db.session.delete(log)
     
@@ -123,9 +120,8 @@ def batch_delete_sick_log():
 def delete_sickness_photo(photo_id):
     photo = SicknessPhoto.query.get_or_404(photo_id)
     
-    # Remove file from disk
-    if os.path.exists(photo.image_path):
-        os.remove(photo.image_path)
+    # Remove file and its variants from disk
+    remove_photo_files(photo)
     
     db.session.delete(photo)
     db.session.commit()
@@ -0,0 +1 @@
+from .routes import sync_bp
@@ -0,0 +1,25 @@
+from flask import Blueprint, request, session, jsonify
+from ...extensions import db
+from ...sync import MAX_BATCH, apply_operations
+
+sync_bp = Blueprint("sync", __name__)
+
+@sync_bp.route("/sync", methods=["POST"])
+def sync():
+    """
+    Apply a batch of operations queued offline by the service worker:
+    ``{"operations": [{id, type, ts, data}, ...]}`` -> ``{"results": [...]}``.
+    """
+    if not session.get("username"):
+        return jsonify({"error": "Login required."}), 401
+
+    payload = request.get_json(silent=True)
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list):
+        return jsonify({"error": "Expected a JSON object with an 'operations' list."}), 400
+    if len(operations) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} operations per request."}), 413
+
+    results = apply_operations(operations, session.get("username"))
+    db.session.commit()
+    return jsonify({"results": results})
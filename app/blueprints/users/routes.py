@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, sessio
 from ...models import User, PasswordResetRequest
 from ...extensions import db
 from ...utils import require_any_role
+from ...current_user import get_current_user, invalidate_user
 from datetime import datetime
 import secrets
 
@@ -20,6 +21,7 @@ def user_list():
                 perms = request.form.getlist(f"perms_{user.id}")
                 user.permissions = ",".join(perms)
         db.session.commit()
+        invalidate_user()
         flash("Permissions updated!", "success")
         return redirect(url_for("users.user_list"))
 
@@ -28,25 +30,27 @@ def user_list():
 @users_bp.route("/users/reset/<int:user_id>", methods=["POST"])
 @require_any_role("admin", "superadmin")
 def reset_user_password(user_id):
-    current_user = User.query.filter_by(username=session.get("username")).first()
+    current_user = get_current_user()
     target_user = User.query.get_or_404(user_id)
 
     if current_user.role == "superadmin" or (current_user.role == "admin" and target_user.role == "worker"):
         temp_pw = secrets.token_urlsafe(8)[:10]
         target_user.set_temp_password(temp_pw)
         db.session.commit()
+        invalidate_user(target_user.username)
         return jsonify({"success": True, "temp_password": temp_pw})
     return jsonify({"success": False, "error": "Not authorized."}), 403
 
 @users_bp.route("/users/toggle/<int:user_id>", methods=["POST"])
 @require_any_role("admin", "superadmin")
 def toggle_user_status(user_id):
-    current_user = User.query.filter_by(username=session.get("username")).first()
+    current_user = get_current_user()
     target_user = User.query.get_or_404(user_id)
 
     if current_user.role == "superadmin" or (current_user.role == "admin" and target_user.role == "worker"):
         target_user.status = "inactive" if target_user.status == "active" else "active"
         db.session.commit()
+        invalidate_user(target_user.username)
         flash("User status changed.", "info")
     else:
         flash("Not authorized to change status.", "danger")
@@ -57,7 +61,7 @@ def toggle_user_status(user_id):
 @users_bp.route("/users/edit/<int:user_id>", methods=["GET", "POST"])
 @require_any_role("admin", "superadmin")
 def manage_user(user_id=None):
-    current = User.query.filter_by(username=session.get("username")).first()
+    current = get_current_user()
     is_edit = user_id is not None
     user = User.query.get(user_id) if is_edit else None
 
@@ -80,6 +84,7 @@ def manage_user(user_id=None):
             user.phone = phone
             user.status = status
             db.session.commit()
+            invalidate_user(user.username)
             flash("User updated.", "success")
         else:
             if User.query.filter_by(username=username).first():
@@ -116,6 +121,7 @@ def user_profile():
         user.email = request.form["email"]
         user.phone = request.form["phone"]
         db.session.commit()
+        invalidate_user(user.username)
         flash("Profile updated.", "success")
         return redirect(url_for("users.user_profile"))
 
@@ -137,6 +143,7 @@ def change_password():
 
     user.set_password(new_pw)
     db.session.commit()
+    invalidate_user(user.username)
     flash("Password changed successfully.", "success")
     return redirect(url_for("users.user_profile"))
 
@@ -144,7 +151,7 @@ def change_password():
 @require_any_role("admin", "superadmin")
 def admin_reset_password(user_id, request_id):
     """Admin reset password for user with pending request"""
-    current_user = User.query.filter_by(username=session.get("username")).first()
+    current_user = get_current_user()
     target_user = User.query.get_or_404(user_id)
     reset_request = PasswordResetRequest.query.get_or_404(request_id)
     
@@ -168,6 +175,7 @@ def admin_reset_password(user_id, request_id):
     reset_request.resolved_at = datetime.utcnow()
     
     db.session.commit()
+    invalidate_user(target_user.username)
     
     flash(f"Password reset for {target_user.username}. New temporary password: {temp_pw}", "success")
     return redirect(url_for("users.user_list"))
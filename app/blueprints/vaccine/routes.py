@@ -1,7 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 from ...models import VaccineType, VaccinationEvent, Goat, VaccineGuide, TargetWeight, Sickness
 from ...extensions import db
-from ...utils import require_role, require_any_role
+from ...bulk_writes import record_vaccinations
+from ...utils import require_role, require_any_role, parse_date
+from ...vaccine_due import refresh_vaccine_due
+from ...dashboard_snapshot import mark_dashboard_stale
+from ...search import fts_query, matching_ids
 from datetime import datetime
 
 vaccine_bp = Blueprint("vaccine", __name__)
@@ -37,6 +41,8 @@ def vaccine_types():
                 default_frequency_days=default_frequency_days
             )
             db.session.add(vt)
+            refresh_vaccine_due()
+            mark_dashboard_stale()
             db.session.commit()
             flash("Vaccine type added!", "success")
         return redirect(url_for("vaccine.vaccine_types"))
@@ -66,6 +72,9 @@ def edit_vaccine_type(vaccine_type_id):
     vt.min_age_days = int(data.get("min_age_days", 0))
     vt.booster_schedule_days = data.get("booster_schedule_days", "")
     vt.default_frequency_days = int(data.get("default_frequency_days", 180))
+    # Due dates depend on the type's rules, so every goat's projection changes
+    refresh_vaccine_due()
+    mark_dashboard_stale()
     db.session.commit()
     return jsonify({"success": True})
 
@@ -75,6 +84,8 @@ def delete_vaccine_type(vaccine_type_id):
     vt = VaccineType.query.get_or_404(vaccine_type_id)
     VaccinationEvent.query.filter_by(vaccine_type_id=vt.id, status="scheduled").delete()
     db.session.delete(vt)
+    refresh_vaccine_due()
+    mark_dashboard_stale()
     db.session.commit()
     flash("Vaccine type deleted. Historical vaccination records remain.", "info")
     return redirect(url_for("vaccine.vaccine_types"))
@@ -86,8 +97,8 @@ def record_vaccine(tag, vaccine_type_id):
     today_str = datetime.now().strftime('%Y-%m-%d')
 
     if request.method == "POST":
-        scheduled_date = request.form.get("scheduled_date", today_str)
-        actual_date_given = request.form.get("actual_date_given") or None
+        scheduled_date = parse_date(request.form.get("scheduled_date")) or datetime.now().date()
+        actual_date_given = parse_date(request.form.get("actual_date_given"))
         notes = request.form.get("notes", "")
         batch_number = request.form.get("batch_number", "")
         given_by = request.form.get("given_by") or session.get("username")
@@ -142,11 +153,8 @@ def sick_log():
         goat = Goat.query.filter_by(tag=goat_tag).first()
         if goat:
             logs_query = logs_query.filter_by(goat_id=goat.id)
-    if keyword:
-        logs_query = logs_query.filter(
-            Sickness.sickness.ilike(f"%{keyword}%") |
-            Sickness.medicine.ilike(f"%{keyword}%")
-        )
+    if keyword and fts_query(keyword):
+        logs_query = logs_query.filter(Sickness.id.in_(matching_ids("sickness", keyword)))
     if date_from:
         logs_query = logs_query.filter(Sickness.date >= date_from)
     if date_to:
@@ -203,32 +211,22 @@ def batch_vaccine_entry():
 
     if request.method == "POST":
         vaccine_type_id = int(request.form["vaccine_type_id"])
-        actual_date_given = request.form.get("actual_date_given", today_str)
-        goat_ids = request.form.getlist("goat_ids")
+        actual_date_given = parse_date(request.form.get("actual_date_given")) or datetime.now().date()
+        goat_ids = request.form.getlist("goat_ids", type=int)
         notes = request.form.get("notes", "")
         batch_number = request.form.get("batch_number", "")
         given_by = request.form.get("given_by") or session.get("username")
-        for goat_id in goat_ids:
-            exists = VaccinationEvent.query.filter_by(
-                goat_id=goat_id,
-                vaccine_type_id=vaccine_type_id,
-                actual_date_given=actual_date_given
-            ).first()
-            if exists:
-                continue
-            ve = VaccinationEvent(
-                goat_id=goat_id,
-                vaccine_type_id=vaccine_type_id,
-                scheduled_date=actual_date_given,
-                actual_date_given=actual_date_given,
-                status="done",
-                notes=notes,
-                given_by=given_by,
-                batch_number=batch_number
-            )
-            db.session.add(ve)
+        inserted, skipped, missing = record_vaccinations(
+            goat_ids, vaccine_type_id, actual_date_given, session.get("username"),
+            notes=notes, given_by=given_by, batch_number=batch_number,
+        )
         db.session.commit()
-        flash(f"Vaccination recorded for {len(goat_ids)} goats.", "success")
+        message = f"Vaccination recorded for {inserted} goats."
+        if skipped:
+            message += f" {skipped} skipped (already recorded for that date)."
+        if missing:
+            message += f" {missing} not found."
+        flash(message, "success")
         return redirect(url_for("vaccine.batch_vaccine_entry"))
 
     return render_template(
@@ -0,0 +1,126 @@
+"""
+Set-based writes for the batch entry screens.
+
+Quick entry and batch vaccination record the same thing for hundreds of goats
+at once. These helpers do it in a few statements per ``IN_CLAUSE_LIMIT`` goats
+instead of a lookup and an ORM add per animal: weights are bulk INSERTed and
+copied to ``Goat.weight`` with one ``UPDATE ... CASE``, vaccinations are one
+``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` that skips duplicates in
+SQL, and pregnancy marks are one ``UPDATE`` that only touches goats whose
+mark changes. Each returns accurate counts, logs the activity feed entries
+the ORM hook would have, stamps the goat field clocks and passes the goats it
+wrote to ``touch_goats``. Callers commit.
+"""
+from datetime import datetime
+from sqlalchemy import and_, case, exists, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .activity import record_activities
+from .extensions import db
+from .field_clocks import stamp_goat_fields
+from .hooks import touch_goats
+from .models import Goat, VaccinationEvent, VaccineType, WeightLog
+from .utils import IN_CLAUSE_LIMIT
+
+def _chunks(items):
+    items = list(items)
+    for i in range(0, len(items), IN_CLAUSE_LIMIT):
+        yield items[i:i + IN_CLAUSE_LIMIT]
+
+def record_weights(entries, username):
+    """
+    Log ``[(goat_id, date, weight)]`` and make each weight the goat's current
+    one. Returns the number of weight logs written.
+    """
+    entries = [(int(goat_id), day, float(weight)) for goat_id, day, weight in entries]
+    if not entries:
+        return 0
+    now = datetime.utcnow()
+    db.session.execute(insert(WeightLog), [
+        dict(goat_id=goat_id, date=day, weight=weight, created_by=username, created_at=now)
+        for goat_id, day, weight in entries
+    ])
+    latest = {goat_id: weight for goat_id, _, weight in entries}
+    for chunk in _chunks(latest):
+        db.session.execute(
+            update(Goat).where(Goat.id.in_(chunk))
+            .values(weight=case({goat_id: latest[goat_id] for goat_id in chunk}, value=Goat.id))
+            .execution_options(synchronize_session="fetch")
+        )
+    record_activities("weight", "Weight Update: {tag}",
+                      [(goat_id, f"New weight: {weight}kg") for goat_id, _, weight in entries], username)
+    stamp_goat_fields(latest, ["weight"])
+    touch_goats(latest)
+    return len(entries)
+
+def record_vaccinations(goat_ids, vaccine_type_id, date_given, username,
+                        notes="", given_by=None, batch_number=None):
+    """
+    Record a given dose of ``vaccine_type_id`` for every goat in ``goat_ids``.
+    Goats that already have this vaccine given or scheduled on ``date_given``
+    (the ``uix_1`` constraint) are skipped; ids with no goat are missing.
+    Returns ``(inserted, skipped, missing)``.
+    """
+    goat_ids = {int(goat_id) for goat_id in goat_ids}
+    now = datetime.utcnow()
+    inserted = []
+    found = 0
+    for chunk in _chunks(goat_ids):
+        found += db.session.scalar(select(func.count()).where(Goat.id.in_(chunk)))
+        already_given = exists().where(
+            VaccinationEvent.goat_id == Goat.id,
+            VaccinationEvent.vaccine_type_id == vaccine_type_id,
+            VaccinationEvent.actual_date_given == date_given,
+        )
+        rows = select(
+            Goat.id,
+            literal(vaccine_type_id),
+            literal(date_given, VaccinationEvent.scheduled_date.type),
+            literal(date_given, VaccinationEvent.actual_date_given.type),
+            literal("done"),
+            literal(notes, VaccinationEvent.notes.type),
+            literal(given_by or username, VaccinationEvent.given_by.type),
+            literal(batch_number, VaccinationEvent.batch_number.type),
+            literal(username, VaccinationEvent.created_by.type),
+            literal(now, VaccinationEvent.created_at.type),
+        ).where(Goat.id.in_(chunk), ~already_given)
+        inserted += db.session.execute(
+            sqlite_insert(VaccinationEvent).from_select(
+                ["goat_id", "vaccine_type_id", "scheduled_date", "actual_date_given", "status",
+                 "notes", "given_by", "batch_number", "created_by", "created_at"],
+                rows,
+            )
+            .on_conflict_do_nothing(index_elements=["goat_id", "vaccine_type_id", "scheduled_date"])
+            .returning(VaccinationEvent.goat_id)
+        ).scalars().all()
+
+    if inserted:
+        vaccine_type = db.session.get(VaccineType, vaccine_type_id)
+        name = vaccine_type.name if vaccine_type else "Vaccine"
+        record_activities("vaccination", "Vaccination: {tag}",
+                          [(goat_id, f"{name} given") for goat_id in inserted], username)
+        touch_goats(inserted)
+    return len(inserted), found - len(inserted), len(goat_ids) - found
+
+def set_pregnancy(goat_ids, pregnant_ids):
+    """
+    Mark the goats in ``pregnant_ids`` pregnant and the rest of ``goat_ids``
+    not pregnant. Returns the number of goats whose mark changed.
+    """
+    pregnant_ids = {int(goat_id) for goat_id in pregnant_ids}
+    changed = []
+    for chunk in _chunks({int(goat_id) for goat_id in goat_ids}):
+        pregnant = Goat.id.in_([goat_id for goat_id in chunk if goat_id in pregnant_ids])
+        changed += db.session.execute(
+            update(Goat)
+            .where(Goat.id.in_(chunk), or_(
+                Goat.is_pregnant == None,
+                and_(pregnant, Goat.is_pregnant == False),
+                and_(~pregnant, Goat.is_pregnant == True),
+            ))
+            .values(is_pregnant=case((pregnant, True), else_=False))
+            .returning(Goat.id)
+            .execution_options(synchronize_session="fetch")
+        ).scalars().all()
+    stamp_goat_fields(changed, ["is_pregnant"])
+    touch_goats(changed)
+    return len(changed)
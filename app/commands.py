@@ -0,0 +1,84 @@
+import click
+from .extensions import db
+
+def register_commands(app):
+
+    @app.cli.command("refresh-goat-flags")
+    def refresh_goat_flags_command():
+        """Recompute materialized goat status flags. Schedule nightly (cron)."""
+        from .flags import refresh_goat_flags
+        count = refresh_goat_flags()
+        db.session.commit()
+        click.echo(f"Refreshed status flags for {count} goats.")
+
+    @app.cli.command("refresh-vaccine-due")
+    def refresh_vaccine_due_command():
+        """Rebuild the vaccine schedule projection. Schedule nightly (cron)."""
+        from .vaccine_due import refresh_vaccine_due
+        count = refresh_vaccine_due()
+        db.session.commit()
+        click.echo(f"Rebuilt {count} vaccine due entries.")
+
+    @app.cli.command("snapshot-herd")
+    @click.option("--rebuild", is_flag=True, help="Discard recorded days and reconstruct the whole history.")
+    def snapshot_herd_command(rebuild):
+        """Record the daily herd size history up to yesterday. Schedule nightly (cron)."""
+        from .herd_history import clear_herd_snapshots, record_herd_snapshots
+        if rebuild:
+            clear_herd_snapshots()
+        days = record_herd_snapshots()
+        db.session.commit()
+        click.echo(f"Recorded herd size for {days} days.")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Refill the full-text search index from goats, sickness, feedback and removals."""
+        from .search import rebuild_search_index
+        count = rebuild_search_index()
+        db.session.commit()
+        click.echo(f"Indexed {count} search entries.")
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        """Fail if a hot query shape falls back to a full table scan (SQLite only)."""
+        from .query_plans import find_full_scans
+        if db.engine.dialect.name != "sqlite":
+            click.echo("Query plan check only runs against SQLite; skipped.")
+            return
+        failures = find_full_scans()
+        for label, plan in failures:
+            click.echo(f"FULL SCAN: {label}")
+            for line in plan:
+                click.echo(f"    {line}")
+        if failures:
+            raise click.ClickException(f"{len(failures)} query shape(s) fall back to a full scan.")
+        click.echo("All query shapes use an index.")
+
+    @app.cli.command("build-precache")
+    def build_precache_command():
+        """Write the service worker precache manifest. Run after changing files in static/."""
+        from .precache import write_precache_manifest
+        manifest = write_precache_manifest(app.static_folder, app.static_url_path)
+        click.echo(f"Precache version {manifest['version']}: {len(manifest['files'])} files.")
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprint and pre-compress static assets, then rebuild the precache manifest."""
+        from .assets import build_assets
+        from .precache import write_precache_manifest
+        assets = build_assets(app.static_folder)
+        click.echo(f"Built {len(assets)} assets into {app.static_url_path}/dist.")
+        manifest = write_precache_manifest(app.static_folder, app.static_url_path)
+        click.echo(f"Precache version {manifest['version']}: {len(manifest['files'])} files.")
+
+    @app.cli.command("build-photo-variants")
+    def build_photo_variants_command():
+        """Make thumbnail/WebP variants for uploaded photos that don't have them (needs Pillow)."""
+        from .photos import build_photo_variants, missing_variants
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise click.ClickException("Photo variants need the Pillow package: pip install Pillow")
+        photos = missing_variants()
+        built = sum(build_photo_variants(model, photo_id) for model, photo_id in photos)
+        click.echo(f"Built variants for {built} of {len(photos)} photos.")
@@ -0,0 +1,57 @@
+"""
+Request-scoped current user.
+
+``get_current_user()`` resolves the logged-in user once per request and keeps
+it on ``flask.g`` for the status check, the permission decorators, templates
+and routes. Across requests a detached snapshot is cached per username for a
+few seconds; routes that change a user's status, permissions, profile or
+password call ``invalidate_user`` so the change applies on the next request.
+"""
+import time
+from flask import g, session
+from .models import User
+
+# Seconds a user snapshot may be served without re-reading the users table.
+USER_CACHE_TTL = 30
+
+_user_cache = {}  # username -> (expires_at, CurrentUser)
+
+class CurrentUser:
+    """Read-only copy of a ``User`` row with its permissions pre-split."""
+
+    __slots__ = ("id", "username", "full_name", "email", "phone", "role", "status",
+                 "permissions", "must_change_password", "permission_set")
+
+    def __init__(self, user):
+        for attr in self.__slots__[:-1]:
+            setattr(self, attr, getattr(user, attr))
+        self.permission_set = frozenset(p for p in (user.permissions or "").split(",") if p)
+
+    def has_permission(self, perm):
+        return self.role == "superadmin" or perm in self.permission_set
+
+def _load(username):
+    now = time.monotonic()
+    cached = _user_cache.get(username)
+    if cached and cached[0] > now:
+        return cached[1]
+    user = User.query.filter_by(username=username).first()
+    snapshot = CurrentUser(user) if user else None
+    if snapshot:
+        _user_cache[username] = (now + USER_CACHE_TTL, snapshot)
+    return snapshot
+
+def get_current_user():
+    """The logged-in user for this request, or ``None``; loaded at most once."""
+    if "current_user" not in g:
+        username = session.get("username")
+        g.current_user = _load(username) if username else None
+    return g.current_user
+
+def invalidate_user(username=None):
+    """Drop the cached snapshot for ``username`` (every user when None)."""
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username, None)
+    g.pop("current_user", None)
@@ -0,0 +1,133 @@
+"""
+Dashboard snapshot cache.
+
+The dashboard's headline ``stats`` and ``upcoming_events`` are stored in
+``DashboardSnapshot`` rows and served from there. Any commit that touches goat
+data (see ``app.hooks``) marks the pieces stale, and every piece expires at
+midnight because ages, flags and due windows move with the date. A stale or
+expired piece is rebuilt by the next dashboard request.
+"""
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from .extensions import db
+from .flags import ensure_flags_current
+from .herd_history import herd_total_on
+from .hooks import on_goats_changed
+from .models import Goat, BreedingEvent, VaccineDue, DashboardSnapshot
+from .vaccine_due import active_vaccine_due
+
+def _build_stats():
+    ensure_flags_current()
+    active = Goat.status == "active"
+    total_goats, sick, underweight, ready, pregnant = db.session.query(
+        func.count(Goat.id),
+        func.count(Goat.id).filter(Goat.is_sick == True),
+        func.count(Goat.id).filter(Goat.is_underweight == True),
+        func.count(Goat.id).filter(Goat.is_ready_to_mate == True),
+        func.count(Goat.id).filter(Goat.is_pregnant == True),
+    ).filter(active).one()
+
+    total_last_month = herd_total_on(datetime.now().date() - timedelta(days=30))
+    total_change = round(((total_goats - total_last_month) / total_last_month * 100), 1) if total_last_month > 0 else 0
+
+    due_vaccines = active_vaccine_due().filter(
+        VaccineDue.next_due != None,
+        VaccineDue.next_due <= datetime.now().date() + timedelta(days=30)
+    ).count()
+
+    return {
+        "total_goats": total_goats,
+        "total_change": total_change,
+        "sick_count": sick,
+        "underweight_count": underweight,
+        "ready_to_mate_count": ready,
+        "pregnant_count": pregnant,
+        "due_vaccines": due_vaccines,
+    }
+
+def _build_upcoming_events():
+    upcoming_events = []
+
+    # Earliest three vaccinations due (overdue ones first)
+    for d in active_vaccine_due().filter(VaccineDue.next_due != None).limit(3):
+        upcoming_events.append({
+            "month": d.next_due.strftime("%b"),
+            "day": d.next_due.strftime("%d"),
+            "title": f"Vaccination Due: {d.goat.tag}",
+            "description": f"{d.vaccine_type.name}"
+        })
+
+    breeding_events = BreedingEvent.query.filter(
+        BreedingEvent.status == "scheduled"
+    ).order_by(BreedingEvent.mating_start_date).limit(3).all()
+    for event in breeding_events:
+        upcoming_events.append({
+            "month": event.mating_start_date.strftime("%b"),
+            "day": event.mating_start_date.strftime("%d"),
+            "title": "Breeding Event",
+            "description": f"Buck: {event.buck.tag}, Doe: {event.doe.tag}"
+        })
+    return upcoming_events
+
+_BUILDERS = {
+    "stats": _build_stats,
+    "upcoming_events": _build_upcoming_events,
+}
+
+def get_dashboard_snapshot():
+    """
+    Return ``(payloads, computed_at)`` where ``payloads`` maps piece name to
+    its data and ``computed_at`` is when the oldest piece was built.
+    """
+    now = datetime.now()
+    snapshots = {s.key: s for s in DashboardSnapshot.query.all()}
+    payloads, computed = {}, []
+    rebuilt = False
+
+    for key, build in _BUILDERS.items():
+        snap = snapshots.get(key)
+        if snap and not snap.stale and snap.expires_at and snap.expires_at > now:
+            payloads[key] = snap.payload
+            computed.append(snap.computed_at)
+            continue
+
+        # Remember the version before building: if a write marks the piece
+        # stale meanwhile, the conditional update below won't overwrite it.
+        version = snap.version if snap else None
+        payloads[key] = build()
+        computed.append(now)
+        values = dict(
+            payload=payloads[key],
+            computed_at=now,
+            expires_at=datetime.combine(now.date() + timedelta(days=1), time.min),
+            stale=False,
+        )
+        if version is None:
+            db.session.add(DashboardSnapshot(key=key, version=0, **values))
+        else:
+            db.session.execute(
+                update(DashboardSnapshot)
+                .where(DashboardSnapshot.key == key, DashboardSnapshot.version == version)
+                .values(**values)
+            )
+        rebuilt = True
+
+    if rebuilt:
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request stored the first snapshot at the same time.
+            db.session.rollback()
+    return payloads, min(computed)
+
+def mark_dashboard_stale(session=None):
+    """Flag every snapshot piece for rebuild on the next dashboard view."""
+    session = session or db.session
+    session.execute(
+        update(DashboardSnapshot).values(stale=True, version=DashboardSnapshot.version + 1)
+    )
+
+@on_goats_changed
+def _mark_stale(session, goat_ids):
+    mark_dashboard_stale(session)
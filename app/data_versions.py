@@ -0,0 +1,118 @@
+"""
+Data versions for conditional page responses.
+
+Every commit that touches a goat (see ``app.hooks``), its feedback or photos
+bumps that goat's ``data_version`` and the herd-wide "herd" counter. Changes
+to goat types, vaccine types and target weights bump "reference" and "herd".
+Pages derive a strong ETag from the versions they render plus the viewer and
+the date, so a repeat ``If-None-Match`` is answered with 304 before any
+template work.
+"""
+import hashlib
+from datetime import datetime
+from flask import make_response, request, session
+from sqlalchemy import event, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .current_user import get_current_user
+from .extensions import db
+from .hooks import on_goats_changed, touch_goats, DERIVED_GOAT_COLUMNS
+from .models import (DataVersion, Goat, GoatType, VaccineType, TargetWeight,
+                     GoatFeedback, GoatFeedbackPhoto, SicknessPhoto)
+from .utils import IN_CLAUSE_LIMIT
+
+DERIVED_GOAT_COLUMNS.update(["data_version", "data_updated_at"])
+
+# Models every goat page depends on
+REFERENCE_MODELS = (GoatType, VaccineType, TargetWeight)
+
+_REFERENCE_KEY = "reference_data_changed"
+
+def bump_version(key, session=None):
+    """Increment the ``key`` counter in the current transaction."""
+    session = session or db.session
+    now = datetime.now()
+    session.execute(
+        sqlite_insert(DataVersion).values(key=key, version=1, updated_at=now)
+        .on_conflict_do_update(
+            index_elements=[DataVersion.key],
+            set_=dict(version=DataVersion.version + 1, updated_at=now),
+        )
+    )
+
+def get_versions(*keys):
+    """``{key: (version, updated_at)}``; keys never bumped read as ``(0, None)``."""
+    rows = DataVersion.query.filter(DataVersion.key.in_(keys)).all()
+    versions = {key: (0, None) for key in keys}
+    versions.update({row.key: (row.version, row.updated_at) for row in rows})
+    return versions
+
+# --- Write tracking ---
+
+def _collect(session, flush_context):
+    goat_ids = set()
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, REFERENCE_MODELS):
+                session.info[_REFERENCE_KEY] = True
+            elif isinstance(obj, GoatFeedback):
+                goat_ids.add(obj.goat_id)
+            elif isinstance(obj, GoatFeedbackPhoto) and obj.feedback:
+                goat_ids.add(obj.feedback.goat_id)
+            elif isinstance(obj, SicknessPhoto) and obj.sickness:
+                goat_ids.add(obj.sickness.goat_id)
+    if goat_ids:
+        touch_goats(goat_ids, session)
+
+@on_goats_changed
+def _bump_goats(session, goat_ids):
+    goat_ids = list(goat_ids)
+    now = datetime.now()
+    for i in range(0, len(goat_ids), IN_CLAUSE_LIMIT):
+        session.execute(
+            update(Goat).where(Goat.id.in_(goat_ids[i:i + IN_CLAUSE_LIMIT]))
+            .values(data_version=Goat.data_version + 1, data_updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    bump_version("herd", session)
+
+def _before_commit(session):
+    session.flush()
+    if session.info.pop(_REFERENCE_KEY, False):
+        bump_version("reference", session)
+        bump_version("herd", session)
+
+def _forget(session, *args):
+    session.info.pop(_REFERENCE_KEY, None)
+
+def init_data_versions(db):
+    event.listen(db.session, "after_flush", _collect)
+    event.listen(db.session, "before_commit", _before_commit)
+    event.listen(db.session, "after_rollback", _forget)
+
+# --- Conditional responses ---
+
+def page_etag(*parts):
+    """Strong ETag for the current page built from ``parts`` (data versions)."""
+    user = get_current_user()
+    viewer = (session.get("username"), session.get("role"),
+              sorted(user.permission_set) if user else None)
+    raw = repr((parts, viewer, datetime.now().date().isoformat(), request.full_path))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ``etag``/``last_modified`` and make the browser revalidate every time."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def not_modified(etag, last_modified=None):
+    """
+    A 304 response if the client already holds ``etag``, else None. Never
+    304 while a flash message is waiting to be shown.
+    """
+    if session.get("_flashes") or not request.if_none_match.contains(etag):
+        return None
+    return set_validators(make_response("", 304), etag, last_modified)
@@ -0,0 +1,86 @@
+"""
+Streaming CSV exports.
+
+``csv_response`` writes rows through a generator response a chunk at a time,
+so an export never holds the whole file in memory. ``batched`` walks a query
+with ``yield_per`` server-side batching and hands out lists small enough for
+one IN (...) clause; derived columns (age, tags, target weight, history
+counts) are computed per batch in a few set-based queries.
+"""
+import csv
+import io
+from datetime import datetime
+from flask import Response, stream_with_context
+from .goat_filters import goat_age_months
+from .utils import IN_CLAUSE_LIMIT, get_herd_tags, get_target_weights
+
+# Rows written before a chunk is sent
+ROWS_PER_CHUNK = 200
+
+def csv_response(filename, header, rows):
+    """Stream ``header`` then every row of the ``rows`` iterable as a CSV download."""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+def batched(query, size=IN_CLAUSE_LIMIT):
+    """Yield lists of up to ``size`` rows of ``query``, fetched ``size`` at a time."""
+    batch = []
+    for row in query.yield_per(size):
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# --- Goat exports ---
+
+def _tags(goat, facts):
+    return "; ".join(facts["tags"])
+
+# Column key -> (header, value getter(goat, derived facts)); the facts each
+# getter needs are listed in GOAT_EXPORT_FACTS so unused ones aren't computed.
+GOAT_EXPORT_COLUMNS = {
+    "tag": ("Tag", lambda g, f: g.tag),
+    "type": ("Type", lambda g, f: g.goat_type.name if g.goat_type else "-"),
+    "sex": ("Sex", lambda g, f: g.sex),
+    "age": ("Age (months)", lambda g, f: f["age"] or "-"),
+    "weight": ("Weight (kg)", lambda g, f: g.weight or "-"),
+    "location": ("Location", lambda g, f: g.location or "-"),
+    "status": ("Status", lambda g, f: g.status),
+    "notes": ("Notes", lambda g, f: g.notes or "-"),
+    "tags": ("Tags", _tags),
+    "target_weight": ("Target Weight (kg)", lambda g, f: f["target"] or "-"),
+}
+GOAT_EXPORT_FACTS = {"age": "age", "tags": "tags", "target_weight": "target"}
+
+def goat_export_rows(query, columns):
+    """CSV rows for the goats of ``query`` with the given GOAT_EXPORT_COLUMNS keys."""
+    needed = {GOAT_EXPORT_FACTS[c] for c in columns if c in GOAT_EXPORT_FACTS}
+    getters = [GOAT_EXPORT_COLUMNS[c][1] for c in columns]
+    today = datetime.now().date()
+    for goats in batched(query):
+        tags = get_herd_tags(goats) if "tags" in needed else {}
+        targets = get_target_weights(goats) if "target" in needed else {}
+        for goat in goats:
+            facts = {
+                "age": goat_age_months(goat, today) if "age" in needed else None,
+                "tags": tags.get(goat.id, []),
+                "target": targets.get(goat.id),
+            }
+            yield [get(goat, facts) for get in getters]
@@ -0,0 +1,82 @@
+"""
+Per-field write clocks for goats.
+
+``GoatFieldClock`` records when each of ``SYNCED_GOAT_FIELDS`` was last
+written for a goat. ORM writes, including new goats, are stamped
+automatically at commit; bulk Core writes stamp explicitly with
+``stamp_goat_fields``. Offline edits
+replayed by ``app.sync`` compare their client timestamp against these
+clocks so the latest writer wins field by field.
+"""
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .extensions import db
+from .models import Goat, GoatFieldClock
+from .utils import IN_CLAUSE_LIMIT
+
+# Goat columns offline clients may write
+SYNCED_GOAT_FIELDS = ("weight", "location", "notes", "is_pregnant")
+
+_STAMPS_KEY = "goat_field_stamps"
+
+def stamp_goat_fields(goat_ids, fields, at=None, session=None):
+    """Record that ``fields`` of ``goat_ids`` were written at ``at`` (UTC, default now); saved at commit."""
+    session = session or db.session()
+    at = at or datetime.utcnow()
+    stamps = session.info.setdefault(_STAMPS_KEY, {})
+    for goat_id in goat_ids:
+        for field in fields:
+            stamps[(goat_id, field)] = at
+
+def goat_field_clocks(goat_ids):
+    """``{(goat_id, field): updated_at}`` for the given goats, including stamps not yet committed."""
+    goat_ids = list(goat_ids)
+    clocks = {}
+    for i in range(0, len(goat_ids), IN_CLAUSE_LIMIT):
+        rows = GoatFieldClock.query.filter(GoatFieldClock.goat_id.in_(goat_ids[i:i + IN_CLAUSE_LIMIT]))
+        clocks.update({(row.goat_id, row.field): row.updated_at for row in rows})
+    wanted = set(goat_ids)
+    for (goat_id, field), at in db.session.info.get(_STAMPS_KEY, {}).items():
+        if goat_id in wanted:
+            clocks[(goat_id, field)] = max(at, clocks.get((goat_id, field), at))
+    return clocks
+
+def _collect(session, flush_context):
+    # Explicit stamps (e.g. a replayed edit's client time) take precedence
+    stamps = session.info.setdefault(_STAMPS_KEY, {})
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, Goat):
+            for field in SYNCED_GOAT_FIELDS:
+                stamps.setdefault((obj.id, field), now)
+    for obj in session.dirty:
+        if not isinstance(obj, Goat):
+            continue
+        state = inspect(obj)
+        for field in SYNCED_GOAT_FIELDS:
+            if state.attrs[field].history.has_changes():
+                stamps.setdefault((obj.id, field), now)
+
+def _before_commit(session):
+    session.flush()
+    stamps = session.info.pop(_STAMPS_KEY, None)
+    if not stamps:
+        return
+    rows = [dict(goat_id=goat_id, field=field, updated_at=at) for (goat_id, field), at in stamps.items()]
+    stmt = sqlite_insert(GoatFieldClock)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[GoatFieldClock.goat_id, GoatFieldClock.field],
+            set_=dict(updated_at=stmt.excluded.updated_at),
+        ),
+        rows,
+    )
+
+def _forget(session, *args):
+    session.info.pop(_STAMPS_KEY, None)
+
+def init_field_clocks(db):
+    event.listen(db.session, "after_flush", _collect)
+    event.listen(db.session, "before_commit", _before_commit)
+    event.listen(db.session, "after_rollback", _forget)
@@ -0,0 +1,71 @@
+"""
+Materialized goat status flags.
+
+The tags from ``get_herd_tags`` are stored as indexed boolean columns on
+``Goat`` so list filters can run as a plain SQL ``WHERE``. Flags are refreshed
+for the affected goats on every commit (see ``app.hooks``) and for the whole
+herd once a day, because age-based tags change without any write.
+"""
+from datetime import datetime
+from sqlalchemy import or_
+from .extensions import db
+from .hooks import on_goats_changed, DERIVED_GOAT_COLUMNS
+from .models import Goat
+from .utils import get_herd_tags, IN_CLAUSE_LIMIT
+
+# Tag name -> Goat column holding it. "pregnant" is the manual mark itself.
+TAG_FLAG_COLUMNS = {
+    "pregnant": "is_pregnant",
+    "underweight": "is_underweight",
+    "sick": "is_sick",
+    "ready to mate": "is_ready_to_mate",
+    "old": "is_old",
+    "new arrival": "is_new_arrival",
+    "new born": "is_new_born",
+    "matured": "is_matured",
+}
+
+DERIVED_GOAT_COLUMNS.update(
+    [col for tag, col in TAG_FLAG_COLUMNS.items() if tag != "pregnant"] + ["flags_refreshed_on"]
+)
+
+def tag_filter(tags):
+    """SQL clause matching goats that carry any of ``tags``."""
+    columns = [getattr(Goat, TAG_FLAG_COLUMNS[t]) for t in tags if t in TAG_FLAG_COLUMNS]
+    if not columns:
+        return Goat.id == None
+    return or_(*(col == True for col in columns))
+
+def refresh_goat_flags(goat_ids=None):
+    """Recompute flags for ``goat_ids`` (all goats when None). Caller commits."""
+    if goat_ids is None:
+        goats = Goat.query.all()
+    else:
+        goat_ids = list(goat_ids)
+        goats = []
+        for i in range(0, len(goat_ids), IN_CLAUSE_LIMIT):
+            goats += Goat.query.filter(Goat.id.in_(goat_ids[i:i + IN_CLAUSE_LIMIT])).all()
+
+    today = datetime.now().date()
+    herd_tags = get_herd_tags(goats)
+    for goat in goats:
+        tags = herd_tags[goat.id]
+        for tag, column in TAG_FLAG_COLUMNS.items():
+            if tag != "pregnant":
+                setattr(goat, column, tag in tags)
+        goat.flags_refreshed_on = today
+    return len(goats)
+
+def ensure_flags_current():
+    """Refresh the whole herd if the nightly job hasn't run yet today."""
+    today = datetime.now().date()
+    stale = db.session.query(Goat.id).filter(
+        or_(Goat.flags_refreshed_on == None, Goat.flags_refreshed_on < today)
+    ).first()
+    if stale:
+        refresh_goat_flags()
+        db.session.commit()
+
+@on_goats_changed
+def _refresh_touched(session, goat_ids):
+    refresh_goat_flags(goat_ids)
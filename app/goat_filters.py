@@ -0,0 +1,128 @@
+"""
+Goat list filter vocabulary.
+
+``filter_goats`` turns the query-string parameters understood by the goat
+list (``status``, ``tags``, ``smart_filter``, ``location``, ``search``,
+``age_min``/``age_max``, ``weight_min``/``weight_max``, ``type``, ``sex``,
+``acquired_start``/``acquired_end``, ``dob_start``/``dob_end``) into one SQL
+query, so the HTML list and the JSON API filter the same way.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from .flags import tag_filter, ensure_flags_current
+from .models import Goat
+from .search import fts_query, matching_ids
+from .utils import parse_date
+
+# Days per month used for displayed ages
+AGE_MONTH_DAYS = 30.44
+# Age filter bounds are clamped to this range (months)
+MAX_AGE_MONTHS = 600
+
+# smart_filter value -> tags it selects
+SMART_FILTERS = {
+    "need_attention": ["sick", "underweight"],
+    "ready_mate": ["ready to mate"],
+    "pregnant": ["pregnant"],
+    "new_arrivals": ["new arrival"],
+    "underweight": ["underweight"],
+}
+
+def age_months(age_days):
+    return round(age_days / AGE_MONTH_DAYS, 1)
+
+def goat_age_months(goat, today):
+    """Displayed age in months: from ``dob`` when known, else the estimate."""
+    if goat.dob:
+        return age_months((today - goat.dob).days)
+    return goat.age_estimate_months or None
+
+def age_filter(age_min=None, age_max=None):
+    """
+    SQL clause matching goats whose displayed age in months is within
+    [age_min, age_max]: from ``dob`` when known, else the estimate. Bounds
+    are clamped to 0..MAX_AGE_MONTHS.
+    """
+    today = datetime.now().date()
+    by_dob, by_estimate = [Goat.dob != None], [
+        Goat.dob == None, Goat.age_estimate_months != None, Goat.age_estimate_months != 0
+    ]
+    if age_min is not None:
+        age_min = min(max(age_min, 0), MAX_AGE_MONTHS)
+        # Fewest days whose rounded age reaches age_min
+        days = int((age_min - 0.1) * AGE_MONTH_DAYS)
+        while age_months(days) < age_min:
+            days += 1
+        by_dob.append(Goat.dob <= today - timedelta(days=days))
+        by_estimate.append(Goat.age_estimate_months >= age_min)
+    if age_max is not None:
+        age_max = min(max(age_max, 0), MAX_AGE_MONTHS)
+        # Most days whose rounded age stays within age_max
+        days = int((age_max + 0.1) * AGE_MONTH_DAYS) + 1
+        while age_months(days) > age_max:
+            days -= 1
+        by_dob.append(Goat.dob >= today - timedelta(days=days))
+        by_estimate.append(Goat.age_estimate_months <= age_max)
+    return or_(and_(*by_dob), and_(*by_estimate))
+
+def _date_arg(args, key, invalid):
+    try:
+        return parse_date(args.get(key))
+    except ValueError:
+        if invalid is None:
+            raise ValueError(f"{key} must be a YYYY-MM-DD date.") from None
+        invalid.append(key)
+        return None
+
+def filter_goats(args, invalid=None):
+    """
+    Goat query filtered by the list parameters in ``args`` (a request
+    ``MultiDict``). Returns ``(query, selected_tags)``; a smart filter
+    replaces the tags it was given.
+
+    An unparseable date parameter raises ValueError, unless ``invalid`` is
+    a list: then the parameter is ignored and its name appended to it.
+    """
+    selected_tags = SMART_FILTERS.get(args.get("smart_filter"), args.getlist("tags"))
+    status_filter = args.get("status", "active")
+    search_query = args.get("search", "").strip()
+    age_min = args.get("age_min", type=int)
+    age_max = args.get("age_max", type=int)
+    weight_min = args.get("weight_min", type=float)
+    weight_max = args.get("weight_max", type=float)
+    goat_type_id = args.get("type", type=int)
+    acquired_start = _date_arg(args, "acquired_start", invalid)
+    acquired_end = _date_arg(args, "acquired_end", invalid)
+    dob_start = _date_arg(args, "dob_start", invalid)
+    dob_end = _date_arg(args, "dob_end", invalid)
+
+    # Tag filters run against the materialized status flags
+    ensure_flags_current()
+    query = Goat.query
+    if status_filter not in ("all", ""):
+        query = query.filter_by(status=status_filter)
+    if selected_tags:
+        query = query.filter(tag_filter(selected_tags))
+    if args.get("location"):
+        query = query.filter(Goat.location == args.get("location"))
+    if search_query and fts_query(search_query):
+        query = query.filter(Goat.id.in_(matching_ids("goat", search_query)))
+    if age_min is not None or age_max is not None:
+        query = query.filter(age_filter(age_min, age_max))
+    if weight_min is not None:
+        query = query.filter(Goat.weight >= weight_min)
+    if weight_max is not None:
+        query = query.filter(Goat.weight <= weight_max)
+    if goat_type_id:
+        query = query.filter(Goat.goat_type_id == goat_type_id)
+    if args.get("sex"):
+        query = query.filter(Goat.sex == args.get("sex"))
+    if acquired_start:
+        query = query.filter(Goat.date_acquired >= acquired_start)
+    if acquired_end:
+        query = query.filter(Goat.date_acquired <= acquired_end)
+    if dob_start:
+        query = query.filter(Goat.dob >= dob_start)
+    if dob_end:
+        query = query.filter(Goat.dob <= dob_end)
+    return query, selected_tags
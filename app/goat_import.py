@@ -0,0 +1,231 @@
+"""
+Bulk goat import from CSV or XLSX.
+
+``import_goats`` reads the uploaded sheet row by row and validates it in
+batches of ``IN_CLAUSE_LIMIT`` rows: goat type (name or id), sex, acquisition
+method, tag uniqueness against the herd and the rest of the file, and the
+Born/Purchased date rules of the Add Goat form. Valid batches are written
+with bulk INSERTs (goats, then an initial ``WeightLog`` for every goat with a
+weight) inside one transaction, and the import is all-or-nothing: any row
+error, or a dry run, rolls the whole file back. Bulk inserts bypass the ORM,
+so the new goats are passed to ``touch_goats`` for the derived-data hooks and
+their weight logs to ``record_activities`` for the activity feed.
+
+XLSX files need ``openpyxl`` (in requirements.txt); without it only CSV is
+accepted.
+"""
+import csv
+import io
+import os
+from datetime import date, datetime
+from zipfile import BadZipFile
+from sqlalchemy import insert
+from .activity import record_activities
+from .extensions import db
+from .field_clocks import SYNCED_GOAT_FIELDS, stamp_goat_fields
+from .hooks import touch_goats
+from .models import Goat, GoatType, WeightLog
+from .utils import IN_CLAUSE_LIMIT, parse_date
+
+# Column -> required; headers are matched case-insensitively, spaces as "_"
+IMPORT_COLUMNS = {
+    "tag": True,
+    "type": True,
+    "sex": True,
+    "acquisition_method": True,
+    "date_acquired": False,
+    "dob": False,
+    "age_estimate_months": False,
+    "weight": False,
+    "source_name": False,
+    "purchase_price": False,
+    "location": False,
+    "notes": False,
+}
+SEXES = ("Male", "Female", "Unknown")
+ACQUISITION_METHODS = ("Born", "Purchased", "Donated", "Other")
+
+class ImportFileError(ValueError):
+    """The upload can't be read as a goat sheet at all."""
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (date, datetime)):
+        return value
+    return str(value).strip()
+
+def _header(names):
+    columns = [str(name or "").strip().lower().replace(" ", "_") for name in names]
+    missing = [c for c, required in IMPORT_COLUMNS.items() if required and c not in columns]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+    return columns
+
+def _csv_rows(stream):
+    try:
+        reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        columns = _header(next(reader, []))
+        for values in reader:
+            yield dict(zip(columns, map(_cell, values)))
+    except UnicodeDecodeError:
+        raise ImportFileError('The file is not UTF-8 text. In Excel, save it as "CSV UTF-8".')
+    except csv.Error as e:
+        raise ImportFileError(f"The CSV file can't be read: {e}")
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ImportFileError("Reading .xlsx files needs the openpyxl package; upload a CSV instead.")
+    try:
+        sheet = load_workbook(stream, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        columns = _header(next(rows, ()))
+        for values in rows:
+            yield dict(zip(columns, map(_cell, values)))
+    except ImportFileError:
+        raise
+    except (BadZipFile, InvalidFileException, KeyError, OSError, ValueError):
+        raise ImportFileError("The .xlsx file is damaged or not an Excel workbook.")
+
+def read_sheet(file_storage):
+    """Yield one ``{column: value}`` dict per data row of an uploaded CSV/XLSX file."""
+    ext = os.path.splitext(file_storage.filename or "")[1].lower()
+    if ext == ".csv":
+        return _csv_rows(file_storage.stream)
+    if ext == ".xlsx":
+        return _xlsx_rows(file_storage.stream)
+    raise ImportFileError("Upload a .csv or .xlsx file.")
+
+# --- Validation ---
+
+def _number(row, column, kind, errors):
+    value = row.get(column, "")
+    if value in ("", None):
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        errors.append(f"{column} '{value}' is not a number")
+
+def _date(row, column, errors):
+    value = row.get(column, "")
+    try:
+        return parse_date(value)
+    except (TypeError, ValueError):
+        errors.append(f"{column} '{value}' is not a YYYY-MM-DD date")
+
+def _validate(row, types, errors):
+    """Goat column values for one sheet row; problems are appended to ``errors``."""
+    tag = str(row.get("tag", ""))
+    if not tag:
+        errors.append("tag is required")
+
+    type_value = str(row.get("type", ""))
+    goat_type_id = types.get(type_value.lower())
+    if goat_type_id is None:
+        errors.append(f"unknown goat type '{type_value}'")
+
+    sex = str(row.get("sex", "")).capitalize()
+    if sex not in SEXES:
+        errors.append(f"sex must be one of {', '.join(SEXES)}")
+
+    method = str(row.get("acquisition_method", "")).capitalize()
+    if method not in ACQUISITION_METHODS:
+        errors.append(f"acquisition_method must be one of {', '.join(ACQUISITION_METHODS)}")
+
+    dob = _date(row, "dob", errors)
+    date_acquired = _date(row, "date_acquired", errors)
+    if method == "Born":
+        if not row.get("dob"):
+            errors.append("dob is required for goats born on farm")
+        date_acquired = dob
+    elif method and not row.get("date_acquired"):
+        errors.append("date_acquired is required for purchased/donated goats")
+
+    return dict(
+        tag=tag,
+        goat_type_id=goat_type_id,
+        sex=sex,
+        dob=dob,
+        date_acquired=date_acquired,
+        acquisition_method=method,
+        source_name=str(row.get("source_name", "")) or None,
+        purchase_price=_number(row, "purchase_price", float, errors),
+        age_estimate_months=_number(row, "age_estimate_months", int, errors),
+        weight=_number(row, "weight", float, errors),
+        location=str(row.get("location", "")) or None,
+        notes=str(row.get("notes", "")) or None,
+    )
+
+# --- Import ---
+
+def _insert(goats, username, today):
+    ids = db.session.execute(
+        insert(Goat).returning(Goat.id, sort_by_parameter_order=True), goats
+    ).scalars().all()
+    logs = [
+        dict(goat_id=goat_id, date=today, weight=goat["weight"], created_by=username, created_at=datetime.utcnow())
+        for goat_id, goat in zip(ids, goats) if goat["weight"] is not None
+    ]
+    if logs:
+        db.session.execute(insert(WeightLog), logs)
+        record_activities("weight", "Weight Update: {tag}",
+                          [(log["goat_id"], f"New weight: {log['weight']}kg") for log in logs], username)
+    stamp_goat_fields(ids, SYNCED_GOAT_FIELDS)
+    touch_goats(ids)
+
+def import_goats(rows, username, dry_run=False):
+    """
+    Validate and import sheet ``rows``. Returns ``dict(total, imported,
+    errors, dry_run)`` where ``errors`` is ``[(row number, tag, [messages])]``
+    with row 2 being the first data row. Commits only if every row is valid.
+    """
+    types = {}
+    for goat_type in GoatType.query.all():
+        types[goat_type.name.lower()] = goat_type.id
+        types[str(goat_type.id)] = goat_type.id
+    today = datetime.now().date()
+    seen_tags = set()
+    errors = []
+    total = 0
+
+    def flush(batch):
+        tags = [goat["tag"] for _, goat, _ in batch if goat["tag"]]
+        taken = {tag for (tag,) in db.session.query(Goat.tag).filter(Goat.tag.in_(tags))}
+        for number, goat, row_errors in batch:
+            if goat["tag"] in taken:
+                row_errors.append(f"tag {goat['tag']} is already in use")
+            if row_errors:
+                errors.append((number, goat["tag"], row_errors))
+        if not errors and not dry_run:
+            _insert([dict(goat, status="active", added_by=username) for _, goat, _ in batch], username, today)
+
+    batch = []
+    for number, row in enumerate(rows, 2):
+        if not any(value not in ("", None) for value in row.values()):
+            continue
+        total += 1
+        row_errors = []
+        goat = _validate(row, types, row_errors)
+        if goat["tag"] in seen_tags:
+            row_errors.append(f"tag {goat['tag']} appears more than once in the file")
+        seen_tags.add(goat["tag"])
+        batch.append((number, goat, row_errors))
+        if len(batch) == IN_CLAUSE_LIMIT:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if errors or dry_run:
+        db.session.rollback()
+        imported = 0
+    else:
+        db.session.commit()
+        imported = total
+    return dict(total=total, imported=imported, errors=errors, dry_run=dry_run)
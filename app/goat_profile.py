@@ -0,0 +1,92 @@
+"""
+Goat profile loader for the goat detail page.
+
+``load_goat_profile`` fetches a goat together with every relationship the
+detail template reads (type, weight logs, vaccinations and their types,
+sicknesses and their photos, feedback and its photos, matings as doe and as
+buck with the partner goat) in one query per relationship. Tags, vaccine
+status and the four history tables are then built from that preloaded data,
+so the page costs the same handful of queries however long the history is.
+"""
+from datetime import date, datetime
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy.orm import joinedload, selectinload
+from .models import Goat, Sickness, GoatFeedback, VaccinationEvent, BreedingEvent, VaccineType
+from .utils import compute_goat_tags, get_target_weights, vaccine_due_entries
+
+HISTORY_PAGE_SIZE = 10
+
+class ListPagination(Pagination):
+    """``Pagination`` over an already loaded, already sorted list (``items=``)."""
+
+    def _query_items(self):
+        start = self._query_offset
+        return self._query_args["items"][start:start + self.per_page]
+
+    def _query_count(self):
+        return len(self._query_args["items"])
+
+def _newest_first(value):
+    # Matches SQLite's ORDER BY ... DESC, which puts NULLs last
+    return (value is not None, value or date.min)
+
+def _created_first(value):
+    return (value is not None, value or datetime.min)
+
+def load_goat_profile(tag):
+    """The goat with ``tag`` and every relationship the detail page reads, or None."""
+    return Goat.query.filter_by(tag=tag).options(
+        joinedload(Goat.goat_type),
+        selectinload(Goat.weight_logs),
+        selectinload(Goat.vaccination_events).joinedload(VaccinationEvent.vaccine_type),
+        selectinload(Goat.sicknesses).selectinload(Sickness.photos),
+        selectinload(Goat.feedbacks).selectinload(GoatFeedback.photos),
+        selectinload(Goat.breedings_as_doe).joinedload(BreedingEvent.buck),
+        selectinload(Goat.breedings_as_buck).joinedload(BreedingEvent.doe),
+    ).first()
+
+def goat_profile_context(goat, args):
+    """
+    Template context for a goat loaded by ``load_goat_profile``: tags,
+    vaccine due info and the paginated histories (pages from ``args``).
+    """
+    today = datetime.now().date()
+    last_mating_end = max(
+        (b.mating_end_date for b in goat.breedings_as_doe if b.mating_end_date), default=None
+    )
+    tags = compute_goat_tags(
+        goat, today,
+        is_sick=any(s.status == "active" for s in goat.sicknesses),
+        last_mating_end=last_mating_end,
+        target=get_target_weights([goat])[goat.id],
+    )
+
+    events_by_type = {}
+    for event in goat.vaccination_events:
+        events_by_type.setdefault(event.vaccine_type_id, []).append(event)
+    vaccine_due_info = vaccine_due_entries(goat, VaccineType.query.all(), events_by_type, today)
+
+    breedings = {b.id: b for b in goat.breedings_as_doe + goat.breedings_as_buck}
+    histories = {
+        "weight_logs": ("weight_page", sorted(
+            goat.weight_logs,
+            key=lambda w: (_newest_first(w.date), _created_first(w.created_at)), reverse=True,
+        )),
+        "vaccine_events": ("vaccine_page", sorted(
+            goat.vaccination_events, key=lambda v: _newest_first(v.scheduled_date), reverse=True,
+        )),
+        "breeding_events": ("breeding_page", sorted(
+            breedings.values(), key=lambda b: _newest_first(b.mating_start_date), reverse=True,
+        )),
+        "sickness_history": ("sickness_page", sorted(
+            goat.sicknesses, key=lambda s: _created_first(s.created_at), reverse=True,
+        )),
+    }
+    context = dict(tags=tags, vaccine_due_info=vaccine_due_info,
+                   has_any_vaccine=bool(goat.vaccination_events))
+    for name, (page_arg, items) in histories.items():
+        context[name] = ListPagination(
+            page=args.get(page_arg, 1, type=int), per_page=HISTORY_PAGE_SIZE,
+            error_out=False, items=items,
+        )
+    return context
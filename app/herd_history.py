@@ -0,0 +1,107 @@
+"""
+Daily herd size history.
+
+``HerdSnapshot`` holds the number of goats at the end of each past day, split
+by type, sex, location and status, so period comparisons and trend charts read
+a few rows per day instead of counting goats. The nightly ``flask
+snapshot-herd`` job appends the days since the last snapshot; days already
+recorded are never rewritten, so a goat moved to another pen keeps its old
+location in earlier days. The first run backfills the history from
+``Goat.date_acquired`` and ``Removal.date``, taking type, sex and location
+from each goat's current record because their past values aren't kept.
+Today is always counted live.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from .extensions import db
+from .models import Goat, Removal, HerdSnapshot
+
+def _herd_history(start, end):
+    """Yield ``(day, (goat_type_id, sex, location, status), count)`` for each day in start..end."""
+    removed_on = dict(
+        db.session.query(Removal.goat_id, func.min(Removal.date))
+        .filter(Removal.date != None).group_by(Removal.goat_id)
+    )
+    deltas = defaultdict(Counter)  # day -> {key: change in count}
+    goats = db.session.query(Goat.id, Goat.goat_type_id, Goat.sex, Goat.location,
+                             Goat.status, Goat.date_acquired)
+    for goat_id, goat_type_id, sex, location, status, acquired in goats:
+        if acquired is None or acquired > end:
+            continue
+        removal = removed_on.get(goat_id)
+        # (first day, status) segments; a goat removed without a dated
+        # removal record is counted under its current status throughout.
+        if status != "active" and removal and removal > acquired:
+            segments = [(acquired, "active"), (removal, status)]
+        else:
+            segments = [(acquired, status)]
+        for i, (since, seg_status) in enumerate(segments):
+            key = (goat_type_id, sex, location, seg_status)
+            deltas[max(since, start)][key] += 1
+            if i + 1 < len(segments):
+                deltas[max(segments[i + 1][0], start)][key] -= 1
+
+    counts = Counter()
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        counts.update(deltas.get(day, {}))
+        for key, count in counts.items():
+            if count:
+                yield day, key, count
+
+def record_herd_snapshots():
+    """
+    Append the days after the last snapshot up to yesterday, or backfill from
+    the first acquisition when there are none yet. Returns the number of days
+    recorded. Caller commits.
+    """
+    last = db.session.query(func.max(HerdSnapshot.day)).scalar()
+    if last is None:
+        first = db.session.query(func.min(Goat.date_acquired)).scalar()
+    else:
+        first = last + timedelta(days=1)
+    end = datetime.now().date() - timedelta(days=1)
+    if first is None or first > end:
+        return 0
+
+    rows = [
+        dict(day=day, goat_type_id=goat_type_id, sex=sex, location=location, status=status, count=count)
+        for day, (goat_type_id, sex, location, status), count in _herd_history(first, end)
+    ]
+    if rows:
+        db.session.execute(insert(HerdSnapshot), rows)
+    return (end - first).days + 1
+
+def clear_herd_snapshots():
+    """Discard the recorded history so the next record call backfills it again. Caller commits."""
+    db.session.query(HerdSnapshot).delete(synchronize_session=False)
+
+def ensure_herd_snapshots():
+    """Append the days the nightly job missed. The first backfill is left to the job."""
+    yesterday = datetime.now().date() - timedelta(days=1)
+    last = db.session.query(func.max(HerdSnapshot.day)).scalar()
+    if last is not None and last < yesterday:
+        record_herd_snapshots()
+        db.session.commit()
+
+def herd_totals(start, end, status="active"):
+    """``{day: goat count}`` for every day in start..end (0 before the first goat)."""
+    ensure_herd_snapshots()
+    totals = {start + timedelta(days=i): 0 for i in range((end - start).days + 1)}
+    rows = db.session.query(HerdSnapshot.day, func.sum(HerdSnapshot.count)).filter(
+        HerdSnapshot.day >= start,
+        HerdSnapshot.day <= end,
+        HerdSnapshot.status == status
+    ).group_by(HerdSnapshot.day)
+    for day, total in rows:
+        totals[day] = total
+
+    today = datetime.now().date()
+    if start <= today <= end:
+        totals[today] = Goat.query.filter(Goat.status == status).count()
+    return totals
+
+def herd_total_on(day, status="active"):
+    """Goat count at the end of ``day`` (live for today)."""
+    return herd_totals(day, day, status)[day]
@@ -0,0 +1,89 @@
+"""
+Write hooks for derived goat data.
+
+Every flush records which goats the pending transaction touched (directly or
+through their sickness, weight, breeding, vaccination or removal rows). Right
+before the commit lands, the registered handlers get that set of goat ids so
+they can bring materialized data up to date inside the same transaction.
+"""
+from sqlalchemy import event, inspect
+from .models import Goat, Sickness, WeightLog, BreedingEvent, VaccinationEvent, Removal
+
+_TOUCHED_KEY = "touched_goat_ids"
+_goat_handlers = []
+
+# Goat columns maintained by the handlers themselves; changing only these
+# must not mark the goat as touched again, or every commit would loop.
+DERIVED_GOAT_COLUMNS = set()
+
+# Child tables whose rows feed goat-level derived data, and their goat FKs.
+_GOAT_KEYS = {
+    Sickness: ("goat_id",),
+    WeightLog: ("goat_id",),
+    VaccinationEvent: ("goat_id",),
+    Removal: ("goat_id",),
+    BreedingEvent: ("doe_id", "buck_id"),
+}
+
+def on_goats_changed(func):
+    """Register ``func(session, goat_ids)`` to run before a commit that touched goats."""
+    _goat_handlers.append(func)
+    return func
+
+def touch_goats(goat_ids, session=None):
+    """Mark goats as changed for writes the ORM can't see (bulk UPDATE/INSERT)."""
+    if session is None:
+        from .extensions import db
+        session = db.session()
+    session.info.setdefault(_TOUCHED_KEY, set()).update(i for i in goat_ids if i)
+
+def _goat_changed(goat):
+    state = inspect(goat)
+    for attr in state.mapper.column_attrs:
+        if attr.key in DERIVED_GOAT_COLUMNS:
+            continue
+        if state.attrs[attr.key].history.has_changes():
+            return True
+    return False
+
+def _collect(session, flush_context):
+    touched = set()
+    for obj in session.new:
+        if isinstance(obj, Goat):
+            touched.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Goat) and _goat_changed(obj):
+            touched.add(obj.id)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        keys = _GOAT_KEYS.get(type(obj))
+        if not keys:
+            continue
+        state = inspect(obj)
+        for key in keys:
+            history = state.attrs[key].history
+            touched.update(history.added or ())
+            touched.update(history.deleted or ())
+            touched.update(history.unchanged or ())
+    for obj in session.deleted:
+        if isinstance(obj, Goat):
+            touched.discard(obj.id)
+    if touched:
+        touch_goats(touched, session)
+
+def _before_commit(session):
+    if not _goat_handlers:
+        return
+    session.flush()
+    goat_ids = session.info.pop(_TOUCHED_KEY, None)
+    if not goat_ids:
+        return
+    for handler in _goat_handlers:
+        handler(session, goat_ids)
+
+def _forget(session, *args):
+    session.info.pop(_TOUCHED_KEY, None)
+
+def init_write_hooks(db):
+    event.listen(db.session, "after_flush", _collect)
+    event.listen(db.session, "before_commit", _before_commit)
+    event.listen(db.session, "after_rollback", _forget)
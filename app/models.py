@@ -48,9 +48,9 @@ class Goat(db.Model):
     goat_type_id = db.Column(db.Integer, db.ForeignKey('goat_type.id'), nullable=False)
     goat_type = db.relationship('GoatType')
     sex = db.Column(db.String(10))
-    is_pregnant = db.Column(db.Boolean, default=False)
-    dob = db.Column(db.String(20), nullable=True)
-    date_acquired = db.Column(db.String(20), nullable=False)
+    is_pregnant = db.Column(db.Boolean, default=False, index=True)
+    dob = db.Column(db.Date, nullable=True, index=True)
+    date_acquired = db.Column(db.Date, nullable=False, index=True)
     acquisition_method = db.Column(db.String(20), nullable=False)
     source_name = db.Column(db.String(50), nullable=True)
     purchase_price = db.Column(db.Float, nullable=True)
@@ -61,65 +61,29 @@ class Goat(db.Model):
     location = db.Column(db.String(50))
     notes = db.Column(db.String(200), nullable=True)
 
+    # Materialized status flags, maintained by app.flags
+    is_sick = db.Column(db.Boolean, default=False, index=True)
+    is_underweight = db.Column(db.Boolean, default=False, index=True)
+    is_ready_to_mate = db.Column(db.Boolean, default=False, index=True)
+    is_new_arrival = db.Column(db.Boolean, default=False, index=True)
+    is_new_born = db.Column(db.Boolean, default=False, index=True)
+    is_old = db.Column(db.Boolean, default=False, index=True)
+    is_matured = db.Column(db.Boolean, default=False, index=True)
+    flags_refreshed_on = db.Column(db.Date, index=True)
+
+    # Bumped by app.data_versions on every commit that touches the goat
+    data_version = db.Column(db.Integer, default=0, nullable=False)
+    data_updated_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_goat_status_sex', 'status', 'sex'),
+    )
+
     @property
     def tags(self):
-        from .utils import get_target_weight
-        tags = []
-        today = datetime.now().date()
-
-        # 1. Pregnant (manual mark)
-        if self.is_pregnant:
-            tags.append("pregnant")
-
-        # 2. Underweight
-        target = get_target_weight(self)
-        if target and self.weight and self.weight < target:
-            tags.append("underweight")
-
-        # 3. Sick (any active sickness record)
-        latest_sick = Sickness.query.filter_by(goat_id=self.id, status='active').order_by(Sickness.created_at.desc()).first()
-        if latest_sick:
-            tags.append("sick")
-
-        # 4. Ready to Mate (doe, not pregnant, not sick, last mating ended >21 days ago or never mated)
-        if self.sex == "Female" and not self.is_pregnant and not latest_sick:
-            last_breeding = None
-            if hasattr(self, 'breedings_as_doe'):
-                last_breeding = sorted(self.breedings_as_doe, key=lambda e: e.mating_end_date or '', reverse=True)
-                last_breeding = last_breeding[0] if last_breeding else None
-            if last_breeding and last_breeding.mating_end_date:
-                days_since = (today - datetime.strptime(last_breeding.mating_end_date, "%Y-%m-%d").date()).days
-                if days_since >= 21:
-                    tags.append("ready to mate")
-            else:
-                tags.append("ready to mate")
-
-        # 5. Old (age over X months/years, e.g. 6 years = 72 months)
-        age_days = 0
-        if self.dob:
-            age_days = (today - datetime.strptime(self.dob, '%Y-%m-%d').date()).days
-        elif self.age_estimate_months:
-            age_days = self.age_estimate_months * 30
-        if age_days >= 6*365:
-            tags.append("old")
-
-        # 6. New Arrival (first 60 days after acquired)
-        if self.date_acquired:
-            days_since_acquired = (today - datetime.strptime(self.date_acquired, "%Y-%m-%d").date()).days
-            if days_since_acquired < 60:
-                tags.append("new arrival")
-
-        # 7. New Born (first 60 days after born)
-        if self.dob:
-            days_since_born = (today - datetime.strptime(self.dob, "%Y-%m-%d").date()).days
-            if days_since_born < 60:
-                tags.append("new born")
-
-        # 8. Matured (e.g. 1 year = 365 days)
-        if age_days >= 365:
-            tags.append("matured")
-
-        return tags
+        """Single-goat fallback; views listing many goats should use ``get_herd_tags``."""
+        from .utils import get_herd_tags
+        return get_herd_tags([self])[self.id]
 
 class GoatType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -136,16 +100,25 @@ class Sickness(db.Model):
     image_path = db.Column(db.String(200))
     goat = db.relationship('Goat', backref=db.backref('sicknesses', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_sickness_goat_status_created', 'goat_id', 'status', 'created_at'),
+        db.Index('ix_sickness_status_goat', 'status', 'goat_id'),
+        db.Index('ix_sickness_created_at', 'created_at'),
+    )
+
 class SicknessPhoto(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     sickness_id = db.Column(db.Integer, db.ForeignKey('sickness.id'))
     image_path = db.Column(db.String(200))
+    # Variants made in the background by app.photos; None until built
+    thumb_path = db.Column(db.String(200))
+    webp_path = db.Column(db.String(200))
     sickness = db.relationship('Sickness', backref=db.backref('photos', lazy=True))
 
 class Removal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'))
-    date = db.Column(db.String(20))
+    date = db.Column(db.Date, index=True)
     reason = db.Column(db.String(100))
     notes = db.Column(db.Text)
     certificate_path = db.Column(db.String(200))
@@ -161,8 +134,8 @@ class BreedingEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     buck_id = db.Column(db.Integer, db.ForeignKey('goat.id'))
     doe_id = db.Column(db.Integer, db.ForeignKey('goat.id'))
-    mating_start_date = db.Column(db.String(20))
-    mating_end_date = db.Column(db.String(20))
+    mating_start_date = db.Column(db.Date, index=True)
+    mating_end_date = db.Column(db.Date, index=True)
     notes = db.Column(db.String(200))
     status = db.Column(db.String(20), default="planned")
     created_by = db.Column(db.String(50))
@@ -170,10 +143,16 @@ class BreedingEvent(db.Model):
     buck = db.relationship('Goat', foreign_keys=[buck_id], backref='breedings_as_buck')
     doe = db.relationship('Goat', foreign_keys=[doe_id], backref='breedings_as_doe')
 
+    __table_args__ = (
+        db.Index('ix_breeding_event_doe_end', 'doe_id', 'mating_end_date'),
+        db.Index('ix_breeding_event_buck_start', 'buck_id', 'mating_start_date'),
+        db.Index('ix_breeding_event_status_start', 'status', 'mating_start_date'),
+    )
+
 class FarmEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    event_date = db.Column(db.String(20), nullable=False)
+    event_date = db.Column(db.Date, nullable=False, index=True)
     category = db.Column(db.String(50), nullable=False)
     notes = db.Column(db.String(200))
     created_by = db.Column(db.String(50))
@@ -191,8 +170,8 @@ class VaccinationEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'))
     vaccine_type_id = db.Column(db.Integer, db.ForeignKey('vaccine_type.id'))
-    scheduled_date = db.Column(db.String(20))
-    actual_date_given = db.Column(db.String(20))
+    scheduled_date = db.Column(db.Date, index=True)
+    actual_date_given = db.Column(db.Date, index=True)
     status = db.Column(db.String(20))
     notes = db.Column(db.Text)
     batch_number = db.Column(db.String(50))
@@ -204,8 +183,23 @@ class VaccinationEvent(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('goat_id', 'vaccine_type_id', 'scheduled_date', name='uix_1'),
+        db.Index('ix_vaccination_event_goat_type_status_scheduled', 'goat_id', 'vaccine_type_id', 'status', 'scheduled_date'),
+        db.Index('ix_vaccination_event_goat_type_status_given', 'goat_id', 'vaccine_type_id', 'status', 'actual_date_given'),
+        db.Index('ix_vaccination_event_goat_scheduled', 'goat_id', 'scheduled_date'),
+        db.Index('ix_vaccination_event_status_given', 'status', 'actual_date_given'),
     )
 
+class VaccineDue(db.Model):
+    """Projection of ``get_herd_vaccine_due_info``, one row per (goat, vaccine type)."""
+    goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'), primary_key=True)
+    vaccine_type_id = db.Column(db.Integer, db.ForeignKey('vaccine_type.id'), primary_key=True)
+    last_given = db.Column(db.Date)
+    next_due = db.Column(db.Date, index=True)
+    status = db.Column(db.String(20))
+    computed_on = db.Column(db.Date, index=True)
+    goat = db.relationship('Goat')
+    vaccine_type = db.relationship('VaccineType')
+
 class VaccineGuide(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     guide_text = db.Column(db.Text)
@@ -214,12 +208,17 @@ class VaccineGuide(db.Model):
 class WeightLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'), nullable=False)
-    date = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     weight = db.Column(db.Float, nullable=False)
     created_by = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=db.func.now())
     goat = db.relationship('Goat', backref=db.backref('weight_logs', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_weight_log_goat_date', 'goat_id', 'date'),
+        db.Index('ix_weight_log_created_at', 'created_at'),
+    )
+
 class TargetWeight(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     goat_type_id = db.Column(db.Integer, db.ForeignKey('goat_type.id'), nullable=False)
@@ -242,4 +241,66 @@ class GoatFeedbackPhoto(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     feedback_id = db.Column(db.Integer, db.ForeignKey('goat_feedback.id'))
     image_path = db.Column(db.String(200))
+    thumb_path = db.Column(db.String(200))
+    webp_path = db.Column(db.String(200))
     feedback = db.relationship('GoatFeedback', backref=db.backref('photos', lazy=True))
+
+class DataVersion(db.Model):
+    """Counter bumped on writes to a class of data ("herd", "reference"), see app.data_versions."""
+    key = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime)
+
+class DashboardSnapshot(db.Model):
+    """Cached dashboard payload per piece ("stats", "upcoming_events"), see app.dashboard_snapshot."""
+    key = db.Column(db.String(50), primary_key=True)
+    payload = db.Column(db.JSON)
+    computed_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    stale = db.Column(db.Boolean, default=False)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+class Activity(db.Model):
+    """Append-only feed of farm activity, written by app.activity on flush."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # weight, sickness, vaccination, breeding, removal, feedback
+    goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'))
+    goat_tag = db.Column(db.String(50))
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.String(300))
+    created_by = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    goat = db.relationship('Goat')
+
+    __table_args__ = (
+        db.Index('ix_activity_created_kind', 'created_at', 'kind'),
+    )
+
+class HerdSnapshot(db.Model):
+    """Goat count per day and (type, sex, location, status), rebuilt by app.herd_history."""
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    goat_type_id = db.Column(db.Integer, db.ForeignKey('goat_type.id'))
+    sex = db.Column(db.String(10))
+    location = db.Column(db.String(50))
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_herd_snapshot_day_status', 'day', 'status'),
+    )
+
+class GoatFieldClock(db.Model):
+    """When a user-editable goat column was last written, see app.field_clocks."""
+    goat_id = db.Column(db.Integer, db.ForeignKey('goat.id'), primary_key=True)
+    field = db.Column(db.String(30), primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class SyncOperation(db.Model):
+    """Offline operation replayed through /sync, keyed by its client-generated id, see app.sync."""
+    id = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # applied, rejected
+    result = db.Column(db.Text)  # JSON result returned to the client
+    created_by = db.Column(db.String(50))
+    received_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
@@ -0,0 +1,116 @@
+"""
+Thumbnail and WebP variants for uploaded photos.
+
+Phone photos are stored at full resolution. Once a commit adds a
+``SicknessPhoto`` or ``GoatFeedbackPhoto``, its variants are made in a
+background thread pool so the upload request doesn't wait on image work: a
+``THUMB_SIZE`` JPEG thumbnail (``thumb_path``) and the same thumbnail as WebP
+(``webp_path``), both under ``static/uploads/thumbs``. Pages show the
+variants with lazy loading and fall back to the original until they exist.
+
+Needs ``Pillow`` (in requirements.txt); without it photos keep only their
+original and a warning is logged once. ``flask build-photo-variants`` fills in variants for photos that
+don't have them yet.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import event, or_
+from .extensions import db
+from .models import GoatFeedbackPhoto, SicknessPhoto
+
+THUMB_SIZE = (320, 320)
+THUMB_FOLDER = os.path.join("static", "uploads", "thumbs")
+PHOTO_MODELS = (SicknessPhoto, GoatFeedbackPhoto)
+WORKERS = 2
+
+_NEW_PHOTOS_KEY = "new_photos"
+
+log = logging.getLogger(__name__)
+_pool = None
+_warned_no_pillow = False
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="photo-variants")
+    return _pool
+
+def make_variants(image_path):
+    """Write the thumbnail variants of ``image_path``; returns ``(thumb_path, webp_path)``."""
+    from PIL import Image, ImageOps
+    os.makedirs(THUMB_FOLDER, exist_ok=True)
+    stem = os.path.join(THUMB_FOLDER, os.path.splitext(os.path.basename(image_path))[0])
+    with Image.open(image_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(THUMB_SIZE)
+        image = image.convert("RGB")
+        image.save(f"{stem}.jpg", "JPEG", quality=80, optimize=True)
+        image.save(f"{stem}.webp", "WEBP", quality=75)
+    return f"{stem}.jpg", f"{stem}.webp"
+
+def build_photo_variants(model, photo_id):
+    """Make and record the variants of one photo. Returns False if the image can't be read."""
+    photo = db.session.get(model, photo_id)
+    if photo is None or not photo.image_path:
+        return False
+    try:
+        photo.thumb_path, photo.webp_path = make_variants(photo.image_path)
+    except (OSError, ValueError) as e:
+        log.warning("No variants for %s: %s", photo.image_path, e)
+        return False
+    db.session.commit()
+    return True
+
+def _build_in_background(app, photos):
+    with app.app_context():
+        for model, photo_id in photos:
+            try:
+                build_photo_variants(model, photo_id)
+            except Exception:
+                log.exception("Building variants for %s %s failed", model.__name__, photo_id)
+                db.session.rollback()
+
+def missing_variants():
+    """``[(model, id)]`` of every photo without variants."""
+    return [
+        (model, photo_id)
+        for model in PHOTO_MODELS
+        for (photo_id,) in db.session.query(model.id).filter(
+            model.image_path != None, or_(model.thumb_path == None, model.webp_path == None))
+    ]
+
+def remove_photo_files(photo):
+    """Delete a photo's original and variants from disk."""
+    for path in (photo.image_path, photo.thumb_path, photo.webp_path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+# --- Write tracking ---
+
+def _collect(session, flush_context):
+    new = session.info.setdefault(_NEW_PHOTOS_KEY, [])
+    new += [(type(obj), obj.id) for obj in session.new if isinstance(obj, PHOTO_MODELS)]
+
+def _after_commit(session):
+    global _warned_no_pillow
+    photos = session.info.pop(_NEW_PHOTOS_KEY, None)
+    if not photos:
+        return
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        if not _warned_no_pillow:
+            log.warning("Pillow is not installed; photo thumbnails and WebP variants are not made.")
+            _warned_no_pillow = True
+        return
+    _executor().submit(_build_in_background, current_app._get_current_object(), photos)
+
+def _forget(session, *args):
+    session.info.pop(_NEW_PHOTOS_KEY, None)
+
+def init_photo_variants(db):
+    event.listen(db.session, "after_flush", _collect)
+    event.listen(db.session, "after_commit", _after_commit)
+    event.listen(db.session, "after_rollback", _forget)
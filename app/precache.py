@@ -0,0 +1,66 @@
+"""
+Precache manifest for the service worker.
+
+``flask build-precache`` hashes every file under ``static/`` (except uploads
+and the service worker itself) into ``static/precache-manifest.json``: one
+``{url, revision}`` entry per file plus a ``version`` over all of them.
+Assets built by ``flask build-assets`` are listed under their fingerprinted
+URL. The ``/service-worker.js`` route inlines the manifest into the worker
+script, so any asset change gives the browser a byte-different worker, which
+installs a new versioned precache and drops the old one.
+"""
+import hashlib
+import json
+import os
+from .assets import DIST_FOLDER, load_assets_manifest
+
+MANIFEST_FILENAME = "precache-manifest.json"
+# Paths under static/ that are never precached
+EXCLUDED = ("uploads/", f"{DIST_FOLDER}/", "js/service-worker.js", MANIFEST_FILENAME)
+
+def _revision(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def build_precache_manifest(static_folder, static_url_path="/static", assets=None):
+    """
+    ``{version, files: [{url, revision}]}`` for the files under
+    ``static_folder``; ``assets`` maps sources to fingerprinted paths and
+    defaults to the last ``build-assets`` output.
+    """
+    if assets is None:
+        assets = load_assets_manifest(static_folder)
+    files = []
+    for root, dirs, names in os.walk(static_folder):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            if name.startswith(".") or rel.startswith(EXCLUDED):
+                continue
+            url = f"{static_url_path}/{DIST_FOLDER}/{assets[rel]}" if rel in assets else f"{static_url_path}/{rel}"
+            files.append({"url": url, "revision": _revision(path)})
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:12]
+    return {"version": version, "files": files}
+
+def write_precache_manifest(static_folder, static_url_path="/static"):
+    """Build the manifest and save it next to the assets; returns it."""
+    manifest = build_precache_manifest(static_folder, static_url_path)
+    with open(os.path.join(static_folder, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+def load_precache_manifest(app):
+    """
+    The built manifest. Falls back to hashing the assets on the fly when the
+    build step hasn't been run, and always does so in debug mode so edits to
+    static files show up without a rebuild.
+    """
+    path = os.path.join(app.static_folder, MANIFEST_FILENAME)
+    if not app.debug and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return build_precache_manifest(app.static_folder, app.static_url_path, app.extensions["assets"])
@@ -0,0 +1,107 @@
+"""
+Query-plan checks for the hot query shapes.
+
+Each entry mirrors a query the blueprints or ``utils`` actually issue against
+the event tables (and the goat table, where they drive the query). ``find_full_scans`` runs ``EXPLAIN QUERY PLAN`` over them
+(SQLite only) and reports any that fall back to scanning a whole table, which
+usually means an index in ``models.py`` or its migration went missing.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, select, text
+from .extensions import db
+from .models import Activity, Goat, HerdSnapshot, Sickness, BreedingEvent, VaccinationEvent, WeightLog
+from .utils import ready_does_query
+
+def _query_shapes():
+    today = datetime.now().date()
+    start, end = today - timedelta(days=30), today + timedelta(days=30)
+    some_goats = [1, 2, 3]
+    return [
+        ("vaccine due: herd events",  # utils.get_herd_vaccine_due_info
+         select(VaccinationEvent.goat_id, VaccinationEvent.vaccine_type_id, VaccinationEvent.status,
+                VaccinationEvent.scheduled_date, VaccinationEvent.actual_date_given)
+         .filter(VaccinationEvent.goat_id.in_(some_goats))),
+        ("vaccine: done on date",  # goats.reschedule_vaccine
+         select(VaccinationEvent).filter_by(goat_id=1, vaccine_type_id=1, scheduled_date=today, status="done")
+         .limit(1)),
+        ("calendar: done in range",  # calendar.api_events
+         select(VaccinationEvent.goat_id, VaccinationEvent.vaccine_type_id, VaccinationEvent.scheduled_date)
+         .filter(VaccinationEvent.status == "done",
+                 VaccinationEvent.scheduled_date >= start,
+                 VaccinationEvent.scheduled_date <= end)),
+        ("goat detail: vaccinations",  # goats.goat_detail
+         select(VaccinationEvent).filter_by(goat_id=1)
+         .order_by(VaccinationEvent.scheduled_date.desc()).limit(10)),
+        ("calendar: scheduled vaccinations",  # calendar.api_events
+         select(VaccinationEvent).filter(
+             VaccinationEvent.scheduled_date >= start,
+             VaccinationEvent.scheduled_date <= end,
+             VaccinationEvent.status != "done")),
+        ("reports: recent vaccinations",  # reports.report_vax_compliance
+         select(VaccinationEvent).filter(VaccinationEvent.status == "done")
+         .order_by(VaccinationEvent.actual_date_given.desc()).limit(100)),
+        ("herd tags: sick goats",  # utils.get_herd_tags
+         select(Sickness.goat_id).filter(Sickness.status == "active", Sickness.goat_id.in_(some_goats))
+         .distinct()),
+        ("goat: recover",  # goats.mark_goat_recovered
+         select(Sickness).filter_by(goat_id=1, status="active")),
+        ("goat detail: sickness history",  # goats.goat_detail
+         select(Sickness).filter_by(goat_id=1).order_by(Sickness.created_at.desc()).limit(10)),
+        ("dashboard: sick list",  # dashboard._sick_widget
+         select(Sickness).join(Goat, Goat.id == Sickness.goat_id)
+         .filter(Sickness.status == "active", Goat.status == "active")
+         .order_by(Sickness.created_at.desc(), Sickness.id.desc()).limit(10)),
+        ("reports: active sickness",  # reports.report_health
+         select(Sickness).filter_by(status="active").order_by(Sickness.created_at.desc())),
+        ("herd tags: last mating",  # utils.get_herd_tags
+         select(BreedingEvent.doe_id, func.max(BreedingEvent.mating_end_date))
+         .filter(BreedingEvent.doe_id.in_(some_goats)).group_by(BreedingEvent.doe_id)),
+        ("ready does: latest mating per doe",  # utils.get_ready_does
+         ready_does_query(location="Barn A").statement),
+        ("goat detail: breeding",  # goats.goat_detail
+         select(BreedingEvent).filter((BreedingEvent.buck_id == 1) | (BreedingEvent.doe_id == 1))
+         .order_by(BreedingEvent.mating_start_date.desc()).limit(10)),
+        ("calendar: breeding",  # calendar.api_events
+         select(BreedingEvent).filter(
+             BreedingEvent.mating_start_date >= start,
+             BreedingEvent.mating_start_date <= end)),
+        ("dashboard: upcoming breeding",  # dashboard_snapshot._build_upcoming_events
+         select(BreedingEvent).filter(BreedingEvent.status == "scheduled")
+         .order_by(BreedingEvent.mating_start_date).limit(3)),
+        ("goat detail: weights",  # goats.goat_detail
+         select(WeightLog).filter_by(goat_id=1)
+         .order_by(WeightLog.date.desc(), WeightLog.created_at.desc()).limit(10)),
+        ("dashboard: recent activity",  # dashboard._recent_activity_widget
+         select(Activity).filter(Activity.created_at >= start, Activity.created_at <= end)
+         .order_by(Activity.created_at.desc(), Activity.id.desc()).limit(5)),
+        ("api: goats keyset page",  # api.list_goats
+         select(Goat.id, Goat.tag).filter(
+             Goat.status == "active",
+             or_(Goat.tag > "KA-001", and_(Goat.tag == "KA-001", Goat.id > 1)))
+         .order_by(Goat.tag, Goat.id).limit(101)),
+        ("dashboard: herd trend",  # herd_history.herd_totals
+         select(HerdSnapshot.day, func.sum(HerdSnapshot.count))
+         .filter(HerdSnapshot.day >= start, HerdSnapshot.day <= end, HerdSnapshot.status == "active")
+         .group_by(HerdSnapshot.day)),
+    ]
+
+def _is_full_scan(detail):
+    # Both "SCAN weight_log" and "SCAN weight_log USING INDEX ..." visit every
+    # row; only SEARCH steps (and temp b-trees for sorting) are acceptable.
+    # "SCAN (subquery-N)" reads an already-filtered intermediate result.
+    return detail.startswith("SCAN ") and not detail.startswith("SCAN (") and "CONSTANT ROW" not in detail
+
+def explain(stmt):
+    """Return the ``EXPLAIN QUERY PLAN`` detail lines for ``stmt``."""
+    sql = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [row[-1] for row in rows]
+
+def find_full_scans():
+    """Run the plan check; returns ``[(label, plan_lines)]`` for every offending shape."""
+    failures = []
+    for label, stmt in _query_shapes():
+        plan = explain(stmt)
+        if any(_is_full_scan(line) for line in plan):
+            failures.append((label, plan))
+    return failures
@@ -0,0 +1,132 @@
+"""
+Full-text search index (SQLite FTS5).
+
+``search_index`` holds one row per goat, sickness, feedback and removal with
+a short ``title`` (tag, condition, reason) and a longer ``body``. SQL triggers
+keep it in step with the source tables, so bulk writes are indexed too. The
+FTS rowid encodes the source row as ``id * 4 + kind code`` which lets the
+triggers replace a row by rowid instead of scanning the index.
+
+The table and triggers are created by the migration and, for databases built
+with ``db.create_all()``, by the metadata hook below. ``flask
+rebuild-search-index`` refills the index from the source tables.
+"""
+import re
+from sqlalchemy import column, event, func, literal_column, select, table, text
+from .extensions import db
+
+# Source kind -> rowid code
+SEARCH_KINDS = {"goat": 0, "sickness": 1, "feedback": 2, "removal": 3}
+
+search_index = table(
+    "search_index",
+    column("rowid"), column("title"), column("body"), column("kind"), column("goat_id"),
+)
+
+# bm25 column weights: a hit in the title counts ten times a hit in the body
+_RANK = func.bm25(literal_column("search_index"), 10.0, 1.0)
+
+# Per source table: (kind, title SQL, body SQL, goat id SQL, watched columns).
+# Expressions are written against the trigger row alias NEW.
+_SOURCES = {
+    "goat": (
+        "goat", "NEW.tag",
+        "coalesce((SELECT name FROM goat_type WHERE goat_type.id = NEW.goat_type_id), '')"
+        " || ' ' || coalesce(NEW.location, '') || ' ' || coalesce(NEW.notes, '')",
+        "NEW.id", "tag, goat_type_id, location, notes",
+    ),
+    "sickness": (
+        "sickness", "coalesce(NEW.sickness, '')", "coalesce(NEW.medicine, '')",
+        "NEW.goat_id", "goat_id, sickness, medicine",
+    ),
+    "goat_feedback": (
+        "feedback", "''", "coalesce(NEW.content, '')",
+        "NEW.goat_id", "goat_id, content",
+    ),
+    "removal": (
+        "removal", "coalesce(NEW.reason, '')", "coalesce(NEW.notes, '')",
+        "NEW.goat_id", "goat_id, reason, notes",
+    ),
+}
+
+def _insert_sql(source, alias="NEW"):
+    kind, title, body, goat_id, _ = _SOURCES[source]
+    rowid = f"{alias}.id * 4 + {SEARCH_KINDS[kind]}"
+    values = ", ".join(expr.replace("NEW.", f"{alias}.") for expr in (rowid, title, body, f"'{kind}'", goat_id))
+    return f"INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT {values}"
+
+def _ddl():
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, body, kind UNINDEXED, goat_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')",
+    ]
+    for source, (kind, _, _, _, watched) in _SOURCES.items():
+        delete = f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {SEARCH_KINDS[kind]};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {source}_search_ai AFTER INSERT ON {source} BEGIN "
+            f"{_insert_sql(source)}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {source}_search_au AFTER UPDATE OF {watched} ON {source} BEGIN "
+            f"{delete} {_insert_sql(source)}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {source}_search_ad AFTER DELETE ON {source} BEGIN "
+            f"{delete} END",
+        ]
+    # Type names are part of each goat's body
+    statements.append(
+        "CREATE TRIGGER IF NOT EXISTS goat_type_search_au AFTER UPDATE OF name ON goat_type BEGIN "
+        "UPDATE goat SET goat_type_id = goat_type_id WHERE goat_type_id = NEW.id; END"
+    )
+    return statements
+
+def rebuild_search_index(connection=None):
+    """Refill ``search_index`` from the source tables; returns the row count. Caller commits."""
+    connection = connection or db.session.connection()
+    connection.execute(text("DELETE FROM search_index"))
+    for source in _SOURCES:
+        connection.execute(text(f"{_insert_sql(source, source)} FROM {source}"))
+    return connection.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+def fts_query(terms):
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix,
+    so "ka 00" finds KA-001. Returns None when there is nothing to search.
+    """
+    words = re.findall(r"\w+", terms or "")
+    return " ".join(f'"{w}"*' for w in words) or None
+
+def matching_ids(kind, terms):
+    """SELECT of source ids of ``kind`` matching ``terms``, for ``Model.id.in_(...)``."""
+    return select(search_index.c.rowid.op(">>")(2)).where(
+        literal_column("search_index").op("MATCH")(fts_query(terms)),
+        search_index.c.kind == kind
+    )
+
+def search_hits(terms, limit=50):
+    """Ranked ``[(kind, source_id, goat_id, title, body)]`` hits across every kind."""
+    query = fts_query(terms)
+    if not query:
+        return []
+    rows = db.session.execute(
+        select(search_index.c.kind, search_index.c.rowid.op(">>")(2), search_index.c.goat_id,
+               search_index.c.title, search_index.c.body)
+        .where(literal_column("search_index").op("MATCH")(query))
+        .order_by(_RANK)
+        .limit(limit)
+    )
+    return [tuple(row) for row in rows]
+
+@event.listens_for(db.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+    ).first()
+    for statement in _ddl():
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_search_index(connection)
+
+@event.listens_for(db.metadata, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
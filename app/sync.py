@@ -0,0 +1,186 @@
+"""
+Replay of operations queued by the offline PWA.
+
+The service worker queues form posts made without a connection as JSON
+operations ``{id, type, ts, data}``. ``id`` is generated on the device and
+``ts`` is when the operation was made (ms since the epoch). ``apply_operations``
+applies a batch in one transaction. Every operation is recorded as a
+``SyncOperation`` under its id, so a batch replayed after a lost response
+gets the stored results back instead of writing twice. Goat fields are
+last-writer-wins per field against ``app.field_clocks``: an offline edit only
+lands on fields nobody has written since ``ts``.
+"""
+import json
+from datetime import datetime
+from .bulk_writes import record_vaccinations
+from .current_user import get_current_user
+from .extensions import db
+from .field_clocks import SYNCED_GOAT_FIELDS, goat_field_clocks, stamp_goat_fields
+from .models import Goat, Sickness, SyncOperation, VaccineType, WeightLog
+from .utils import parse_date
+
+MAX_BATCH = 500
+
+class OperationError(ValueError):
+    """The operation can't be applied; it is rejected with this message."""
+
+_handlers = {}
+
+def _operation(name):
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+def _goat(data):
+    if data.get("goat_id") is not None:
+        goat = db.session.get(Goat, _int(data, "goat_id"))
+    else:
+        goat = Goat.query.filter_by(tag=str(data.get("tag", ""))).first()
+    if goat is None:
+        raise OperationError("goat not found")
+    return goat
+
+def _int(data, key):
+    try:
+        return int(data[key])
+    except (KeyError, TypeError, ValueError):
+        raise OperationError(f"{key} must be a whole number")
+
+def _float(data, key):
+    try:
+        return float(data[key])
+    except (KeyError, TypeError, ValueError):
+        raise OperationError(f"{key} must be a number")
+
+def _date(data, key, default=None):
+    try:
+        return parse_date(data.get(key)) or default
+    except (TypeError, ValueError):
+        raise OperationError(f"{key} must be a YYYY-MM-DD date")
+
+def _require_permission(permission):
+    # Same check as @require_permission on the matching online route
+    user = get_current_user()
+    if not (user and user.has_permission(permission)):
+        raise OperationError(f"no permission for this action ({permission})")
+
+def _set_fields(goat, fields, at):
+    """Apply ``{field: value}`` where ``at`` is newer than the field's clock; returns the fields skipped."""
+    clocks = goat_field_clocks([goat.id])
+    stale = []
+    for field, value in fields.items():
+        clock = clocks.get((goat.id, field))
+        if clock and clock > at:
+            stale.append(field)
+            continue
+        setattr(goat, field, value)
+        stamp_goat_fields([goat.id], [field], at)
+    return stale
+
+# --- Operations ---
+
+@_operation("weight")
+def _weight(data, at, username):
+    goat = _goat(data)
+    weight = _float(data, "weight")
+    day = _date(data, "date", at.date())
+    db.session.add(WeightLog(goat_id=goat.id, date=day, weight=weight, created_by=username, created_at=at))
+    return {"stale_fields": _set_fields(goat, {"weight": weight}, at)}
+
+@_operation("sickness")
+def _sickness(data, at, username):
+    _require_permission("sickness")
+    goat = _goat(data)
+    if not data.get("sickness"):
+        raise OperationError("sickness is required")
+    db.session.add(Sickness(
+        goat_id=goat.id,
+        sickness=str(data["sickness"]),
+        medicine=str(data.get("medicine") or ""),
+        status="active",
+        created_by=username,
+        created_at=at,
+    ))
+    return {}
+
+@_operation("vaccination")
+def _vaccination(data, at, username):
+    vaccine_type_id = _int(data, "vaccine_type_id")
+    if db.session.get(VaccineType, vaccine_type_id) is None:
+        raise OperationError("unknown vaccine type")
+    goat_ids = data.get("goat_ids")
+    if not isinstance(goat_ids, list):
+        raise OperationError("goat_ids must be a list")
+    inserted, skipped, missing = record_vaccinations(
+        [_int({"id": goat_id}, "id") for goat_id in goat_ids], vaccine_type_id,
+        _date(data, "date", at.date()), username,
+        notes=str(data.get("notes") or ""), given_by=data.get("given_by") or None,
+        batch_number=data.get("batch_number") or None,
+    )
+    return {"inserted": inserted, "skipped": skipped, "missing": missing}
+
+@_operation("goat")
+def _goat_fields(data, at, username):
+    goat = _goat(data)
+    fields = data.get("fields")
+    if not isinstance(fields, dict) or not fields:
+        raise OperationError("fields must be an object")
+    unknown = sorted(set(fields) - set(SYNCED_GOAT_FIELDS))
+    if unknown:
+        raise OperationError(f"fields not editable offline: {', '.join(unknown)}")
+    values = {}
+    for field, value in fields.items():
+        if field == "weight":
+            values[field] = _float(fields, field) if value is not None else None
+        elif field == "is_pregnant":
+            values[field] = bool(value)
+        else:
+            values[field] = str(value) if value is not None else None
+    return {"stale_fields": _set_fields(goat, values, at)}
+
+# --- Batch ---
+
+def _timestamp(op):
+    try:
+        return datetime.utcfromtimestamp(float(op["ts"]) / 1000)
+    except (KeyError, TypeError, ValueError, OverflowError, OSError):
+        raise OperationError("ts must be a timestamp in milliseconds")
+
+def apply_operations(operations, username):
+    """
+    Apply a batch of ``{id, type, ts, data}`` operations; returns one
+    ``{id, status, ...}`` result per operation, in order. Status is
+    "applied" or "rejected" (with ``error``); replays of a known id return
+    the stored result with ``duplicate: true``. Caller commits.
+    """
+    ids = [str(op.get("id", "")) for op in operations if isinstance(op, dict)]
+    known = {row.id: row for row in SyncOperation.query.filter(SyncOperation.id.in_(ids))} if ids else {}
+
+    results = []
+    for op in operations:
+        op_id = str(op.get("id", "")) if isinstance(op, dict) else ""
+        if not op_id or len(op_id) > 64:
+            results.append({"id": op_id or None, "status": "rejected", "error": "id is required (max 64 chars)"})
+            continue
+        if op_id in known:
+            results.append(dict(json.loads(known[op_id].result), duplicate=True))
+            continue
+
+        kind = str(op.get("type", ""))
+        handler = _handlers.get(kind)
+        try:
+            if handler is None:
+                raise OperationError(f"unknown operation type '{kind}'")
+            data = op.get("data")
+            if not isinstance(data, dict):
+                raise OperationError("data must be an object")
+            result = dict(id=op_id, status="applied", **handler(data, _timestamp(op), username))
+        except OperationError as e:
+            result = {"id": op_id, "status": "rejected", "error": str(e)}
+
+        known[op_id] = SyncOperation(id=op_id, kind=kind[:20], status=result["status"],
+                                     result=json.dumps(result), created_by=username)
+        db.session.add(known[op_id])
+        results.append(result)
+    return results
@@ -1,7 +1,16 @@
 from flask import session, redirect, url_for, flash, request
 from functools import wraps
-from .models import User, Goat, BreedingEvent, VaccineType, VaccinationEvent, TargetWeight
-from datetime import datetime, timedelta
+from .models import Goat, BreedingEvent, VaccineType, VaccinationEvent, TargetWeight, Sickness, DataVersion
+from .extensions import db
+from .current_user import get_current_user
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from datetime import datetime, date, timedelta
+from bisect import bisect_right
+
+# Longest id list we pass to an IN (...) clause; bigger batches just load the
+# whole table, which is cheaper than tripping SQLite's bound-parameter limit.
+IN_CLAUSE_LIMIT = 500
 
 # --- Permission Decorator ---
 def require_permission(permission):
@@ -11,7 +20,7 @@ def require_permission(permission):
             if not session.get("username"):
                 flash("Please login first.", "warning")
                 return redirect(url_for("auth.login"))
-            user = User.query.filter_by(username=session.get("username")).first()
+            user = get_current_user()
             if not (user and user.has_permission(permission)):
                 flash(f"You do not have permission for this action ({permission}).", "danger")
                 return redirect(url_for("dashboard.dashboard_home"))
@@ -27,7 +36,7 @@ def require_role(role_required):
             if not session.get("username"):
                 flash("Please login first.", "warning")
                 return redirect(url_for("auth.login"))
-            user = User.query.filter_by(username=session["username"]).first()
+            user = get_current_user()
             if not user or user.role != role_required:
                 flash(f"Access denied: {role_required} only.", "danger")
                 return redirect(url_for("dashboard.dashboard_home"))
@@ -42,7 +51,7 @@ def require_any_role(*roles):
             if not session.get("username"):
                 flash("Please login first.", "warning")
                 return redirect(url_for("auth.login"))
-            user = User.query.filter_by(username=session["username"]).first()
+            user = get_current_user()
             if not user or user.role not in roles:
                 flash("Access denied: insufficient privileges.", "danger")
                 return redirect(url_for("dashboard.dashboard_home"))
@@ -52,29 +61,77 @@ def require_any_role(*roles):
 
 # --- Utility Functions ---
 
-def get_ready_does(min_days=21):
-    does = Goat.query.filter_by(status="active", sex="Female").all()
-    ready_does = []
-    today = datetime.now().date()
-    for doe in does:
-        last_breeding = (
-            BreedingEvent.query
-            .filter_by(doe_id=doe.id)
-            .order_by(BreedingEvent.mating_end_date.desc())
-            .first()
+def parse_date(value):
+    """Parse a 'YYYY-MM-DD' form or query value into a date; blanks become None."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+def ready_does_query(min_days=21, location=None, goat_type_id=None):
+    """
+    Active does that are ready to re-mate, as one SQL statement.
+
+    Each doe is joined to her latest breeding event (``ROW_NUMBER()`` over
+    ``mating_end_date``); does that were never bred are included with ``None``.
+    Yields ``(doe, last_breeding)`` rows ordered by doe id.
+    """
+    cutoff = datetime.now().date() - timedelta(days=min_days)
+    does = db.session.query(Goat.id).filter(Goat.status == "active", Goat.sex == "Female")
+    if location:
+        does = does.filter(Goat.location == location)
+    if goat_type_id:
+        does = does.filter(Goat.goat_type_id == goat_type_id)
+    does = does.subquery()
+
+    latest = (
+        db.session.query(
+            BreedingEvent.id.label("id"),
+            BreedingEvent.doe_id.label("doe_id"),
+            func.row_number().over(
+                partition_by=BreedingEvent.doe_id,
+                order_by=(BreedingEvent.mating_end_date.desc(), BreedingEvent.id.desc()),
+            ).label("rn"),
         )
-        if last_breeding:
-            last_mate_end = datetime.strptime(last_breeding.mating_end_date, "%Y-%m-%d").date()
-            days_since_last_mate = (today - last_mate_end).days
-            if days_since_last_mate >= min_days:
-                ready_does.append((doe, last_breeding, days_since_last_mate))
-        else:
-            ready_does.append((doe, None, None))
-    return ready_does
+        .filter(BreedingEvent.doe_id.in_(does.select()))
+        .subquery()
+    )
+    return (
+        db.session.query(Goat, BreedingEvent)
+        .join(does, does.c.id == Goat.id)
+        .outerjoin(latest, (latest.c.doe_id == Goat.id) & (latest.c.rn == 1))
+        .outerjoin(BreedingEvent, BreedingEvent.id == latest.c.id)
+        .filter((BreedingEvent.id == None) | (BreedingEvent.mating_end_date <= cutoff))
+        .options(joinedload(Goat.goat_type))
+        .order_by(Goat.id)
+    )
+
+def get_ready_does(min_days=21, location=None, goat_type_id=None, page=None, per_page=50):
+    """
+    ``(doe, last_breeding, days_since_last_mate)`` for does ready to re-mate.
+
+    Returns a list, or a pagination object with those triples as ``items``
+    when ``page`` is given.
+    """
+    today = datetime.now().date()
+    def _row(doe, last_breeding):
+        if last_breeding is None:
+            return (doe, None, None)
+        return (doe, last_breeding, (today - last_breeding.mating_end_date).days)
+
+    query = ready_does_query(min_days, location, goat_type_id)
+    if page is None:
+        return [_row(doe, last) for doe, last in query]
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination.items = [_row(doe, last) for doe, last in pagination.items]
+    return pagination
 
 def expand_recurring_event(event, from_date, to_date):
     events = []
-    dt = datetime.strptime(event.event_date, "%Y-%m-%d").date()
+    dt = event.event_date
     start = from_date
     end = to_date
     current = dt
@@ -84,7 +141,7 @@ def expand_recurring_event(event, from_date, to_date):
             events.append({
                 "id": event.id,
                 "title": event.title,
-                "start": event.event_date,
+                "start": event.event_date.isoformat(),
                 "category": event.category,
                 "notes": event.notes,
                 "createdBy": event.created_by,
@@ -126,81 +183,236 @@ def expand_recurring_event(event, from_date, to_date):
     return events
 
 def get_vaccine_due_info(goat):
-    result = []
-    today = datetime.now().date()
-    for vt in VaccineType.query.all():
-        dob = datetime.strptime(goat.dob, "%Y-%m-%d").date() if goat.dob else None
-        if not dob or (today - dob).days < vt.min_age_days:
-            continue
-        scheduled_event = (
-            VaccinationEvent.query
-            .filter_by(goat_id=goat.id, vaccine_type_id=vt.id, status="scheduled")
-            .order_by(VaccinationEvent.scheduled_date.asc())
-            .first()
-        )
-        if scheduled_event:
-            next_due = datetime.strptime(scheduled_event.scheduled_date, "%Y-%m-%d").date()
-            last_given = None
-            last_done = (
-                VaccinationEvent.query
-                .filter_by(goat_id=goat.id, vaccine_type_id=vt.id, status="done")
-                .order_by(VaccinationEvent.actual_date_given.desc())
-                .first()
-            )
-            if last_done:
-                last_given = datetime.strptime(last_done.actual_date_given, "%Y-%m-%d").date()
-            status = "overdue" if today > next_due else "due"
-            result.append(dict(
-                vaccine=vt,
-                last_given=last_given,
-                next_due=next_due,
-                status=status,
-            ))
-            continue
-        records = [v for v in goat.vaccination_events if v.vaccine_type_id == vt.id and v.actual_date_given]
-        records = sorted(records, key=lambda v: v.actual_date_given)
-        boosters = [int(x.strip()) for x in vt.booster_schedule_days.split(",") if x.strip()]
-
-        if not records:
-            next_due = dob + timedelta(days=vt.min_age_days)
-            last_given = None
-            status = "overdue" if today > next_due else "due"
+    """Single-goat wrapper; views covering many goats should use ``get_herd_vaccine_due_info``."""
+    return get_herd_vaccine_due_info([goat])[goat.id]
+
+def _vaccine_due_entry(vt, dob, events, today):
+    """Due info for one (goat, vaccine type) from its preloaded event rows."""
+    scheduled = [e for e in events if e.status == "scheduled"]
+    if scheduled:
+        # Same pick as ORDER BY scheduled_date ASC / actual_date_given DESC in
+        # SQLite: NULL dates sort first ascending and last descending.
+        next_due = min(scheduled, key=lambda e: (e.scheduled_date is not None, e.scheduled_date or date.min)).scheduled_date
+        given = [e.actual_date_given for e in events if e.status == "done" and e.actual_date_given]
+        last_given = max(given) if given else None
+        status = "overdue" if today > next_due else "due"
+        return dict(vaccine=vt, last_given=last_given, next_due=next_due, status=status)
+
+    records = sorted(e.actual_date_given for e in events if e.actual_date_given)
+    boosters = [int(x.strip()) for x in vt.booster_schedule_days.split(",") if x.strip()]
+
+    if not records:
+        next_due = dob + timedelta(days=vt.min_age_days)
+        last_given = None
+    else:
+        last_given = records[-1]
+        dose_num = len(records)
+        if dose_num <= len(boosters):
+            interval = boosters[dose_num-1] if dose_num-1 < len(boosters) else vt.default_frequency_days
+            next_due = last_given + timedelta(days=interval)
         else:
-            last_given_date = datetime.strptime(records[-1].actual_date_given, "%Y-%m-%d").date()
-            dose_num = len(records)
-            if dose_num <= len(boosters):
-                next_due = records[0].actual_date_given
-                for i in range(dose_num):
-                    next_due = datetime.strptime(records[i].actual_date_given, "%Y-%m-%d").date()
-                interval = boosters[dose_num-1] if dose_num-1 < len(boosters) else vt.default_frequency_days
-                next_due = last_given_date + timedelta(days=interval)
-            else:
-                next_due = last_given_date + timedelta(days=vt.default_frequency_days)
-            last_given = last_given_date
-            status = "overdue" if today > next_due else "due"
-        result.append(dict(
-            vaccine=vt,
-            last_given=last_given,
-            next_due=next_due,
-            status=status,
-        ))
+            next_due = last_given + timedelta(days=vt.default_frequency_days)
+    status = "overdue" if today > next_due else "due"
+    return dict(vaccine=vt, last_given=last_given, next_due=next_due, status=status)
+
+def get_herd_vaccine_due_info(goats):
+    """
+    Vaccine due info for many goats at once.
+
+    Vaccine types and the goats' vaccination events are loaded in two queries
+    and grouped in memory. Returns ``{goat_id: [dict(vaccine, last_given,
+    next_due, status), ...]}`` in vaccine type order.
+    """
+    goats = list(goats)
+    if not goats:
+        return {}
+    ids = [g.id for g in goats]
+    today = datetime.now().date()
+    vaccine_types = VaccineType.query.all()
+
+    events = {}
+    rows = _restrict_to_ids(
+        db.session.query(
+            VaccinationEvent.goat_id, VaccinationEvent.vaccine_type_id, VaccinationEvent.status,
+            VaccinationEvent.scheduled_date, VaccinationEvent.actual_date_given,
+        ),
+        VaccinationEvent.goat_id, ids,
+    )
+    for row in rows:
+        events.setdefault((row.goat_id, row.vaccine_type_id), []).append(row)
+
+    result = {}
+    for goat in goats:
+        goat_events = {vt.id: events.get((goat.id, vt.id), ()) for vt in vaccine_types}
+        result[goat.id] = vaccine_due_entries(goat, vaccine_types, goat_events, today)
     return result
 
-def get_target_weight(goat):
+def vaccine_due_entries(goat, vaccine_types, events, today):
+    """Due info for one goat from preloaded ``{vaccine_type_id: [events]}`` (no queries)."""
+    dob = goat.dob
+    return [
+        _vaccine_due_entry(vt, dob, events.get(vt.id, ()), today)
+        for vt in vaccine_types
+        if dob and (today - dob).days >= vt.min_age_days
+    ]
+
+# --- Target weight curves ---
+
+# Process-wide index: (goat_type_id, sex) -> (sorted ages, min weights).
+# Rows without a sex apply to both sexes and are merged into each curve.
+# Stored with the "reference" data version it was built at (target weight
+# writes bump it, see app.data_versions), so a write in another worker
+# process is picked up on the next read.
+_target_curves = None
+
+def _build_target_curves():
+    rows = TargetWeight.query.order_by(TargetWeight.age_months, TargetWeight.id).all()
+    by_type = {}
+    for tw in rows:
+        by_type.setdefault(tw.goat_type_id, []).append(tw)
+    curves = {}
+    for goat_type_id, type_rows in by_type.items():
+        sexes = {tw.sex for tw in type_rows if tw.sex is not None}
+        for sex in sexes | {None}:
+            points = [tw for tw in type_rows if tw.sex is None or tw.sex == sex]
+            if points:
+                curves[(goat_type_id, sex)] = (
+                    [tw.age_months for tw in points],
+                    [tw.min_weight for tw in points],
+                )
+    return curves
+
+def get_target_curves():
+    global _target_curves
+    version = db.session.query(DataVersion.version).filter_by(key="reference").scalar() or 0
+    if _target_curves is None or _target_curves[0] != version:
+        _target_curves = (version, _build_target_curves())
+    return _target_curves[1]
+
+def invalidate_target_weights():
+    """Drop this process's cached curves; call after any TargetWeight write."""
+    global _target_curves
+    _target_curves = None
+
+def _age_months(goat, now):
+    if goat.dob:
+        return (now.date() - goat.dob).days // 30
+    return goat.age_estimate_months or 0
+
+def _lookup_target(curves, goat, now):
     if not goat.goat_type_id:
         return None
+    curve = curves.get((goat.goat_type_id, goat.sex)) or curves.get((goat.goat_type_id, None))
+    if not curve:
+        return None
+    ages, weights = curve
+    i = bisect_right(ages, _age_months(goat, now))
+    return weights[i - 1] if i else None
+
+def get_target_weight(goat):
+    return _lookup_target(get_target_curves(), goat, datetime.now())
+
+def get_target_weights(goats):
+    """Target weight for many goats at once: ``{goat_id: min_weight or None}``."""
+    curves = get_target_curves()
+    now = datetime.now()
+    return {goat.id: _lookup_target(curves, goat, now) for goat in goats}
+
+# --- Herd-wide tag evaluation ---
+
+def _restrict_to_ids(query, column, ids):
+    if len(ids) <= IN_CLAUSE_LIMIT:
+        query = query.filter(column.in_(ids))
+    return query
+
+def compute_goat_tags(goat, today, is_sick, last_mating_end, target):
+    """Build the status tags for one goat from preloaded facts (no queries)."""
+    tags = []
+
+    # 1. Pregnant (manual mark)
+    if goat.is_pregnant:
+        tags.append("pregnant")
+
+    # 2. Underweight
+    if target and goat.weight and goat.weight < target:
+        tags.append("underweight")
+
+    # 3. Sick (any active sickness record)
+    if is_sick:
+        tags.append("sick")
+
+    # 4. Ready to Mate (doe, not pregnant, not sick, last mating ended >21 days ago or never mated)
+    if goat.sex == "Female" and not goat.is_pregnant and not is_sick:
+        if last_mating_end:
+            days_since = (today - last_mating_end).days
+            if days_since >= 21:
+                tags.append("ready to mate")
+        else:
+            tags.append("ready to mate")
+
+    # 5. Old (age over X months/years, e.g. 6 years = 72 months)
+    age_days = 0
     if goat.dob:
-        dob = datetime.strptime(goat.dob, "%Y-%m-%d")
-        age_months = (datetime.now() - dob).days // 30
-    else:
-        age_months = goat.age_estimate_months or 0
-
-    q = (TargetWeight.query
-         .filter_by(goat_type_id=goat.goat_type_id)
-         .filter((TargetWeight.sex == goat.sex) | (TargetWeight.sex == None))
-         .filter(TargetWeight.age_months <= age_months)
-         .order_by(TargetWeight.age_months.desc())
-         .first())
-    if q:
-        return q.min_weight
-    return None
+        age_days = (today - goat.dob).days
+    elif goat.age_estimate_months:
+        age_days = goat.age_estimate_months * 30
+    if age_days >= 6*365:
+        tags.append("old")
+
+    # 6. New Arrival (first 60 days after acquired)
+    if goat.date_acquired:
+        days_since_acquired = (today - goat.date_acquired).days
+        if days_since_acquired < 60:
+            tags.append("new arrival")
+
+    # 7. New Born (first 60 days after born)
+    if goat.dob:
+        days_since_born = (today - goat.dob).days
+        if days_since_born < 60:
+            tags.append("new born")
+
+    # 8. Matured (e.g. 1 year = 365 days)
+    if age_days >= 365:
+        tags.append("matured")
+
+    return tags
+
+def get_herd_tags(goats):
+    """
+    Evaluate status tags for many goats at once.
+
+    Active sickness and last mating end dates are loaded in two set-based
+    queries regardless of herd size; target weights come from the cached
+    curve index. Returns ``{goat_id: tags}``.
+    """
+    goats = list(goats)
+    if not goats:
+        return {}
+    ids = [g.id for g in goats]
+    today = datetime.now().date()
+
+    sick_ids = {
+        goat_id for (goat_id,) in _restrict_to_ids(
+            db.session.query(Sickness.goat_id).filter(Sickness.status == "active"),
+            Sickness.goat_id, ids,
+        ).distinct()
+    }
+
+    last_mating = dict(
+        _restrict_to_ids(
+            db.session.query(BreedingEvent.doe_id, func.max(BreedingEvent.mating_end_date)),
+            BreedingEvent.doe_id, ids,
+        ).group_by(BreedingEvent.doe_id).all()
+    )
+
+    targets = get_target_weights(goats)
+
+    result = {}
+    for goat in goats:
+        result[goat.id] = compute_goat_tags(
+            goat, today,
+            is_sick=goat.id in sick_ids,
+            last_mating_end=last_mating.get(goat.id),
+            target=targets[goat.id],
+        )
+    return result
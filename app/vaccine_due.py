@@ -0,0 +1,73 @@
+"""
+Persisted vaccine schedule projection.
+
+``VaccineDue`` holds the output of ``get_herd_vaccine_due_info`` so the
+dashboard, overdue reports and calendar can read next-due dates with an
+indexed range query instead of recomputing them for the whole herd. Rows are
+rebuilt for the affected goats on every commit (see ``app.hooks``), for the
+whole herd when a vaccine type changes, and once a day because the due /
+overdue status moves with the calendar. Each full rebuild bumps the
+"vaccine_due" data version, whose date tells whether today's has run.
+"""
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager, joinedload
+from .data_versions import bump_version, get_versions
+from .extensions import db
+from .hooks import on_goats_changed
+from .models import Goat, VaccineDue
+from .utils import get_herd_vaccine_due_info, IN_CLAUSE_LIMIT
+
+def refresh_vaccine_due(goat_ids=None):
+    """Rebuild projection rows for ``goat_ids`` (all goats when None). Caller commits."""
+    if goat_ids is None:
+        db.session.query(VaccineDue).delete(synchronize_session=False)
+        goats = Goat.query.all()
+    else:
+        goat_ids = list(goat_ids)
+        goats = []
+        for i in range(0, len(goat_ids), IN_CLAUSE_LIMIT):
+            chunk = goat_ids[i:i + IN_CLAUSE_LIMIT]
+            db.session.query(VaccineDue).filter(VaccineDue.goat_id.in_(chunk)).delete(synchronize_session=False)
+            goats += Goat.query.filter(Goat.id.in_(chunk)).all()
+
+    today = datetime.now().date()
+    rows = [
+        dict(
+            goat_id=goat_id,
+            vaccine_type_id=v["vaccine"].id,
+            last_given=v["last_given"],
+            next_due=v["next_due"],
+            status=v["status"],
+            computed_on=today,
+        )
+        for goat_id, due_info in get_herd_vaccine_due_info(goats).items()
+        for v in due_info
+    ]
+    if rows:
+        db.session.execute(insert(VaccineDue), rows)
+    if goat_ids is None:
+        bump_version("vaccine_due")
+    return len(rows)
+
+def ensure_vaccine_due_current():
+    """Rebuild the whole projection if it hasn't been fully rebuilt today."""
+    _, refreshed_at = get_versions("vaccine_due")["vaccine_due"]
+    if refreshed_at is None or refreshed_at.date() < datetime.now().date():
+        refresh_vaccine_due()
+        db.session.commit()
+
+def active_vaccine_due():
+    """Projection rows for active goats, earliest due first."""
+    ensure_vaccine_due_current()
+    return (
+        VaccineDue.query
+        .join(Goat, Goat.id == VaccineDue.goat_id)
+        .filter(Goat.status == "active")
+        .options(contains_eager(VaccineDue.goat), joinedload(VaccineDue.vaccine_type))
+        .order_by(VaccineDue.next_due, VaccineDue.goat_id, VaccineDue.vaccine_type_id)
+    )
+
+@on_goats_changed
+def _refresh_touched(session, goat_ids):
+    refresh_vaccine_due(goat_ids)
@@ -73,8 +73,8 @@ with app.app_context():
                 tag=f"{breed.name[:2].upper()}-{i:03}",
                 goat_type_id=breed.id,
                 sex="Male" if i % 2 == 0 else "Female",
-                dob=(datetime.now() - timedelta(days=30*i)).strftime('%Y-%m-%d'),
-                date_acquired=(datetime.now() - timedelta(days=30*i)).strftime('%Y-%m-%d'),
+                dob=(datetime.now() - timedelta(days=30*i)).date(),
+                date_acquired=(datetime.now() - timedelta(days=30*i)).date(),
                 acquisition_method="Born" if i % 2 == 1 else "Purchased",
                 status="active",
                 location="Main Barn" if breed.name in ["Boer", "Katjang"] else "Field",
@@ -88,7 +88,7 @@ with app.app_context():
     goat_sample = Goat.query.first()
     s = Sickness(goat_id=goat_sample.id, sickness="Diarrhea", medicine="Electrolyte", created_by="worker")
     db.session.add(s)
-    db.session.add(Removal(goat_id=goat_sample.id, reason="Sold", date=(datetime.now()-timedelta(days=5)).strftime("%Y-%m-%d"), notes="Healthy at sale", created_by="admin"))
+    db.session.add(Removal(goat_id=goat_sample.id, reason="Sold", date=(datetime.now()-timedelta(days=5)).date(), notes="Healthy at sale", created_by="admin"))
     db.session.commit()
 
     # 8. Add Breeding Event
@@ -97,8 +97,8 @@ with app.app_context():
     be = BreedingEvent(
         buck_id=buck.id,
         doe_id=doe.id,
-        mating_start_date=(datetime.now()-timedelta(days=25)).strftime("%Y-%m-%d"),
-        mating_end_date=(datetime.now()-timedelta(days=22)).strftime("%Y-%m-%d"),
+        mating_start_date=(datetime.now()-timedelta(days=25)).date(),
+        mating_end_date=(datetime.now()-timedelta(days=22)).date(),
         notes="Planned breeding",
         status="completed",
         created_by="admin"
@@ -113,8 +113,8 @@ with app.app_context():
                 vax = VaccinationEvent(
                     goat_id=goat.id,
                     vaccine_type_id=vt.id,
-                    scheduled_date=(datetime.now()-timedelta(days=14)).strftime('%Y-%m-%d'),
-                    actual_date_given=(datetime.now()-timedelta(days=14)).strftime('%Y-%m-%d'),
+                    scheduled_date=(datetime.now()-timedelta(days=14)).date(),
+                    actual_date_given=(datetime.now()-timedelta(days=14)).date(),
                     status="done",
                     notes="Annual vaccine",
                     given_by="worker",
@@ -128,7 +128,7 @@ with app.app_context():
         for w in range(3):
             wl = WeightLog(
                 goat_id=goat.id,
-                date=(datetime.now()-timedelta(days=7*w)).strftime("%Y-%m-%d"),
+                date=(datetime.now()-timedelta(days=7*w)).date(),
                 weight=goat.weight + random.randint(-2, 2),
                 created_by="worker"
             )
@@ -0,0 +1,46 @@
+"""Goat status flags
+
+Revision ID: 3b7e2a91c4d5
+Revises: 6f6f1eec6ff1
+Create Date: 2025-07-14 21:08:31.412907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2a91c4d5'
+down_revision = '6f6f1eec6ff1'
+branch_labels = None
+depends_on = None
+
+FLAG_COLUMNS = [
+    'is_sick',
+    'is_underweight',
+    'is_ready_to_mate',
+    'is_new_arrival',
+    'is_new_born',
+    'is_old',
+    'is_matured',
+]
+
+
+def upgrade():
+    # Flags start out empty; flags_refreshed_on is NULL so the first goat list
+    # request (or `flask refresh-goat-flags`) computes them for the whole herd.
+    with op.batch_alter_table('goat', schema=None) as batch_op:
+        for column in FLAG_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Boolean(), nullable=True, server_default=sa.false()))
+        batch_op.add_column(sa.Column('flags_refreshed_on', sa.Date(), nullable=True))
+        for column in FLAG_COLUMNS + ['is_pregnant', 'flags_refreshed_on']:
+            batch_op.create_index(batch_op.f(f'ix_goat_{column}'), [column], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('goat', schema=None) as batch_op:
+        for column in FLAG_COLUMNS + ['is_pregnant', 'flags_refreshed_on']:
+            batch_op.drop_index(batch_op.f(f'ix_goat_{column}'))
+        batch_op.drop_column('flags_refreshed_on')
+        for column in reversed(FLAG_COLUMNS):
+            batch_op.drop_column(column)
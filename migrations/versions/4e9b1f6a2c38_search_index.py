@@ -0,0 +1,109 @@
+"""Full-text search index
+
+Revision ID: 4e9b1f6a2c38
+Revises: d3c8a5e1f047
+Create Date: 2025-07-22 10:31:17.550912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e9b1f6a2c38'
+down_revision = 'd3c8a5e1f047'
+branch_labels = None
+depends_on = None
+
+TRIGGERS = [
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_search_ai AFTER INSERT ON goat BEGIN '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 0, NEW.tag, coalesce((SELECT name FROM goat_type WHERE goat_type.id = NEW.goat_type_id), '') || ' ' || coalesce(NEW.location, '') || ' ' || coalesce(NEW.notes, ''), 'goat', NEW.id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_search_au AFTER UPDATE OF tag, goat_type_id, location, notes ON goat BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 0; '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 0, NEW.tag, coalesce((SELECT name FROM goat_type WHERE goat_type.id = NEW.goat_type_id), '') || ' ' || coalesce(NEW.location, '') || ' ' || coalesce(NEW.notes, ''), 'goat', NEW.id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_search_ad AFTER DELETE ON goat BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 0; END'
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS sickness_search_ai AFTER INSERT ON sickness BEGIN '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 1, coalesce(NEW.sickness, ''), coalesce(NEW.medicine, ''), 'sickness', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS sickness_search_au AFTER UPDATE OF goat_id, sickness, medicine ON sickness BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1; '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 1, coalesce(NEW.sickness, ''), coalesce(NEW.medicine, ''), 'sickness', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS sickness_search_ad AFTER DELETE ON sickness BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1; END'
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_feedback_search_ai AFTER INSERT ON goat_feedback BEGIN '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 2, '', coalesce(NEW.content, ''), 'feedback', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_feedback_search_au AFTER UPDATE OF goat_id, content ON goat_feedback BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2; '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 2, '', coalesce(NEW.content, ''), 'feedback', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_feedback_search_ad AFTER DELETE ON goat_feedback BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2; END'
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS removal_search_ai AFTER INSERT ON removal BEGIN '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 3, coalesce(NEW.reason, ''), coalesce(NEW.notes, ''), 'removal', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS removal_search_au AFTER UPDATE OF goat_id, reason, notes ON removal BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3; '
+        "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT NEW.id * 4 + 3, coalesce(NEW.reason, ''), coalesce(NEW.notes, ''), 'removal', NEW.goat_id; END"
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS removal_search_ad AFTER DELETE ON removal BEGIN '
+        'DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3; END'
+    ),
+    (
+        'CREATE TRIGGER IF NOT EXISTS goat_type_search_au AFTER UPDATE OF name ON goat_type BEGIN '
+        'UPDATE goat SET goat_type_id = goat_type_id WHERE goat_type_id = NEW.id; END'
+    ),
+]
+
+BACKFILL = [
+    "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT goat.id * 4 + 0, goat.tag, coalesce((SELECT name FROM goat_type WHERE goat_type.id = goat.goat_type_id), '') || ' ' || coalesce(goat.location, '') || ' ' || coalesce(goat.notes, ''), 'goat', goat.id FROM goat",
+    "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT sickness.id * 4 + 1, coalesce(sickness.sickness, ''), coalesce(sickness.medicine, ''), 'sickness', sickness.goat_id FROM sickness",
+    "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT goat_feedback.id * 4 + 2, '', coalesce(goat_feedback.content, ''), 'feedback', goat_feedback.goat_id FROM goat_feedback",
+    "INSERT INTO search_index (rowid, title, body, kind, goat_id) SELECT removal.id * 4 + 3, coalesce(removal.reason, ''), coalesce(removal.notes, ''), 'removal', removal.goat_id FROM removal",
+]
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, kind UNINDEXED, goat_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    for statement in TRIGGERS:
+        op.execute(statement)
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS goat_search_ai')
+    op.execute('DROP TRIGGER IF EXISTS goat_search_au')
+    op.execute('DROP TRIGGER IF EXISTS goat_search_ad')
+    op.execute('DROP TRIGGER IF EXISTS sickness_search_ai')
+    op.execute('DROP TRIGGER IF EXISTS sickness_search_au')
+    op.execute('DROP TRIGGER IF EXISTS sickness_search_ad')
+    op.execute('DROP TRIGGER IF EXISTS goat_feedback_search_ai')
+    op.execute('DROP TRIGGER IF EXISTS goat_feedback_search_au')
+    op.execute('DROP TRIGGER IF EXISTS goat_feedback_search_ad')
+    op.execute('DROP TRIGGER IF EXISTS removal_search_ai')
+    op.execute('DROP TRIGGER IF EXISTS removal_search_au')
+    op.execute('DROP TRIGGER IF EXISTS removal_search_ad')
+    op.execute('DROP TRIGGER IF EXISTS goat_type_search_au')
+    op.execute('DROP TABLE IF EXISTS search_index')
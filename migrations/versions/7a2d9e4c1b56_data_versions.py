@@ -0,0 +1,36 @@
+"""Data versions for conditional responses
+
+Revision ID: 7a2d9e4c1b56
+Revises: 4e9b1f6a2c38
+Create Date: 2025-07-22 15:46:02.118430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2d9e4c1b56'
+down_revision = '4e9b1f6a2c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_version',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('goat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('data_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    # Plain ALTER TABLE DROP COLUMN: a batch rebuild of goat would drop its search triggers
+    op.drop_column('goat', 'data_updated_at')
+    op.drop_column('goat', 'data_version')
+
+    op.drop_table('data_version')
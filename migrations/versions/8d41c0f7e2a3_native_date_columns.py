@@ -0,0 +1,126 @@
+"""Native date columns
+
+Revision ID: 8d41c0f7e2a3
+Revises: 3b7e2a91c4d5
+Create Date: 2025-07-21 19:42:05.118364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c0f7e2a3'
+down_revision = '3b7e2a91c4d5'
+branch_labels = None
+depends_on = None
+
+# table -> [(column, nullable, SQL fallback for blank values)]
+DATE_COLUMNS = {
+    'goat': [
+        ('dob', True, None),
+        ('date_acquired', False, 'dob'),
+    ],
+    'breeding_event': [
+        ('mating_start_date', True, None),
+        ('mating_end_date', True, None),
+    ],
+    'vaccination_event': [
+        ('scheduled_date', True, None),
+        ('actual_date_given', True, None),
+    ],
+    'weight_log': [
+        ('date', False, 'substr(created_at, 1, 10)'),
+    ],
+    'farm_event': [
+        ('event_date', False, None),
+    ],
+    'removal': [
+        ('date', True, None),
+    ],
+}
+
+BATCH_SIZE = 1000
+# Bad rows listed per column when the migration refuses to run
+REPORT_LIMIT = 20
+
+
+def _iso(expr):
+    """SQL for ``expr`` as 'YYYY-MM-DD' if it starts with a real ISO date, else NULL."""
+    day = f"SUBSTR(TRIM({expr}), 1, 10)"
+    # Round trip through julianday() so impossible days like 02-30 fail too
+    return f"CASE WHEN date(julianday({day})) = {day} THEN {day} END"
+
+
+def _new_value(column, fallback):
+    value = _iso(column)
+    if fallback:
+        value = f'COALESCE({value}, {_iso(fallback)})'
+    return value
+
+
+def _check(bind):
+    """
+    Refuse to migrate values that would be lost: a non-blank value that isn't
+    a date and has no fallback, or a NOT NULL column left without a date.
+    """
+    problems = []
+    for table, columns in DATE_COLUMNS.items():
+        for column, nullable, fallback in columns:
+            lost = f"(NULLIF(TRIM({column}), '') IS NOT NULL AND {_iso(column)} IS NULL)"
+            if fallback:
+                lost = f"({lost} AND {_new_value(column, fallback)} IS NULL)"
+            if not nullable:
+                lost = f"({lost} OR {_new_value(column, fallback)} IS NULL)"
+            rows = bind.execute(sa.text(
+                f"SELECT id, {column} FROM {table} WHERE {lost} ORDER BY id LIMIT {REPORT_LIMIT}"
+            )).all()
+            problems += [f"  {table}.{column} id={row_id}: {value!r}" for row_id, value in rows]
+    if problems:
+        raise RuntimeError(
+            "Some date values can't be converted. Fix them (as YYYY-MM-DD) and run "
+            "the upgrade again:\n" + "\n".join(problems)
+        )
+
+
+def _normalize(table, columns):
+    """Store values as 'YYYY-MM-DD' (blank as NULL or the fallback), in id batches."""
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f'SELECT MIN(id), MAX(id) FROM {table}')).one()
+    if low is None:
+        return
+    assignments = [f'{column} = {_new_value(column, fallback)}' for column, _, fallback in columns]
+    statement = sa.text(
+        f"UPDATE {table} SET {', '.join(assignments)} WHERE id BETWEEN :start AND :stop"
+    )
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(statement, {'start': start, 'stop': start + BATCH_SIZE - 1})
+
+
+def upgrade():
+    _check(op.get_bind())
+    for table, columns in DATE_COLUMNS.items():
+        _normalize(table, columns)
+        # On SQLite the batch copy would CAST the old text to DATE, which has
+        # NUMERIC affinity and turns '2025-07-21' into 2025. Reflecting the
+        # columns as Date up front makes the copy a plain transfer instead.
+        reflect_args = [sa.Column(column, sa.Date(), nullable=nullable) for column, nullable, _ in columns]
+        with op.batch_alter_table(table, schema=None, reflect_args=reflect_args) as batch_op:
+            for column, nullable, _ in columns:
+                batch_op.alter_column(column,
+                    existing_type=sa.String(length=20),
+                    type_=sa.Date(),
+                    existing_nullable=nullable,
+                    postgresql_using=f'{column}::date')
+                batch_op.create_index(batch_op.f(f'ix_{table}_{column}'), [column], unique=False)
+
+
+def downgrade():
+    for table, columns in DATE_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable, _ in columns:
+                batch_op.drop_index(batch_op.f(f'ix_{table}_{column}'))
+                batch_op.alter_column(column,
+                    existing_type=sa.Date(),
+                    type_=sa.String(length=20),
+                    existing_nullable=nullable)
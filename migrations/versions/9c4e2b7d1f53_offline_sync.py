@@ -0,0 +1,51 @@
+"""Offline sync operations and goat field clocks
+
+Revision ID: 9c4e2b7d1f53
+Revises: 7a2d9e4c1b56
+Create Date: 2025-07-23 10:12:47.503281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2b7d1f53'
+down_revision = '7a2d9e4c1b56'
+branch_labels = None
+depends_on = None
+
+# Existing goats count as written now, so an offline edit made before the
+# upgrade can't overwrite them; keep in step with SYNCED_GOAT_FIELDS.
+BACKFILL = """
+    INSERT INTO goat_field_clock (goat_id, field, updated_at)
+    SELECT goat.id, fields.field, CURRENT_TIMESTAMP
+    FROM goat CROSS JOIN (
+        SELECT 'weight' AS field UNION ALL SELECT 'location'
+        UNION ALL SELECT 'notes' UNION ALL SELECT 'is_pregnant'
+    ) AS fields
+"""
+
+def upgrade():
+    op.create_table('goat_field_clock',
+    sa.Column('goat_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=30), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['goat_id'], ['goat.id'], ),
+    sa.PrimaryKeyConstraint('goat_id', 'field')
+    )
+    op.execute(BACKFILL)
+    op.create_table('sync_operation',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.String(length=50), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_operation')
+    op.drop_table('goat_field_clock')
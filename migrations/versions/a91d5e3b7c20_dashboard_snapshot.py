@@ -0,0 +1,32 @@
+"""Dashboard snapshot cache
+
+Revision ID: a91d5e3b7c20
+Revises: f7b3c2d8e915
+Create Date: 2025-07-19 16:48:03.905127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d5e3b7c20'
+down_revision = 'f7b3c2d8e915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dashboard_snapshot',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('stale', sa.Boolean(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_snapshot')
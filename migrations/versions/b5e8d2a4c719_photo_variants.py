@@ -0,0 +1,36 @@
+"""Thumbnail and WebP variant paths for uploaded photos
+
+Revision ID: b5e8d2a4c719
+Revises: 9c4e2b7d1f53
+Create Date: 2025-07-24 09:31:05.118420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8d2a4c719'
+down_revision = '9c4e2b7d1f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sickness_photo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('thumb_path', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('webp_path', sa.String(length=200), nullable=True))
+
+    with op.batch_alter_table('goat_feedback_photo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('thumb_path', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('webp_path', sa.String(length=200), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('goat_feedback_photo', schema=None) as batch_op:
+        batch_op.drop_column('webp_path')
+        batch_op.drop_column('thumb_path')
+
+    with op.batch_alter_table('sickness_photo', schema=None) as batch_op:
+        batch_op.drop_column('webp_path')
+        batch_op.drop_column('thumb_path')
@@ -0,0 +1,82 @@
+"""Activity feed
+
+Revision ID: b6e0d4f2a873
+Revises: a91d5e3b7c20
+Create Date: 2025-07-21 11:12:36.207448
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e0d4f2a873'
+down_revision = 'a91d5e3b7c20'
+branch_labels = None
+depends_on = None
+
+# Seed the feed from existing history so it doesn't start out empty. Same
+# titles as app/activity.py writes for new rows.
+BACKFILL = [
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'weight', w.goat_id, g.tag, 'Weight Update: ' || COALESCE(g.tag, '-'),
+              'New weight: ' || w.weight || 'kg', w.created_by, COALESCE(w.created_at, w.date || ' 00:00:00')
+       FROM weight_log w LEFT JOIN goat g ON g.id = w.goat_id""",
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'sickness', s.goat_id, g.tag, 'Health Issue: ' || COALESCE(g.tag, '-'),
+              'Condition: ' || COALESCE(s.sickness, ''), s.created_by, s.created_at
+       FROM sickness s LEFT JOIN goat g ON g.id = s.goat_id
+       WHERE s.created_at IS NOT NULL""",
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'vaccination', v.goat_id, g.tag, 'Vaccination: ' || COALESCE(g.tag, '-'),
+              COALESCE(t.name, 'Vaccine') || ' given', COALESCE(v.given_by, v.created_by),
+              COALESCE(v.created_at, v.actual_date_given || ' 00:00:00')
+       FROM vaccination_event v
+       LEFT JOIN goat g ON g.id = v.goat_id
+       LEFT JOIN vaccine_type t ON t.id = v.vaccine_type_id
+       WHERE v.status = 'done' AND COALESCE(v.created_at, v.actual_date_given) IS NOT NULL""",
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'breeding', b.doe_id, d.tag, 'Breeding: ' || COALESCE(d.tag, '-'),
+              'Buck: ' || COALESCE(k.tag, '-'), b.created_by, COALESCE(b.created_at, b.mating_start_date || ' 00:00:00')
+       FROM breeding_event b
+       LEFT JOIN goat d ON d.id = b.doe_id
+       LEFT JOIN goat k ON k.id = b.buck_id
+       WHERE COALESCE(b.created_at, b.mating_start_date) IS NOT NULL""",
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'removal', r.goat_id, g.tag, 'Removed: ' || COALESCE(g.tag, '-'),
+              'Reason: ' || COALESCE(r.reason, '-'), r.created_by, COALESCE(r.created_at, r.date || ' 00:00:00')
+       FROM removal r LEFT JOIN goat g ON g.id = r.goat_id
+       WHERE COALESCE(r.created_at, r.date) IS NOT NULL""",
+    """INSERT INTO activity (kind, goat_id, goat_tag, title, description, created_by, created_at)
+       SELECT 'feedback', f.goat_id, g.tag, 'Feedback: ' || COALESCE(g.tag, '-'),
+              substr(f.content, 1, 300), f.submitted_by, f.timestamp
+       FROM goat_feedback f LEFT JOIN goat g ON g.id = f.goat_id
+       WHERE f.timestamp IS NOT NULL""",
+]
+
+
+def upgrade():
+    op.create_table('activity',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('goat_id', sa.Integer(), nullable=True),
+    sa.Column('goat_tag', sa.String(length=50), nullable=True),
+    sa.Column('title', sa.String(length=150), nullable=False),
+    sa.Column('description', sa.String(length=300), nullable=True),
+    sa.Column('created_by', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['goat_id'], ['goat.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_created_kind', ['created_at', 'kind'], unique=False)
+
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade():
+    with op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_created_kind')
+
+    op.drop_table('activity')
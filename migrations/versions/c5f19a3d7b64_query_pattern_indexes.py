@@ -0,0 +1,55 @@
+"""Composite indexes for the blueprint query patterns
+
+Revision ID: c5f19a3d7b64
+Revises: 8d41c0f7e2a3
+Create Date: 2025-07-16 09:42:17.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f19a3d7b64'
+down_revision = '8d41c0f7e2a3'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with the __table_args__ in app/models.py; `flask check-query-plans`
+# verifies the query shapes that rely on them.
+INDEXES = {
+    'vaccination_event': [
+        ('ix_vaccination_event_goat_type_status_scheduled', ['goat_id', 'vaccine_type_id', 'status', 'scheduled_date']),
+        ('ix_vaccination_event_goat_type_status_given', ['goat_id', 'vaccine_type_id', 'status', 'actual_date_given']),
+        ('ix_vaccination_event_goat_scheduled', ['goat_id', 'scheduled_date']),
+        ('ix_vaccination_event_status_given', ['status', 'actual_date_given']),
+    ],
+    'sickness': [
+        ('ix_sickness_goat_status_created', ['goat_id', 'status', 'created_at']),
+        ('ix_sickness_status_goat', ['status', 'goat_id']),
+        ('ix_sickness_created_at', ['created_at']),
+    ],
+    'breeding_event': [
+        ('ix_breeding_event_doe_end', ['doe_id', 'mating_end_date']),
+        ('ix_breeding_event_buck_start', ['buck_id', 'mating_start_date']),
+        ('ix_breeding_event_status_start', ['status', 'mating_start_date']),
+    ],
+    'weight_log': [
+        ('ix_weight_log_goat_date', ['goat_id', 'date']),
+        ('ix_weight_log_created_at', ['created_at']),
+    ],
+}
+
+
+def upgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in reversed(indexes):
+                batch_op.drop_index(name)
@@ -0,0 +1,39 @@
+"""Daily herd size history
+
+Revision ID: d3c8a5e1f047
+Revises: b6e0d4f2a873
+Create Date: 2025-07-21 17:05:49.613208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3c8a5e1f047'
+down_revision = 'b6e0d4f2a873'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('herd_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('goat_type_id', sa.Integer(), nullable=True),
+    sa.Column('sex', sa.String(length=10), nullable=True),
+    sa.Column('location', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['goat_type_id'], ['goat_type.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('herd_snapshot', schema=None) as batch_op:
+        batch_op.create_index('ix_herd_snapshot_day_status', ['day', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('herd_snapshot', schema=None) as batch_op:
+        batch_op.drop_index('ix_herd_snapshot_day_status')
+
+    op.drop_table('herd_snapshot')
@@ -0,0 +1,43 @@
+"""Vaccine due projection
+
+Revision ID: e2a84f6c1d09
+Revises: c5f19a3d7b64
+Create Date: 2025-07-17 14:05:52.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a84f6c1d09'
+down_revision = 'c5f19a3d7b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created empty; the first dashboard/report/calendar request (or
+    # `flask refresh-vaccine-due`) fills it for the whole herd.
+    op.create_table('vaccine_due',
+    sa.Column('goat_id', sa.Integer(), nullable=False),
+    sa.Column('vaccine_type_id', sa.Integer(), nullable=False),
+    sa.Column('last_given', sa.Date(), nullable=True),
+    sa.Column('next_due', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('computed_on', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['goat_id'], ['goat.id'], ),
+    sa.ForeignKeyConstraint(['vaccine_type_id'], ['vaccine_type.id'], ),
+    sa.PrimaryKeyConstraint('goat_id', 'vaccine_type_id')
+    )
+    with op.batch_alter_table('vaccine_due', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_vaccine_due_next_due'), ['next_due'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vaccine_due_computed_on'), ['computed_on'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('vaccine_due', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_vaccine_due_computed_on'))
+        batch_op.drop_index(batch_op.f('ix_vaccine_due_next_due'))
+
+    op.drop_table('vaccine_due')
@@ -0,0 +1,26 @@
+"""Goat status/sex index for the ready-does query
+
+Revision ID: f7b3c2d8e915
+Revises: e2a84f6c1d09
+Create Date: 2025-07-18 10:27:40.664193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b3c2d8e915'
+down_revision = 'e2a84f6c1d09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('goat', schema=None) as batch_op:
+        batch_op.create_index('ix_goat_status_sex', ['status', 'sex'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('goat', schema=None) as batch_op:
+        batch_op.drop_index('ix_goat_status_sex')
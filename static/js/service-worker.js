@@ -1,29 +1,340 @@
 // Service Worker for Goat Manager App
-const CACHE_NAME = 'goat-manager-v1';
-const urlsToCache = [
-  '/',
-  '/static/css/style.css',
-  '/static/js/script.js',
-  '/static/icons/icon-192.png',
-  '/static/manifest.json'
-];
+// PRECACHE ({version, files: [{url, revision}]}) is inlined by the
+// /service-worker.js route from the manifest `flask build-precache` writes.
+const CACHE_PREFIX = 'goat-manager-';
+const PRECACHE_CACHE = CACHE_PREFIX + 'precache-' + PRECACHE.version;
+const PAGES_CACHE = CACHE_PREFIX + 'pages-v1';
+const DATA_CACHE = CACHE_PREFIX + 'data-v1';
+const STATIC_CACHE = CACHE_PREFIX + 'static-v1';
+const CURRENT_CACHES = [PRECACHE_CACHE, PAGES_CACHE, DATA_CACHE, STATIC_CACHE];
+// How long the dashboard waits for the network before showing its cached copy
+const NETWORK_TIMEOUT_MS = 3000;
+
+const precachedUrls = new Set(PRECACHE.files.map(function(file) { return file.url; }));
 
 self.addEventListener('install', function(event) {
+  // Bypass the HTTP cache so a new version never stores an old asset
+  event.waitUntil(
+    caches.open(PRECACHE_CACHE).then(function(cache) {
+      return Promise.all(PRECACHE.files.map(function(file) {
+        return fetch(new Request(file.url, { cache: 'reload' })).then(function(response) {
+          if (!response.ok) {
+            throw new Error('precache failed: ' + file.url);
+          }
+          return cache.put(file.url, response);
+        });
+      }));
+    }).then(function() {
+      return self.skipWaiting();
+    })
+  );
+});
+
+self.addEventListener('activate', function(event) {
+  // Drop caches left by older versions
   event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then(function(cache) {
-        return cache.addAll(urlsToCache);
-      })
+    caches.keys().then(function(names) {
+      return Promise.all(names.filter(function(name) {
+        return CURRENT_CACHES.indexOf(name) === -1;
+      }).map(function(name) {
+        return caches.delete(name);
+      }));
+    }).then(function() {
+      return self.clients.claim();
+    })
   );
 });
 
+// --- Strategies ---
+
+function cacheable(response) {
+  // Redirects (e.g. to the login page), errors and no-store pages (those
+  // showing flash messages) are never stored
+  return response.ok && !response.redirected && response.type === 'basic' &&
+    !/no-store/.test(response.headers.get('Cache-Control') || '');
+}
+
+// Fetch, revalidating with the server (ETags make an unchanged page a 304),
+// and keep the cache in step with the answer.
+function fetchAndCache(cacheName, request) {
+  return fetch(request, { cache: 'no-cache' }).then(function(response) {
+    const copy = response.clone();
+    caches.open(cacheName).then(function(cache) {
+      return cacheable(copy) ? cache.put(request, copy) : cache.delete(request);
+    });
+    return response;
+  });
+}
+
+function cacheOnlyMatch(cacheName, request) {
+  return caches.open(cacheName).then(function(cache) {
+    return cache.match(request);
+  });
+}
+
+function offlinePage(title, message, status) {
+  const back = '<a href="javascript:history.back()">Go back</a>';
+  return new Response(
+    '<!doctype html><meta name="viewport" content="width=device-width, initial-scale=1">' +
+    '<title>' + title + '</title><body style="font-family:sans-serif;padding:2rem">' +
+    '<h3>' + title + '</h3><p>' + message + '</p>' + back + '</body>',
+    { status: status, headers: { 'Content-Type': 'text/html; charset=utf-8' } }
+  );
+}
+
+function offlineFallback(cacheName, request) {
+  return cacheOnlyMatch(cacheName, request).then(function(hit) {
+    if (hit) {
+      return hit;
+    }
+    if (request.mode === 'navigate') {
+      return offlinePage('You are offline', 'This page hasn\'t been opened on this device yet. Try again when you have signal.', 503);
+    }
+    return Response.error();
+  });
+}
+
+// Answer from the cache at once and refresh it in the background
+function staleWhileRevalidate(event, cacheName) {
+  const network = fetchAndCache(cacheName, event.request);
+  event.waitUntil(network.catch(function() {}));
+  return cacheOnlyMatch(cacheName, event.request).then(function(hit) {
+    return hit || network.catch(function() {
+      return offlineFallback(cacheName, event.request);
+    });
+  });
+}
+
+// Prefer the network, but fall back to the cache when it is down or slower
+// than timeoutMs; a late network answer still refreshes the cache.
+function networkFirst(event, cacheName, timeoutMs) {
+  const network = fetchAndCache(cacheName, event.request);
+  event.waitUntil(network.catch(function() {}));
+  const sources = [network];
+  if (timeoutMs) {
+    sources.push(new Promise(function(resolve) {
+      setTimeout(resolve, timeoutMs);
+    }).then(function() {
+      return cacheOnlyMatch(cacheName, event.request);
+    }).then(function(hit) {
+      return hit || network;
+    }));
+  }
+  return Promise.race(sources).catch(function() {
+    return offlineFallback(cacheName, event.request);
+  });
+}
+
+function cacheFirst(cacheName, request) {
+  return caches.match(request).then(function(hit) {
+    return hit || fetch(request).then(function(response) {
+      if (cacheable(response)) {
+        const copy = response.clone();
+        caches.open(cacheName).then(function(cache) {
+          cache.put(request, copy);
+        });
+      }
+      return response;
+    });
+  });
+}
+
+// --- Routing ---
+
+// Goat detail pages, not the /goats/add and /goats/import forms
+const GOAT_PAGE = /^\/goats\/(?!add$|import$)[^/]+$/;
+
 self.addEventListener('fetch', function(event) {
-  event.respondWith(
-    caches.match(event.request)
-      .then(function(response) {
-        // Return cached version or fetch from network
-        return response || fetch(event.request);
+  const request = event.request;
+  const url = new URL(request.url);
+
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+  if (request.method === 'POST') {
+    event.respondWith(postOrQueue(request));
+    return;
+  }
+  if (request.method !== 'GET') {
+    return;
+  }
+
+  if (precachedUrls.has(url.pathname)) {
+    event.respondWith(cacheFirst(STATIC_CACHE, url.pathname));
+  } else if (GOAT_PAGE.test(url.pathname) || url.pathname === '/calendar/api/events') {
+    event.respondWith(staleWhileRevalidate(event, DATA_CACHE));
+  } else if (url.pathname === '/dashboard') {
+    event.respondWith(networkFirst(event, PAGES_CACHE, NETWORK_TIMEOUT_MS));
+  } else if (request.mode === 'navigate') {
+    event.respondWith(networkFirst(event, PAGES_CACHE));
+  } else if (url.pathname.startsWith('/static/')) {
+    event.respondWith(cacheFirst(STATIC_CACHE, request));
+  }
+});
+
+self.addEventListener('message', function(event) {
+  // Sent by pages rendered logged out: cached pages belong to the last user
+  if (event.data === 'clear-pages') {
+    event.waitUntil(Promise.all([caches.delete(PAGES_CACHE), caches.delete(DATA_CACHE)]));
+  }
+});
+
+// --- Offline mutation queue ---
+// Form posts that fail for lack of a connection are translated into /sync
+// operations {id, type, ts, data} and kept in IndexedDB. The queue is
+// flushed in batches when the connection returns; the server applies each
+// id once, so a flush interrupted halfway can simply be repeated.
+const SYNC_DB = 'goat-manager-sync';
+const SYNC_STORE = 'queue';
+const SYNC_BATCH = 500;
+
+function openQueue() {
+  return new Promise(function(resolve, reject) {
+    const open = indexedDB.open(SYNC_DB, 1);
+    open.onupgradeneeded = function() {
+      open.result.createObjectStore(SYNC_STORE, { keyPath: 'id' });
+    };
+    open.onsuccess = function() { resolve(open.result); };
+    open.onerror = function() { reject(open.error); };
+  });
+}
+
+function queueTransaction(mode, work) {
+  return openQueue().then(function(db) {
+    return new Promise(function(resolve, reject) {
+      const tx = db.transaction(SYNC_STORE, mode);
+      const result = work(tx.objectStore(SYNC_STORE));
+      tx.oncomplete = function() { resolve(result && result.result); };
+      tx.onerror = function() { reject(tx.error); };
+    });
+  });
+}
+
+function queueOperations(ops) {
+  return queueTransaction('readwrite', function(store) {
+    ops.forEach(function(op) { store.put(op); });
+  });
+}
+
+function operation(type, data) {
+  return { id: crypto.randomUUID(), type: type, ts: Date.now(), data: data };
+}
+
+// Form post -> operations; null for forms that can't be replayed later
+function formOperations(url, form) {
+  const path = url.pathname;
+  const action = form.get('action');
+  let match;
+
+  if (path === '/quickentry' && action === 'add_weight') {
+    const ops = [];
+    for (const [name, weight] of form.entries()) {
+      const goatId = name.startsWith('weight_') && name.slice(7);
+      if (goatId && weight && form.get('date_' + goatId)) {
+        ops.push(operation('weight', { goat_id: Number(goatId), weight: weight, date: form.get('date_' + goatId) }));
       }
-    )
-  );
+    }
+    return ops;
+  }
+  if ((path === '/quickentry' && action === 'batch_vaccine') || path === '/vaccines/batch') {
+    return [operation('vaccination', {
+      goat_ids: form.getAll('goat_ids').map(Number),
+      vaccine_type_id: form.get('vaccine_type_id'),
+      date: form.get('actual_date_given'),
+      notes: form.get('notes'),
+      given_by: form.get('given_by'),
+      batch_number: form.get('batch_number')
+    })];
+  }
+  if (path === '/quickentry' && action === 'add_sickness') {
+    // Photos stay on the device form; only text records are queued
+    if (form.getAll('photos').some(function(photo) { return photo && photo.size; })) {
+      return null;
+    }
+    return [operation('sickness', { goat_id: Number(form.get('goat_id')), sickness: form.get('sickness'), medicine: form.get('medicine') })];
+  }
+  if ((match = path.match(/^\/goats\/([^/]+)\/add_weight$/))) {
+    return [operation('weight', { tag: decodeURIComponent(match[1]), weight: form.get('weight'), date: form.get('date') })];
+  }
+  if ((match = path.match(/^\/goats\/([^/]+)\/sickness$/))) {
+    return [operation('sickness', { tag: decodeURIComponent(match[1]), sickness: form.get('sickness'), medicine: form.get('medicine') })];
+  }
+  return null;
+}
+
+function postOrQueue(request) {
+  const copy = request.clone();
+  return fetch(request).then(function(response) {
+    // A write can change any goat page or calendar feed served
+    // stale-while-revalidate. Form posts answer with a redirect, which a
+    // navigation sees as an opaque redirect; clearing the cache first also
+    // sends the page it leads to (and its flash message) to the network.
+    if (!response.ok && response.type !== 'opaqueredirect') {
+      return response;
+    }
+    return caches.delete(DATA_CACHE).then(function() {
+      return response;
+    });
+  }, function() {
+    return copy.formData().catch(function() { return null; }).then(function(form) {
+      const ops = form && formOperations(new URL(copy.url), form);
+      if (!ops) {
+        return offlinePage('You are offline', 'This form can\'t be saved offline. Try again when you have signal.', 503);
+      }
+      return queueOperations(ops).then(function() {
+        if (self.registration.sync) {
+          self.registration.sync.register('goat-sync').catch(function() {});
+        }
+        return offlinePage('Saved offline', 'No connection right now. This entry is stored on the device and will sync automatically when you are back online.', 202);
+      });
+    });
+  });
+}
+
+function flushQueue() {
+  return queueTransaction('readonly', function(store) {
+    return store.getAll();
+  }).then(function(ops) {
+    ops.sort(function(a, b) { return a.ts - b.ts; });
+    let chain = Promise.resolve();
+    for (let i = 0; i < ops.length; i += SYNC_BATCH) {
+      const batch = ops.slice(i, i + SYNC_BATCH);
+      chain = chain.then(function() {
+        return fetch('/sync', {
+          method: 'POST',
+          credentials: 'same-origin',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ operations: batch })
+        }).then(function(response) {
+          if (!response.ok) {
+            throw new Error('sync failed: ' + response.status);
+          }
+          return response.json();
+        }).then(function(body) {
+          // Applied and rejected operations are done; anything else is retried
+          const done = body.results.filter(function(result) {
+            return result.status === 'applied' || result.status === 'rejected';
+          });
+          return queueTransaction('readwrite', function(store) {
+            done.forEach(function(result) { store.delete(result.id); });
+          });
+        }).then(function() {
+          return caches.delete(DATA_CACHE);
+        });
+      });
+    }
+    return chain;
+  });
+}
+
+self.addEventListener('sync', function(event) {
+  if (event.tag === 'goat-sync') {
+    event.waitUntil(flushQueue());
+  }
+});
+
+self.addEventListener('message', function(event) {
+  if (event.data === 'flush') {
+    event.waitUntil(flushQueue().catch(function() {}));
+  }
 });